@@ -0,0 +1,121 @@
+#Module: hec2_serving.py
+# # # Benchmarks of the HEC2 WSGI receiver (sources/hec2_wsgi_module.py): load test of the wsgiref server against
+# # # HecThreadPoolServer, and events/sec for plain, gzip and deflate batches.
+# # # Run from the repository root: python -m bench.hec2_serving
+# # #--------------------------------------------------------------
+
+import json
+import gzip
+import zlib
+import time
+import threading
+import http.client
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+#-----------------------  Importing my modules & local configs -------------------
+from sources.hec2_wsgi_module import splunk_hec_app, HecThreadPoolServer, CACHE_DIR, HEC2_WORKERS
+from utils.queues_module import get_ingest_queue
+from configs.globals_module import HEC_RECV_PATH
+HEC2_TOKEN = "your_splunk_token"  # Token the load tests send. Must be in HEC_TOKENS_FILE (it is in the shipped example)
+#-----------------------  Importing my modules & local configs -------------------
+
+#--------------------------------------------------------------
+class _QuietWSGIRequestHandler(WSGIRequestHandler):
+    """wsgiref handler without the per-request stderr line (load test only)"""
+    def log_message(self, format, *args):
+        pass
+#--------------------------------------------------------------
+def _load_client(port, requests_per_connection, body, headers, latencies, errors):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    for _ in range(requests_per_connection):
+        start = time.perf_counter()
+        try:
+            conn.request('POST', HEC_RECV_PATH, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+#End of _load_client()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+# Load test: `connections` concurrent keep-alive clients against the wsgiref server and HecThreadPoolServer.
+# Reports requests/sec and p99 latency for each.
+def load_test_hec2(connections=100, requests_per_connection=50, workers=HEC2_WORKERS):
+    body = json.dumps({"event": "load test event", "host": "localhost"}).encode('utf-8')
+    headers = {'Content-Type': 'application/json', 'X-Splunk-HEC-Token': HEC2_TOKEN}
+    get_ingest_queue(CACHE_DIR)
+    results = {}
+    for mode in ('simple', 'threaded'):
+        if mode == 'simple':
+            httpd = make_server('127.0.0.1', 0, splunk_hec_app, handler_class=_QuietWSGIRequestHandler)
+        else:
+            httpd = HecThreadPoolServer(('127.0.0.1', 0), splunk_hec_app, workers)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+        latencies, errors = [], []
+        clients = [threading.Thread(target=_load_client, args=(httpd.server_port, requests_per_connection, body,
+                                                               headers, latencies, errors))
+                   for _ in range(connections)]
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+        httpd.shutdown()
+        httpd.server_close()
+
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+        results[mode] = {'rps': len(latencies) / elapsed, 'p99_ms': p99, 'errors': len(errors)}
+        print(f"{mode:>9}: {results[mode]['rps']:>10,.0f} req/sec   p99 {p99:8.1f} ms   errors: {len(errors)}")
+    return results
+#End of load_test_hec2()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+# Events/sec and bytes on the wire for HEC batches posted plain, gzip and deflate to HecThreadPoolServer
+def benchmark_hec_compression(batches=100, events_per_batch=1000):
+    event = {"event": {"message": "Accepted publickey for root from 10.0.0.1 port 51234", "host": "test-host"},
+             "sourcetype": "linux_secure", "index": "main"}
+    body = b''.join(json.dumps(dict(event, time=1712577600 + i)).encode('utf-8') for i in range(events_per_batch))
+    encoded = {'none': body, 'gzip': gzip.compress(body, 6), 'deflate': zlib.compress(body, 6)}
+    get_ingest_queue(CACHE_DIR)
+    httpd = HecThreadPoolServer(('127.0.0.1', 0), splunk_hec_app, 4)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    results = {}
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', httpd.server_port, timeout=60)
+        for encoding, payload in encoded.items():
+            headers = {'Content-Type': 'application/json', 'X-Splunk-HEC-Token': HEC2_TOKEN}
+            if encoding != 'none':
+                headers['Content-Encoding'] = encoding
+            start = time.perf_counter()
+            for _ in range(batches):
+                conn.request('POST', HEC_RECV_PATH, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"[{encoding}] server answered {response.status}")
+            elapsed = time.perf_counter() - start
+            results[encoding] = {'events_per_sec': batches * events_per_batch / elapsed,
+                                 'wire_bytes': batches * len(payload)}
+            print(f"{encoding:>8}: {results[encoding]['events_per_sec']:>12,.0f} events/sec   "
+                  f"{len(payload):>9,} bytes/batch ({len(payload) / len(body):.0%} of plain)")
+        conn.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    return results
+#End of benchmark_hec_compression()
+#--------------------------------------------------------------
+
+if __name__ == "__main__":
+    load_test_hec2()
+    benchmark_hec_compression()
@@ -0,0 +1,117 @@
+#Module: hec3_serving.py
+# # # Benchmark of the HEC3 receiver (sources/hec3_splunk_Flask_receiver_module.py): requests/sec and p99 of the
+# # # previous serving path (app.run(debug=True) with the old handler) against start_hec3_server(workers, threads).
+# # # Run from the repository root: python -m bench.hec3_serving
+# # #--------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import socket
+import http.client
+import multiprocessing
+from flask import Flask, request, jsonify
+from colorama import Back, Fore, init
+init(autoreset=True)  # Automatically reset color after each print
+
+#-----------------------  Importing my modules & local configs -------------------
+from utils.misc_utils_module import is_json
+from utils.queues_module import get_ingest_queue
+from sources.hec3_splunk_Flask_receiver_module import start_hec3_server, CACHE_DIR, HEC3_WORKERS, HEC3_THREADS
+#-----------------------  Importing my modules & local configs -------------------
+
+#--------------------------------------------------------------
+# The handler receive_event() replaced: request.get_json(), str(), is_json() re-parse, json.dumps(), prints per request
+def _legacy_receive_event():
+    try:
+        event_data = request.get_json()  # Get JSON payload from the incoming request
+        str_event_data = str(event_data)
+        print(f"{Back.GREEN}Received event data: [{str_event_data}]")
+        if is_json (str_event_data):
+            # Process JSON data as needed
+            print(f"{Fore.LIGHTWHITE_EX}1)Received JSON event data: {str_event_data}")
+            get_ingest_queue(CACHE_DIR).put(json.dumps(event_data))  # Send raw data to the queue
+        else:
+             # Process raw data as needed
+            print(f"{Fore.LIGHTMAGENTA_EX}2)Received raw event data: {event_data}")
+            get_ingest_queue(CACHE_DIR).put(json.dumps(event_data))  # Send raw data to the queue
+
+        if not event_data:
+            return jsonify({"error": "No event data found"}), 400
+        return jsonify({"status": "Event received and sent to Splunk successfully"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+#End of _legacy_receive_event()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _wait_for_port(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port}")
+#--------------------------------------------------------------
+def _serve_legacy(port):
+    """The previous serving path: app.run(debug=True) with the previous handler (reloader off to stay one process)"""
+    legacy_app = Flask('hec3_legacy')
+    legacy_app.add_url_rule('/receive_event', 'receive_event', _legacy_receive_event, methods=['POST'])
+    sys.stdout = open(os.devnull, 'w')      # Its per-request prints still cost the same, just not on screen
+    legacy_app.run(host='127.0.0.1', port=port, debug=True, use_reloader=False)
+#--------------------------------------------------------------
+def _bench_client(port, count, body):
+    """Client process: one keep-alive connection, count requests. Returns (latencies, errors)"""
+    latencies, errors = [], []
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/receive_event', body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies, errors
+#--------------------------------------------------------------
+# Requests/sec and p99: the previous app.run(debug=True) path vs start_hec3_server(workers, threads)
+def benchmark_hec3_serving(connections=32, requests_per_connection=100, workers=HEC3_WORKERS, threads=HEC3_THREADS, port=18080):
+    body = json.dumps({"timestamp": "2025-04-08T12:00:00", "hostname": "test-host",
+                       "message": "This is a test event from Flask server"}).encode('utf-8')
+    results = {}
+    for name, target, args in (("debug server", _serve_legacy, (port,)),
+                               ("production", start_hec3_server, (0, workers, threads, '127.0.0.1', port + 1))):
+        server_port = args[0] if name == "debug server" else port + 1
+        server = multiprocessing.Process(target=target, args=args)     # Not daemonic: the supervisor forks workers
+        server.start()
+        try:
+            _wait_for_port(server_port)
+            latencies, errors = [], []
+            with multiprocessing.Pool(connections) as clients:      # Client processes: the GIL must not cap the load
+                start = time.perf_counter()
+                for client_latencies, client_errors in clients.starmap(_bench_client, [(server_port, requests_per_connection, body)] * connections):
+                    latencies += client_latencies
+                    errors += client_errors
+                elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()      # SIGTERM: the supervisor stops its workers
+            server.join(10)
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+        results[name] = {'rps': len(latencies) / elapsed, 'p99_ms': p99, 'errors': len(errors)}
+        print(f"{name:>13}: {results[name]['rps']:>9,.0f} req/sec   p99 {p99:8.1f} ms   errors: {len(errors)}")
+    return results
+#End of benchmark_hec3_serving()
+#--------------------------------------------------------------
+
+if __name__ == "__main__":
+    benchmark_hec3_serving()
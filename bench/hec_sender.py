@@ -0,0 +1,49 @@
+#Module: hec_sender.py
+# # # Benchmark of the HEC output (destinations/splunk_hec3_sender_module.py): one requests.post per event, as
+# # # send_event_to_splunk() does, against the batching HecSender, both posting to the stub HEC of bench/stub_servers.py.
+# # # Run from the repository root: python -m bench.hec_sender
+# # #--------------------------------------------------------------
+
+import json
+import time
+import requests
+
+#-----------------------  Importing my modules & local configs -------------------
+from destinations.splunk_hec3_sender_module import HecSender, HEC_EVENT_PATH, headers
+from bench.stub_servers import start_stub_hec_server
+#-----------------------  Importing my modules & local configs -------------------
+
+#--------------------------------------------------------------
+# Events/sec against a local stub HEC: one requests.post per event (as send_event_to_splunk() does) vs HecSender
+def benchmark_hec_sender(events=50000, legacy_events=2000):
+    server = start_stub_hec_server()
+    event = {"timestamp": "2025-04-08T12:00:00", "hostname": "test-host", "message": "This is a test event from Python"}
+    results = {}
+    try:
+        start = time.perf_counter()
+        for _ in range(legacy_events):
+            payload = {"event": event, "sourcetype": "_json", "index": "main"}
+            requests.post(f'{server.url}{HEC_EVENT_PATH}', headers=headers, data=json.dumps(payload))
+        results['per-event post'] = legacy_events / (time.perf_counter() - start)
+
+        received = server.events
+        sender = HecSender(url=server.url, token='stub-token')
+        start = time.perf_counter()
+        for _ in range(events):
+            sender.send(event)
+        sender.close()
+        results['HecSender'] = events / (time.perf_counter() - start)
+        stats = sender.stats()
+        print(f"per-event post: {results['per-event post']:>12,.0f} events/sec")
+        print(f"     HecSender: {results['HecSender']:>12,.0f} events/sec   [{results['HecSender'] / results['per-event post']:.0f}x] "
+              f"[batches:{stats['batches']}] [gzip {stats['raw_bytes']:,} -> {stats['sent_bytes']:,} bytes] "
+              f"[stub received:{server.events - received}/{events}]")
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+#End of benchmark_hec_sender()
+#--------------------------------------------------------------
+
+if __name__ == "__main__":
+    benchmark_hec_sender()
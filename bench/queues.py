@@ -0,0 +1,70 @@
+#Module: queues.py
+# # # Benchmarks of utils/queues_module.py: the old per-message spool pattern against IngestQueue.put(), and DiskQueue
+# # # append throughput and fsync count per durability mode.
+# # # Run from the repository root: python -m bench.queues
+# # #--------------------------------------------------------------
+
+import os
+import time
+import shutil
+import tempfile
+
+#-----------------------  Importing my modules & local configs -------------------
+from utils.queues_module import IngestQueue, DiskQueue, DURABILITY_MODES, setup_cache_directory, send_to_que
+#-----------------------  Importing my modules & local configs -------------------
+
+#--------------------------------------------------------------------------
+# Throughput benchmark: the old per-message pattern (setup_cache_directory() + send_to_que() with fresh state,
+# as handle_syslog_message() used to do) against one long-lived IngestQueue.put()
+def benchmark_ingest_queue(messages=20000):
+    data = b"<13>Apr  8 12:00:00 test-host sshd[2231]: Accepted publickey for root from 10.0.0.1 port 51234"
+    work_dir = tempfile.mkdtemp(prefix="osps_bench_")
+    results = {}
+    try:
+        cache_dir = os.path.join(work_dir, "before")
+        start = time.perf_counter()
+        for _ in range(messages):
+            setup_cache_directory(cache_dir)
+            send_to_que(data, cache_dir, 1, time.time(), [], 0)
+        results['before'] = messages / (time.perf_counter() - start)
+
+        que = IngestQueue(os.path.join(work_dir, "after"))
+        start = time.perf_counter()
+        for _ in range(messages):
+            que.put(data)
+        que.flush()
+        results['after'] = messages / (time.perf_counter() - start)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"before (per-message setup): {results['before']:>12,.0f} msgs/sec")
+    print(f"after  (IngestQueue.put)  : {results['after']:>12,.0f} msgs/sec   [{results['after'] / results['before']:.1f}x]")
+    return results
+#End of function benchmark_ingest_queue()
+#--------------------------------------------------------------------------
+#--------------------------------------------------------------------------
+# DiskQueue append throughput and fsync count for each durability mode. Records are appended in batches of
+# batch_size, the way IngestQueue spills them.
+def benchmark_disk_queue_durability(records=100000, batch_size=100, record_size=200):
+    batch = [b'x' * record_size] * batch_size
+    work_dir = tempfile.mkdtemp(prefix="osps_bench_")
+    results = {}
+    try:
+        for mode in DURABILITY_MODES:
+            disk = DiskQueue(os.path.join(work_dir, mode), durability=mode)
+            start = time.perf_counter()
+            for _ in range(records // batch_size):
+                disk.append_many(batch)
+            disk.close()        # Includes the final fsync for 'interval'/'batch'
+            elapsed = time.perf_counter() - start
+            results[mode] = {'records_per_sec': records / elapsed, 'fsyncs': disk.fsyncs}
+            print(f"{mode:>8}: {results[mode]['records_per_sec']:>12,.0f} records/sec   fsyncs: {disk.fsyncs}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+#End of function benchmark_disk_queue_durability()
+#--------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    benchmark_ingest_queue()
+    benchmark_disk_queue_durability()
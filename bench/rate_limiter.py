@@ -0,0 +1,37 @@
+#Module: rate_limiter.py
+# # # Benchmark of RateLimiter.admit() (utils/rate_limit_module.py) with many distinct sources, and one flooding source.
+# # # Run from the repository root: python -m bench.rate_limiter
+# # #--------------------------------------------------------------
+
+import time
+import random
+
+#-----------------------  Importing my modules & local configs -------------------
+from utils.rate_limit_module import RateLimiter, RATE_LIMIT_MAX_KEYS
+#-----------------------  Importing my modules & local configs -------------------
+
+#--------------------------------------------------------------
+# admit() throughput with many distinct sources, and the bucket count staying at max_keys
+def benchmark_rate_limiter(events=1000000, sources=1000000, max_keys=RATE_LIMIT_MAX_KEYS):
+    limiter = RateLimiter(rate=100, burst=200, policy='drop', max_keys=max_keys)
+    keys = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(sources)]
+    picks = [keys[random.randrange(sources)] for _ in range(events)]
+    start = time.perf_counter()
+    for key in picks:
+        limiter.admit(key)
+    elapsed = time.perf_counter() - start
+    stats = limiter.stats()
+    print(f"rate limiter: {events / elapsed:,.0f} admits/sec over {sources:,} sources  [buckets:{stats['keys']:,}] {stats}")
+
+    noisy = RateLimiter(rate=1000, burst=1000, policy='drop')
+    start = time.perf_counter()
+    for _ in range(events):
+        noisy.admit('10.0.0.1')
+    elapsed = time.perf_counter() - start
+    print(f"rate limiter: one flooding source at {events / elapsed:,.0f} events/sec -> passed {noisy.counters['passed']:,}, shed {noisy.counters['shed']:,}")
+    return stats
+#End of benchmark_rate_limiter()
+#--------------------------------------------------------------
+
+if __name__ == "__main__":
+    benchmark_rate_limiter()
@@ -0,0 +1,112 @@
+#Module: rest1_pagination.py
+# # # Benchmarks of the REST API1 collector (sources/rest1_api_collector_module.py) against bench/stub_servers.py:
+# # # sequential vs concurrent paging, memory while streaming a large collection, and incremental polling cost.
+# # # Run from the repository root: python -m bench.rest1_pagination
+# # #--------------------------------------------------------------
+
+import os
+import time
+
+#-----------------------  Importing my modules & local configs -------------------
+from sources.rest1_api_collector_module import fetch_data_from_api, fetch_data_from_api_concurrent, iter_api_pages, \
+    incremental_pages, collect_to_queue, REST1_MAX_IN_FLIGHT
+from utils.checkpoint_module import CheckpointStore
+from bench.stub_servers import start_stub_paged_api
+#-----------------------  Importing my modules & local configs -------------------
+
+#--------------------------------------------------------------
+# Sequential fetch_data_from_api() vs iter_pages_concurrent() against the stub API
+def benchmark_rest1_pagination(pages=200, page_size=50, latency=0.02, max_in_flight=REST1_MAX_IN_FLIGHT):
+    server = start_stub_paged_api(pages, page_size, latency)
+    try:
+        start = time.perf_counter()
+        sequential = fetch_data_from_api(server.url, None, None)
+        sequential_time = time.perf_counter() - start
+        start = time.perf_counter()
+        concurrent = fetch_data_from_api_concurrent(server.url, None, None, max_in_flight)
+        concurrent_time = time.perf_counter() - start
+    finally:
+        server.shutdown()
+    in_order = [record['id'] for record in concurrent] == list(range(pages * page_size))
+    print(f"sequential: {len(sequential)} records in {sequential_time:.2f}s  concurrent[{max_in_flight}]: "
+          f"{len(concurrent)} records in {concurrent_time:.2f}s  ({sequential_time / concurrent_time:.1f}x) [in order:{in_order}]")
+    return sequential_time, concurrent_time
+#End of benchmark_rest1_pagination()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _current_rss():
+    """Resident set size of this process in bytes (Linux /proc). 0 if unavailable"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+#--------------------------------------------------------------
+class _CountingQueue:
+    """Stands in for IngestQueue in the memory check: counts and forgets, so only the collector's memory is measured"""
+    def __init__(self):
+        self.total = 0
+    def put_many(self, records):
+        self.total += len(records)
+#--------------------------------------------------------------
+# Memory check: RSS while streaming a large collection into a queue must stay flat (bounded by a few pages), unlike
+# fetch_data_from_api() which grows with the dataset. Streaming runs first since RSS rarely shrinks afterwards.
+def benchmark_rest1_memory(pages=1000, page_size=500, max_in_flight=REST1_MAX_IN_FLIGHT, max_growth=32 * 1024 * 1024):
+    server = start_stub_paged_api(pages, page_size, latency=0)
+    try:
+        que = _CountingQueue()
+        samples = []
+        def sampled(pages_iter):
+            for item in pages_iter:
+                samples.append(_current_rss())
+                yield item
+        start = time.perf_counter()
+        collect_to_queue(sampled(iter_api_pages(server.url, None, None, max_in_flight)), que)
+        elapsed = time.perf_counter() - start
+        warm = samples[len(samples) // 10]      # After connections, threads and buffers are set up
+        streaming_growth = max(samples) - warm
+
+        before = _current_rss()
+        all_data = fetch_data_from_api(server.url, None, None)
+        accumulated_growth = _current_rss() - before
+    finally:
+        server.shutdown()
+    flat = streaming_growth <= max_growth and que.total == pages * page_size
+    print(f"streaming: {que.total} records in {elapsed:.1f}s, RSS growth {streaming_growth / 1e6:.1f} MB  "
+          f"accumulating: {len(all_data)} records, RSS growth {accumulated_growth / 1e6:.1f} MB  [flat:{flat}]")
+    return streaming_growth, accumulated_growth, flat
+#End of benchmark_rest1_memory()
+#--------------------------------------------------------------
+
+#--------------------------------------------------------------
+# Polling cost: a full first run, a poll with nothing new, and a poll after new records arrived
+def benchmark_rest1_incremental(pages=200, page_size=50, new_records=120, max_in_flight=REST1_MAX_IN_FLIGHT,
+                                checkpoint_path='checkpoints/benchmark_rest1.json'):
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    server = start_stub_paged_api(pages, page_size, latency=0.005)
+    results = []
+    try:
+        for run, added in (("full", 0), ("no change", 0), (f"+{new_records} records", new_records)):
+            server.total_records += added
+            server.requests = 0
+            store = CheckpointStore(checkpoint_path)       # Fresh object per run: state comes from the file
+            start_page = store.get(server.url).get('cursor', {}).get('page', 1)
+            que = _CountingQueue()
+            start = time.perf_counter()
+            collect_to_queue(incremental_pages(iter_api_pages(server.url, None, None, max_in_flight, 0, start_page, store),
+                                               store, server.url), que)
+            elapsed = time.perf_counter() - start
+            results.append((run, que.total, server.requests, elapsed))
+            print(f"{run:>18}: {que.total:6} records  {server.requests:4} requests  {elapsed:.2f}s  [resumed at page {start_page}]")
+    finally:
+        server.shutdown()
+        os.remove(checkpoint_path)
+    return results
+#End of benchmark_rest1_incremental()
+#--------------------------------------------------------------
+
+if __name__ == "__main__":
+    benchmark_rest1_pagination()
+    benchmark_rest1_memory()
+    benchmark_rest1_incremental()
@@ -0,0 +1,76 @@
+#Module: rest2_hateoas.py
+# # # Benchmarks of the REST API2 (HATEOAS) collector (sources/rest2_hateoas_api_collector_module.py) against
+# # # bench/stub_servers.py: link following with and without connection reuse and caching, and the parallel crawl.
+# # # Run from the repository root: python -m bench.rest2_hateoas
+# # #--------------------------------------------------------------
+
+import io
+import time
+import contextlib
+import requests
+
+#-----------------------  Importing my modules & local configs -------------------
+from sources.rest2_hateoas_api_collector_module import navigate_hateoas, crawl_hateoas, make_response_cache, \
+    REST2_TIMEOUT, REST2_CRAWL_WORKERS, REST2_CRAWL_PER_HOST
+from bench.stub_servers import start_stub_hateoas_api, start_stub_hateoas_tree
+#-----------------------  Importing my modules & local configs -------------------
+
+#--------------------------------------------------------------
+# Link following with a new connection per hop (bare requests.get) vs the shared session, then a cached second traversal
+def benchmark_hateoas_navigation(pages=300):
+    server = start_stub_hateoas_api(pages)
+    results = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):     # navigate_hateoas() prints every hop
+            start = time.perf_counter()
+            with requests.Session() as fresh:
+                for page in range(1, pages + 1):
+                    fresh.close()       # Drops pooled connections: every hop connects again, as requests.get() did
+                    fresh.get(f"{server.url[:-1]}{page}", timeout=REST2_TIMEOUT).json()
+            results['new connection per hop'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            navigate_hateoas(server.url, None, None)
+            results['shared session'] = time.perf_counter() - start
+
+            cache = make_response_cache(60)
+            navigate_hateoas(server.url, None, None, cache=cache)
+            server.requests = 0
+            start = time.perf_counter()
+            navigate_hateoas(server.url, None, None, cache=cache)
+            results['cached traversal'] = time.perf_counter() - start
+        cached_requests = server.requests
+    finally:
+        server.shutdown()
+    for name, elapsed in results.items():
+        print(f"{name:>24}: {pages / elapsed:8,.0f} hops/sec")
+    print(f"{'cached traversal':>24}: {cached_requests} requests for {pages} hops")
+    return results
+#End of benchmark_hateoas_navigation()
+#--------------------------------------------------------------
+
+#--------------------------------------------------------------
+# One link per round trip (workers=1) vs the parallel crawl over the same tree
+def benchmark_hateoas_crawl(fanout=10, latency=0.02, workers=REST2_CRAWL_WORKERS, per_host=REST2_CRAWL_PER_HOST):
+    server = start_stub_hateoas_tree(fanout, latency)
+    results = {}
+    try:
+        for name, crawl_workers, host_cap in (("1 worker", 1, 1), (f"{workers} workers, {per_host}/host", workers, per_host),
+                                              (f"{workers} workers, {workers}/host", workers, workers)):
+            server.requests = 0
+            with contextlib.redirect_stdout(io.StringIO()):     # make_hateoas_request() prints every request
+                start = time.perf_counter()
+                stats = crawl_hateoas(server.url, None, None, max_depth=3, workers=crawl_workers, per_host=host_cap)
+                elapsed = time.perf_counter() - start
+            results[name] = elapsed
+            print(f"{name:>24}: {stats['fetched']} resources in {elapsed:.2f}s ({stats['fetched'] / elapsed:,.0f}/sec) "
+                  f"[requests:{server.requests}] [duplicates skipped:{stats['duplicates']}]")
+    finally:
+        server.shutdown()
+    return results
+#End of benchmark_hateoas_crawl()
+#--------------------------------------------------------------
+
+if __name__ == "__main__":
+    benchmark_hateoas_navigation()
+    benchmark_hateoas_crawl()
@@ -0,0 +1,54 @@
+#Module: ring_buffer.py
+# # # Cross-process benchmark of the SPSC RingBuffer (utils/ring_buffer_module.py): this process writes, a forked
+# # # child reads zero-copy.
+# # # Run from the repository root: python -m bench.ring_buffer
+# # #--------------------------------------------------------------
+
+import time
+import multiprocessing
+
+#-----------------------  Importing my modules & local configs -------------------
+from utils.ring_buffer_module import RingBuffer
+#-----------------------  Importing my modules & local configs -------------------
+
+#--------------------------------------------------------------
+def _benchmark_reader(ring, records, result):
+    """Child process: consume records zero-copy and report the byte count"""
+    received = 0
+    total_bytes = 0
+    while received < records:
+        view = ring.peek()
+        if view is None:
+            continue
+        total_bytes += len(view)
+        view.release()
+        ring.release()
+        received += 1
+    result.value = total_bytes
+#End of _benchmark_reader()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+# Cross-process benchmark: one writer (this process) and one reader (forked child) over an anonymous ring
+def benchmark_ring_buffer(records=200000, record_size=200, capacity=4 * 1024 * 1024):
+    ring = RingBuffer(capacity)
+    result = multiprocessing.Value('Q', 0)
+    reader = multiprocessing.get_context('fork').Process(target=_benchmark_reader, args=(ring, records, result))
+    reader.start()
+    payload = b'x' * record_size
+    full_waits = 0
+    start = time.perf_counter()
+    for _ in range(records):
+        if not ring.put(payload):
+            full_waits += 1
+            ring.put_wait(payload)
+    reader.join()
+    elapsed = time.perf_counter() - start
+    ring.close()
+    print(f"ring buffer: {records / elapsed:,.0f} records/sec  {records * record_size / elapsed / 1e6:,.1f} MB/sec "
+          f"[full waits:{full_waits}] [reader bytes:{result.value}]")
+    return records / elapsed
+#End of benchmark_ring_buffer()
+#--------------------------------------------------------------
+
+if __name__ == "__main__":
+    benchmark_ring_buffer()
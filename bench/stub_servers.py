@@ -0,0 +1,200 @@
+#Module: stub_servers.py
+# # # Local HTTP servers standing in for the remote ends of the collectors and the HEC sender. Each one runs on a
+# # # daemon thread on 127.0.0.1 (port 0 = any free port) and is used by the benchmarks in bench/ and by tests/.
+# # #   start_stub_paged_api()     ?page=N JSON API with ETags (sources/rest1_api_collector_module.py)
+# # #   start_stub_hateoas_api()   HAL "next" chain (sources/rest2_hateoas_api_collector_module.py)
+# # #   start_stub_hateoas_tree()  HAL tree with duplicate and templated links (rest2 crawl)
+# # #   start_stub_hec_server()    Splunk HEC endpoint with indexer acknowledgement (destinations/splunk_hec3_sender_module.py)
+# # #--------------------------------------------------------------
+
+import json
+import gzip
+import time
+import socket
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+#-----------------------  Importing my modules & local configs -------------------
+from destinations.splunk_hec3_sender_module import HEC_ACK_PATH
+#-----------------------  Importing my modules & local configs -------------------
+
+#--------------------------------------------------------------
+# Local paged API (rest1): ?page=N returns page_size records and "next" until the last page,
+# then empty pages. Every response is delayed by latency seconds (the round trip we are hiding).
+# server.total_records can be raised to simulate new data; pages carry an ETag and answer If-None-Match with 304.
+# newest_first=True: page 1 starts with the newest record and records carry "updated_at" (= id), as GitHub lists.
+def start_stub_paged_api(pages=200, page_size=50, latency=0.02, port=0, newest_first=False):
+    class StubPagedApiHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        def setup(self):
+            super().setup()
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # Headers and body go out as two writes
+        def do_GET(self):
+            page = int(parse_qs(urlparse(self.path).query).get('page', ['1'])[0])
+            self.server.requests += 1
+            time.sleep(latency)
+            total = self.server.total_records
+            first = (page - 1) * page_size
+            records = [{'id': i} for i in range(first, min(first + page_size, total))]
+            if newest_first:
+                records = [{'id': total - 1 - record['id'], 'updated_at': total - 1 - record['id']} for record in records]
+            etag = f'"{page}-{len(records)}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = json.dumps({'results': records, 'next': first + page_size < total}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, format, *args):
+            pass
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubPagedApiHandler)
+    server.daemon_threads = True
+    server.total_records = pages * page_size
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/items"
+    return server
+#End of start_stub_paged_api()
+#--------------------------------------------------------------
+
+#--------------------------------------------------------------
+# Local HATEOAS API (rest2): /p/1 -> /p/2 -> ... -> /p/<pages> via _links.next (loop=True: last links to /p/1)
+def start_stub_hateoas_api(pages=100, loop=False, port=0):
+    class StubHateoasHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        def setup(self):
+            super().setup()
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # Headers and body go out as two writes
+        def do_GET(self):
+            self.server.requests += 1
+            page = int(self.path.rstrip('/').rsplit('/', 1)[-1]) if self.path.startswith('/p/') else 1
+            base = f"http://127.0.0.1:{self.server.server_address[1]}/p"
+            links = {'self': {'href': f"{base}/{page}"}}
+            if page < pages or loop:
+                links['next'] = {'href': f"{base}/{page % pages + 1}"}
+            body = json.dumps({'items': [{'id': page}], '_links': links}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/hal+json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, format, *args):
+            pass
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHateoasHandler)
+    server.daemon_threads = True
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/p/1"
+    return server
+#End of start_stub_hateoas_api()
+#--------------------------------------------------------------
+
+#--------------------------------------------------------------
+# Local HAL tree (rest2 crawl): /root -> /c/<i> (rel "collection") -> /c/<i>/<j> (rel "item"), items link
+# "related" to /c/0 (a duplicate) and "curies" to docs. Every response is delayed by latency seconds
+def start_stub_hateoas_tree(fanout=10, latency=0.02, port=0):
+    class StubHateoasTreeHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        def setup(self):
+            super().setup()
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        def do_GET(self):
+            self.server.requests += 1
+            time.sleep(latency)
+            parts = [part for part in self.path.split('/') if part]
+            links = {'self': {'href': self.path}, 'curies': [{'name': 'doc', 'href': '/docs/{rel}', 'templated': True}]}
+            if parts == ['root']:
+                links['collection'] = [{'href': f"/c/{i}"} for i in range(fanout)]
+            elif len(parts) == 2:
+                links['item'] = [{'href': f"/c/{parts[1]}/{j}"} for j in range(fanout)]
+            else:
+                links['related'] = {'href': '/c/0'}
+            body = json.dumps({'path': self.path, '_links': links}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/hal+json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, format, *args):
+            pass
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHateoasTreeHandler)
+    server.daemon_threads = True
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/root"
+    return server
+#End of start_stub_hateoas_tree()
+#--------------------------------------------------------------
+
+#*********************************************************************************
+# _StubHecHandler Class
+# Minimal local HEC endpoint: HTTP/1.1 keep-alive, accepts gzip bodies, counts envelopes.
+# server.responses is a list of HTTP statuses to answer the next requests with (failure injection).
+# Requests with X-Splunk-Request-Channel get an ackId; every issued ackId is acked unless server.withhold_acks.
+# server.no_ack_ids answers 200 without an ackId (acknowledgement disabled on the token).
+class _StubHecHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        channel = self.headers.get('X-Splunk-Request-Channel')
+        if self.path.startswith(HEC_ACK_PATH):
+            with self.server.lock:
+                issued = self.server.ack_ids.get(channel, 0)
+                acks = {str(ack_id): ack_id < issued and not self.server.withhold_acks
+                        for ack_id in json.loads(body).get('acks', [])}
+            return self._reply(200, json.dumps({'acks': acks}).encode('utf-8'))
+        ack_id = None
+        with self.server.lock:
+            self.server.requests += 1
+            status = self.server.responses.pop(0) if self.server.responses else 200
+            if status == 200:
+                self.server.events += body.count(b'{"event":')
+                if channel and not self.server.no_ack_ids:
+                    ack_id = self.server.ack_ids.get(channel, 0)
+                    self.server.ack_ids[channel] = ack_id + 1
+        if status != 200:
+            return self._reply(status, b'{"text":"Stub failure","code":9}')
+        if ack_id is None:
+            return self._reply(200, b'{"text":"Success","code":0}')
+        return self._reply(200, b'{"text":"Success","code":0,"ackId":%d}' % ack_id)
+
+    def _reply(self, status, reply):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        pass        # Keep test and benchmark output readable
+#End of _StubHecHandler class()
+#**********************************************************************************
+
+#--------------------------------------------------------------
+def start_stub_hec_server(host='127.0.0.1', port=0):
+    """Start a stub HEC server on a background thread. Returns the server (.events, .requests, .url)"""
+    server = ThreadingHTTPServer((host, port), _StubHecHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.events = 0
+    server.requests = 0
+    server.responses = []
+    server.ack_ids = {}         # channel -> next ackId
+    server.withhold_acks = False
+    server.no_ack_ids = False
+    server.url = f"http://{host}:{server.server_port}"
+    threading.Thread(target=server.serve_forever, name="stub-hec", daemon=True).start()
+    return server
+#End of start_stub_hec_server()
+#--------------------------------------------------------------
@@ -0,0 +1,39 @@
+#Module: syslog_parser.py
+# # # Micro-benchmark of the single-pass syslog parser (utils/syslog_parser_module.py) against the legacy regex parser.
+# # # Run from the repository root: python -m bench.syslog_parser
+# # #--------------------------------------------------------------
+
+import time
+
+#-----------------------  Importing my modules & local configs -------------------
+from utils.syslog_parser_module import parse_syslog
+from sources.syslog_receiver_server_module import parse_syslog_message   # Legacy parser
+#-----------------------  Importing my modules & local configs -------------------
+
+#--------------------------------------------------------------
+# Micro-benchmark: new parser vs the legacy regex based parse_syslog_message() on a mixed 3164/5424 corpus
+def benchmark_syslog_parsers(iterations=20000):
+    corpus = [
+        "<34>1 2025-04-08T12:00:00.003Z mymachine.example.com su - ID47 - BOM'su root' failed for lonvick on /dev/pts/8",
+        "<165>1 2025-04-08T22:14:15.003-07:00 192.0.2.1 myproc 8710 - [exampleSDID@32473 iut=\"3\" eventSource=\"App\"] An application event",
+        "<13>Apr  8 12:00:00 test-host sshd[2231]: Accepted publickey for root from 10.0.0.1 port 51234",
+        "<86>Apr 18 09:30:01 web01 CRON[12345]: pam_unix(cron:session): session opened for user root",
+    ]
+    messages = (corpus * (iterations // len(corpus) + 1))[:iterations]
+
+    results = {}
+    for name, func in (("legacy regex", parse_syslog_message), ("single-pass", parse_syslog)):
+        start = time.perf_counter()
+        for message in messages:
+            func(message)
+        elapsed = time.perf_counter() - start
+        results[name] = iterations / elapsed if elapsed > 0 else 0
+        print(f"{name:>14}: {results[name]:>12,.0f} msgs/sec  ({elapsed:.3f}s for {iterations} msgs)")
+    if results["legacy regex"]:
+        print(f"       speedup: {results['single-pass'] / results['legacy regex']:.1f}x")
+    return results
+#End of benchmark_syslog_parsers()
+#--------------------------------------------------------------
+
+if __name__ == "__main__":
+    benchmark_syslog_parsers()
@@ -1,4 +1,5 @@
 #Module: globals_module.py
+import os
 
 OSPS_DEFAULT_LOG_FILE = "osps.log"  # Default log file name
 
@@ -20,6 +21,8 @@ DEFAULT_DEBUG_LEVEL = 0   # Default debug level
 HEC_RECV_HOST = '0.0.0.0'  # Splunk HEC server host
 HEC_RECV_PORT = 8080  # Splunk HEC server port
 HEC_RECV_PATH = '/services/collector/event'  # Splunk HEC endpoint path
+HEC_RAW_PATH = '/services/collector/raw'  # Splunk HEC raw endpoint path (line broken text)
+HEC_TOKENS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hec_tokens.json')  # HEC token registry (reloaded on SIGHUP)
 
 #GitHub Advisory Database API URL
 GITHUB_ADVISORY_URL = "https://api.github.com/advisories"
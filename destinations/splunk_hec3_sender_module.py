@@ -1,9 +1,26 @@
 #Module: splunk_hec3_sender_module.py
 # This module is designed to send events to Splunk using the HTTP Event Collector (HEC) API.
 # It uses the requests library to send JSON payloads to the Splunk server.
+# send_event_to_splunk() posts one event per request. HecSender is the high-volume path: it keeps a pooled,
+# keep-alive requests.Session, concatenates many event envelopes into one /services/collector body, gzips it
+# and flushes on batch size, event count or linger time.
 
 import requests
 import json
+import gzip
+import time
+import threading
+import random
+import struct
+import queue
+import uuid
+import os
+from collections import deque
+from requests.adapters import HTTPAdapter
+
+#-----------------------  Importing my modules & local configs -------------------
+from utils.queues_module import DiskQueue, RECORD_HEADER
+#-----------------------  Importing my modules & local configs -------------------
 
 # Splunk HEC configuration
 splunk_url = 'https://<splunk-server>:8088'  # Replace with your Splunk HEC endpoint
@@ -13,6 +30,40 @@ headers = {
     'Authorization': splunk_token,
     'Content-Type': 'application/json'
 }
+
+HEC_EVENT_PATH = '/services/collector'  # Batch endpoint: body is concatenated {"event": ...} envelopes
+HEC_MAX_BATCH_BYTES = 1024 * 1024  # Flush when the uncompressed batch reaches this size (Splunk default limit is 1MB)
+HEC_MAX_BATCH_EVENTS = 1000  # Flush when this many events are batched
+HEC_LINGER_MS = 200  # Flush a partial batch once its oldest event is this old
+HEC_GZIP_LEVEL = 3  # 0 disables compression. Low levels give most of the size win for little CPU
+HEC_POOL_SIZE = 4  # Keep-alive connections kept per host
+HEC_TIMEOUT = 10  # Seconds per request
+HEC_OUTPUT_WORKERS = 4  # HecOutputPool threads POSTing batches
+HEC_OUTPUT_QUEUE_SIZE = 64  # Batches waiting for a worker. When full, batches go straight to the spill queue
+HEC_MAX_RETRIES = 5  # Retries per batch (5xx/429/connection errors) before it is spilled to disk
+HEC_BACKOFF_BASE = 0.5  # Seconds. Retry n waits random(0, min(HEC_BACKOFF_MAX, HEC_BACKOFF_BASE * 2**n))
+HEC_BACKOFF_MAX = 30  # Seconds
+HEC_SPILL_DIR = 'hec_out_que'  # DiskQueue holding batches that exhausted their retries
+HEC_UNACKED_DIR = os.path.join(HEC_SPILL_DIR, 'unacked')  # DiskQueue journal of batches sent but not yet acknowledged
+HEC_REPLAY_INTERVAL = 5  # Seconds between attempts to replay spilled batches
+HEC_DROP_STATUSES = (400, 413)  # Splunk rejected the data itself (malformed/too large): replaying cannot help
+_SPILL_HEADER = struct.Struct('<I')  # Spilled record: event count + batch body
+HEC_ACK_PATH = '/services/collector/ack'  # Indexer acknowledgement status endpoint
+HEC_ACK_POLL_INTERVAL = 1  # Seconds between bulk ack polls (one loop for all channels)
+HEC_ACK_TIMEOUT = 300  # Seconds before an unacknowledged batch is considered lost and resent
+HEC_ACK_MAX_IDS = 1000  # ackIds per poll request
+HEC_ACK_MAX_INFLIGHT = 256  # Unacknowledged batches per HecQueueForwarder before it stops reading
+#--------------------------------------------------------------
+def _response_ack_id(response):
+    """ackId of a HEC response, or None if it has none (indexer acknowledgement disabled on the token, or not JSON)"""
+    try:
+        return response.json()['ackId']
+    except (ValueError, KeyError, TypeError):
+        return None
+#--------------------------------------------------------------
+def _warn_no_ack(url):
+    print(f"Splunk [{url}] accepted a batch without an ackId: indexer acknowledgement looks disabled on this token. "
+          f"Treating HTTP 200 as delivered")
 #--------------------------------------------------------------
 def send_event_to_splunk(event_data):
     """
@@ -28,6 +79,652 @@ def send_event_to_splunk(event_data):
         print(f"Event successfully sent to Splunk: {event_data}")
     else:
         print(f"Failed to send event to Splunk. Status code: {response.status_code}, Response: {response.text}")
+#End of send_event_to_splunk()
+#--------------------------------------------------------------
+
+#*********************************************************************************
+# HecSender Class
+# Batching HEC client. send() encodes one event envelope and appends it to the current batch; the batch is
+# POSTed (gzip) when it reaches max_batch_bytes or max_batch_events, or when its oldest event is linger_ms old.
+# dispatch(body, count) is what a full batch is handed to. It defaults to post_batch(), i.e. the caller's thread
+# (or the linger thread) does the POST; an output pool can replace it to move the POST off the intake thread.
+class HecSender:
+    #--------------------------------------------------------------
+    def __init__(self, url=splunk_url, token=splunk_token, sourcetype='_json', index='main',
+                 max_batch_bytes=HEC_MAX_BATCH_BYTES, max_batch_events=HEC_MAX_BATCH_EVENTS, linger_ms=HEC_LINGER_MS,
+                 gzip_level=HEC_GZIP_LEVEL, pool_size=HEC_POOL_SIZE, timeout=HEC_TIMEOUT, verify=True, use_ack=False):
+        self.url = url.rstrip('/') + HEC_EVENT_PATH
+        self.ack_url = url.rstrip('/') + HEC_ACK_PATH
+        self.sourcetype = sourcetype
+        self.index = index
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_events = max_batch_events
+        self.linger_ms = linger_ms
+        self.gzip_level = gzip_level
+        self.timeout = timeout
+        self.verify = verify
+
+        # One Session = one urllib3 pool: TCP/TLS connections are reused across batches (keep-alive)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Authorization': token if token.startswith('Splunk ') else f'Splunk {token}',
+            'Content-Type': 'application/json',
+        })
+        if gzip_level:
+            self.session.headers['Content-Encoding'] = 'gzip'
+        # Indexer acknowledgement: every request carries the channel; Splunk answers each batch with an ackId
+        self.use_ack = use_ack
+        self.channel = str(uuid.uuid4()) if use_ack else None
+        if use_ack:
+            self.session.headers['X-Splunk-Request-Channel'] = self.channel
+
+        self.lock = threading.Lock()
+        self._buffer = bytearray()      # Concatenated envelopes of the open batch
+        self._count = 0
+        self._first_time = 0.0          # monotonic() of the oldest event in the open batch
+        self.dispatch = self.post_batch
+
+        self.events = 0                 # Events POSTed successfully
+        self.batches = 0
+        self.raw_bytes = 0              # Uncompressed bytes POSTed
+        self.sent_bytes = 0             # Bytes on the wire (after gzip)
+        self.failures = 0               # Events in batches that failed
+
+        self._closed = threading.Event()
+        self._linger_thread = threading.Thread(target=self._linger_loop, name="hec-linger", daemon=True)
+        self._linger_thread.start()
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def send(self, event, sourcetype=None, index=None, host=None, source=None, event_time=None):
+        """Queue one event (dict, str or bytes) for the next batch"""
+        self.send_encoded(self.encode(event, sourcetype, index, host, source, event_time))
+    #End of send()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def encode(self, event, sourcetype=None, index=None, host=None, source=None, event_time=None):
+        """Return the JSON-encoded HEC envelope (bytes) for one event"""
+        if isinstance(event, (bytes, bytearray)):
+            event = event.decode('utf-8', 'replace')
+        envelope = {'event': event, 'sourcetype': sourcetype or self.sourcetype, 'index': index or self.index}
+        if host is not None:
+            envelope['host'] = host
+        if source is not None:
+            envelope['source'] = source
+        if event_time is not None:
+            envelope['time'] = event_time
+        return json.dumps(envelope, separators=(',', ':')).encode('utf-8')
+    #End of encode()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def send_encoded(self, envelope):
+        """Queue one already JSON-encoded HEC envelope (bytes)"""
+        batch = None
+        with self.lock:
+            if self._count and len(self._buffer) + len(envelope) > self.max_batch_bytes:
+                batch = self._take()        # Keep batches under the size limit
+            if not self._count:
+                self._first_time = time.monotonic()
+            self._buffer += envelope
+            self._count += 1
+            if batch is None and self._count >= self.max_batch_events:
+                batch = self._take()
+        if batch is not None:
+            self._dispatch(*batch)
+    #End of send_encoded()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _take(self):
+        """Detach the open batch. Caller holds the lock"""
+        batch = (bytes(self._buffer), self._count)
+        self._buffer.clear()
+        self._count = 0
+        return batch
+    #--------------------------------------------------------------
+    def _dispatch(self, body, count):
+        try:
+            self.dispatch(body, count)
+        except Exception as e:
+            with self.lock:
+                self.failures += count
+            print(f"Failed to send batch of {count} events to Splunk [{self.url}]: {e}")
+    #End of _dispatch()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def post_batch(self, body, count):
+        """POST one batch body. Returns the response, raises on connection errors and HTTP error statuses"""
+        data = gzip.compress(body, self.gzip_level) if self.gzip_level else body
+        response = self.session.post(self.url, data=data, timeout=self.timeout, verify=self.verify)
+        response.raise_for_status()
+        with self.lock:
+            self.events += count
+            self.batches += 1
+            self.raw_bytes += len(body)
+            self.sent_bytes += len(data)
+        return response
+    #End of post_batch()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def poll_acks(self, ack_ids):
+        """Ask Splunk which of ack_ids (on this sender's channel) are indexed. Returns {ackId: bool}"""
+        response = self.session.post(self.ack_url, params={'channel': self.channel}, json={'acks': ack_ids},
+                                     headers={'Content-Encoding': None}, timeout=self.timeout, verify=self.verify)
+        response.raise_for_status()
+        return {int(ack_id): acked for ack_id, acked in response.json().get('acks', {}).items()}
+    #End of poll_acks()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def flush(self):
+        """Send the open batch now"""
+        with self.lock:
+            batch = self._take() if self._count else None
+        if batch is not None:
+            self._dispatch(*batch)
+    #End of flush()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _linger_loop(self):
+        """Flush partial batches whose oldest event waited linger_ms (low-rate sources still get delivered)"""
+        interval = self.linger_ms / 2000.0
+        while not self._closed.wait(interval):
+            with self.lock:
+                due = self._count and time.monotonic() - self._first_time >= self.linger_ms / 1000.0
+                batch = self._take() if due else None
+            if batch is not None:
+                self._dispatch(*batch)
+    #End of _linger_loop()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def close(self):
+        """Flush the open batch and release the connection pool"""
+        self._closed.set()
+        self._linger_thread.join()
+        self.flush()
+        self.session.close()
+    #End of close()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def stats(self):
+        with self.lock:
+            return {'events': self.events, 'batches': self.batches, 'raw_bytes': self.raw_bytes,
+                    'sent_bytes': self.sent_bytes, 'failures': self.failures, 'pending': self._count}
+    #End of stats()
+    #--------------------------------------------------------------
+#End of HecSender class()
+#**********************************************************************************
+
+#*********************************************************************************
+# HecOutputPool Class
+# Moves HEC delivery off the intake path. It takes over sender.dispatch: full batches go into a bounded queue
+# that a pool of worker threads POSTs from. The intake thread never waits on Splunk:
+#   - 5xx, 429, 408 and connection errors are retried with exponential backoff and full jitter (Retry-After honored)
+#   - HEC_DROP_STATUSES (400/413) are dropped and counted: the payload itself was rejected
+#   - other 4xx (401/403 token problems, 404 wrong URL...) are not retried but spilled, to be replayed once fixed
+#   - batches that exhaust the retry budget, or arrive while the queue is full, are spilled to a DiskQueue
+# A replay thread drains the spill queue in order and commits each batch only after Splunk accepted it.
+# With a tracker, sent batches are journaled to another DiskQueue (unacked_dir) until acknowledged. Only their
+# journal position is kept in memory; a batch whose ack times out is read back from there and resent. Batches left
+# in the journal by an earlier run are spilled for replay on start.
+class HecOutputPool:
+    #--------------------------------------------------------------
+    def __init__(self, sender, workers=HEC_OUTPUT_WORKERS, queue_size=HEC_OUTPUT_QUEUE_SIZE, max_retries=HEC_MAX_RETRIES,
+                 backoff_base=HEC_BACKOFF_BASE, backoff_max=HEC_BACKOFF_MAX, spill_dir=HEC_SPILL_DIR,
+                 replay_interval=HEC_REPLAY_INTERVAL, tracker=None, unacked_dir=HEC_UNACKED_DIR):
+        self.sender = sender
+        self.tracker = tracker      # HecAckTracker when sender.use_ack: a batch is done when indexed, not on HTTP 200
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.replay_interval = replay_interval
+        self.batches = queue.Queue(maxsize=queue_size)
+        self.spill = DiskQueue(spill_dir)
+        self.lock = threading.Lock()
+        self.unacked = DiskQueue(unacked_dir) if tracker is not None else None
+        self.unacked_entries = deque()      # [journal position, record size, done] per unacknowledged batch, in journal order
+
+        self.retries = 0        # Retry attempts
+        self.spilled = 0        # Batches written to the spill queue
+        self.replayed = 0       # Spilled batches delivered later
+        self.rejected = 0       # Events dropped on HEC_DROP_STATUSES
+        self.ack_timeouts = 0   # Batches resent because no ack arrived within the tracker's ack_timeout
+        self.no_ack = 0         # Batches accepted without an ackId (acknowledgement disabled on the token)
+        if self.unacked is not None:
+            self._recover_unacked()
+
+        self._closing = threading.Event()  # close() started: no batch may enter self.batches any more
+        self._closed = threading.Event()
+        self.workers = [threading.Thread(target=self._worker, name=f"hec-out-{n}", daemon=True) for n in range(workers)]
+        for worker in self.workers:
+            worker.start()
+        self._replay_thread = threading.Thread(target=self._replay_loop, name="hec-replay", daemon=True)
+        self._replay_thread.start()
+        sender.dispatch = self.submit
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def submit(self, body, count):
+        """sender.dispatch hook. Never blocks: a full queue (or a closing pool) spills the batch to disk"""
+        with self.lock:     # close() sets _closing under the lock: nothing is queued behind the workers' sentinels
+            if not self._closing.is_set():
+                try:
+                    self.batches.put_nowait((body, count))
+                    return
+                except queue.Full:
+                    pass
+        self._spill(body, count)
+    #End of submit()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _spill(self, body, count):
+        self.spill.append(_SPILL_HEADER.pack(count) + body)
+        with self.lock:
+            self.spilled += 1
+    #End of _spill()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _worker(self):
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            body, count = batch
+            outcome = self._deliver(body, count, self.max_retries)
+            if outcome == 'spill':
+                self._spill(body, count)
+    #End of _worker()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _deliver(self, body, count, retries):
+        """POST with retries. Returns 'sent', 'dropped' or 'spill'"""
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = self.sender.post_batch(body, count)
+                if self.tracker is not None:
+                    self._track(response, body, count)
+                return 'sent'
+            except requests.HTTPError as e:
+                status = e.response.status_code
+                if status in HEC_DROP_STATUSES:
+                    with self.lock:
+                        self.rejected += count
+                    print(f"Splunk rejected a batch of {count} events [{status}]: {e.response.text[:200]}")
+                    return 'dropped'
+                if status < 500 and status not in (408, 429):
+                    print(f"Splunk refused a batch of {count} events [{status}]. Spilling it for replay")
+                    return 'spill'
+                retry_after = e.response.headers.get('Retry-After')
+            except requests.RequestException as e:
+                if attempt == retries:
+                    print(f"Could not reach Splunk [{self.sender.url}]: {e}")
+
+            if attempt >= retries or self._closed.is_set():
+                return 'spill'
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))     # Full jitter
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, min(self.backoff_max, int(retry_after)))
+            attempt += 1
+            with self.lock:
+                self.retries += 1
+            if self._closed.wait(delay):
+                return 'spill'      # Shutting down: keep the batch on disk instead of sleeping through exit
+    #End of _deliver()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _track(self, response, body, count):
+        """Journal a sent batch until Splunk acknowledges it"""
+        ack_id = _response_ack_id(response)
+        if ack_id is None:
+            with self.lock:
+                self.no_ack += 1
+                first = self.no_ack == 1
+            if first:
+                _warn_no_ack(self.sender.url)
+            return      # No ack will ever come: the 200 is all we get
+        record = _SPILL_HEADER.pack(count) + body
+        with self.lock:     # Entries in journal order
+            entry = [self.unacked.append(record), RECORD_HEADER.size + len(record), False]
+            self.unacked_entries.append(entry)
+        self.tracker.track(self.sender, ack_id, on_ack=lambda ack_id: self._ack_done(entry),
+                           on_timeout=lambda ack_id: self._ack_timeout(entry))
+    #End of _track()
+    #--------------------------------------------------------------
+    def _ack_done(self, entry):
+        """Batch indexed (or resent): release the acknowledged prefix of the journal"""
+        with self.lock:
+            entry[2] = True
+            position = None
+            while self.unacked_entries and self.unacked_entries[0][2]:
+                start, size, _ = self.unacked_entries.popleft()
+                position = (start[0], start[1] + size)
+            if position is not None:
+                self.unacked.commit(position)
+    #--------------------------------------------------------------
+    def _ack_timeout(self, entry):
+        with self.lock:
+            self.ack_timeouts += 1
+        record = self.unacked.read_at(entry[0])
+        if record is None:
+            print(f"Could not read back unacknowledged batch at {entry[0]} from [{self.unacked.queue_dir}]")
+        else:
+            self.submit(record[_SPILL_HEADER.size:], _SPILL_HEADER.unpack_from(record)[0])    # At-least-once: resend (Splunk may index it twice)
+        self._ack_done(entry)
+    #--------------------------------------------------------------
+    def _recover_unacked(self):
+        """Batches an earlier run sent but never saw acknowledged: spill them for replay"""
+        recovered = 0
+        while True:
+            records, position = self.unacked.read(max_records=100)
+            if not records:
+                break
+            self.spill.append_many(records)     # Same record format
+            self.unacked.commit(position)
+            recovered += len(records)
+        if recovered:
+            print(f"Spilled {recovered} unacknowledged batches from [{self.unacked.queue_dir}] for replay")
+    #End of _recover_unacked()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _replay_loop(self):
+        while not self._closed.wait(self.replay_interval):
+            self.replay()
+    #--------------------------------------------------------------
+    def replay(self):
+        """Deliver spilled batches oldest first. Stops at the first failure; it is retried on the next round"""
+        while not self._closed.is_set():
+            records, position = self.spill.read(max_records=1)
+            if not records:
+                return
+            count = _SPILL_HEADER.unpack_from(records[0])[0]
+            outcome = self._deliver(records[0][_SPILL_HEADER.size:], count, retries=0)
+            if outcome == 'spill':
+                self.spill.rewind()
+                return
+            self.spill.commit(position)
+            if outcome == 'sent':
+                with self.lock:
+                    self.replayed += 1
+    #End of replay()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def close(self):
+        """Flush the sender, let workers finish queued batches (failures spill) and stop"""
+        self.sender.flush()
+        with self.lock:
+            self._closing.set()     # From now on submit() spills
+        for _ in self.workers:
+            self.batches.put(None)
+        for worker in self.workers:
+            worker.join()
+        while True:                 # Defensive: nothing may stay in memory once the workers are gone
+            try:
+                batch = self.batches.get_nowait()
+            except queue.Empty:
+                break
+            if batch is not None:
+                self._spill(*batch)
+        self._closed.set()
+        self._replay_thread.join()
+        self.sender.close()         # Anything the linger thread still hands over is spilled
+        self.spill.close()
+        if self.unacked is not None:
+            self.unacked.close()    # Still unacknowledged batches are replayed on the next start
+    #End of close()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def stats(self):
+        stats = self.sender.stats()
+        with self.lock:
+            stats.update({'queued': self.batches.qsize(), 'retries': self.retries, 'spilled': self.spilled,
+                          'replayed': self.replayed, 'rejected': self.rejected, 'ack_timeouts': self.ack_timeouts,
+                          'no_ack': self.no_ack, 'unacked': len(self.unacked_entries),
+                          'spill_backlog_bytes': self.spill.backlog_bytes()})
+        return stats
+    #End of stats()
+    #--------------------------------------------------------------
+#End of HecOutputPool class()
+#**********************************************************************************
+
+#*********************************************************************************
+# HecAckTracker Class
+# Indexer acknowledgement bookkeeping for any number of senders/channels. track() records an ackId returned by
+# Splunk; one background loop polls HEC_ACK_PATH in bulk (up to HEC_ACK_MAX_IDS ids per channel per request) and
+# calls on_ack(ack_id) once the batch is indexed, or on_timeout(ack_id) if no ack arrived within ack_timeout.
+# The index is {channel: {ackId: (sent_time, on_ack, on_timeout)}}: no payloads are kept here (owners keep a
+# queue position, see HecOutputPool and HecQueueForwarder).
+class HecAckTracker:
+    #--------------------------------------------------------------
+    def __init__(self, poll_interval=HEC_ACK_POLL_INTERVAL, ack_timeout=HEC_ACK_TIMEOUT):
+        self.poll_interval = poll_interval
+        self.ack_timeout = ack_timeout
+        self.lock = threading.Lock()
+        self.pending = {}           # channel -> {ackId: (sent_time, on_ack, on_timeout)}
+        self.senders = {}           # channel -> HecSender (owns the session used to poll)
+        self.acked = 0
+        self.timed_out = 0
+        self.polls = 0
+        self._closed = threading.Event()
+        self._poll_thread = threading.Thread(target=self._poll_loop, name="hec-ack-poll", daemon=True)
+        self._poll_thread.start()
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def track(self, sender, ack_id, on_ack=None, on_timeout=None):
+        with self.lock:
+            self.senders[sender.channel] = sender
+            self.pending.setdefault(sender.channel, {})[ack_id] = (time.monotonic(), on_ack, on_timeout)
+    #--------------------------------------------------------------
+    def forget(self, sender, ack_ids):
+        """Stop tracking ack_ids (their owner gave up on them)"""
+        with self.lock:
+            channel_pending = self.pending.get(sender.channel, {})
+            for ack_id in ack_ids:
+                channel_pending.pop(ack_id, None)
+    #--------------------------------------------------------------
+    def __len__(self):
+        with self.lock:
+            return sum(len(channel_pending) for channel_pending in self.pending.values())
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _poll_loop(self):
+        while not self._closed.wait(self.poll_interval):
+            self.poll()
+    #--------------------------------------------------------------
+    def poll(self):
+        """One round: bulk-poll every channel with outstanding ackIds, fire callbacks"""
+        with self.lock:
+            work = [(self.senders[channel], list(channel_pending)) for channel, channel_pending in self.pending.items()
+                    if channel_pending]
+        callbacks = []
+        for sender, ack_ids in work:
+            for start in range(0, len(ack_ids), HEC_ACK_MAX_IDS):
+                chunk = ack_ids[start:start + HEC_ACK_MAX_IDS]
+                try:
+                    statuses = sender.poll_acks(chunk)
+                except (requests.RequestException, ValueError) as e:
+                    print(f"Ack poll failed on channel [{sender.channel}]: {e}")
+                    statuses = {}
+                now = time.monotonic()
+                with self.lock:
+                    self.polls += 1
+                    channel_pending = self.pending.get(sender.channel, {})
+                    for ack_id in chunk:
+                        entry = channel_pending.get(ack_id)
+                        if entry is None:
+                            continue
+                        if statuses.get(ack_id):
+                            del channel_pending[ack_id]
+                            self.acked += 1
+                            callbacks.append((entry[1], ack_id))
+                        elif now - entry[0] >= self.ack_timeout:
+                            del channel_pending[ack_id]
+                            self.timed_out += 1
+                            callbacks.append((entry[2], ack_id))
+        for callback, ack_id in callbacks:      # Outside the lock: callbacks may track()/forget()
+            if callback is not None:
+                callback(ack_id)
+    #End of poll()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def close(self):
+        self._closed.set()
+        self._poll_thread.join()
+    #--------------------------------------------------------------
+    def stats(self):
+        with self.lock:
+            return {'pending': sum(len(p) for p in self.pending.values()), 'acked': self.acked,
+                    'timed_out': self.timed_out, 'polls': self.polls}
+    #--------------------------------------------------------------
+#End of HecAckTracker class()
+#**********************************************************************************
+
+#*********************************************************************************
+# HecQueueForwarder Class
+# At-least-once path from a DiskQueue (e.g. an IngestQueue's spool) to Splunk. A thread reads records in batches
+# (open the spool with DiskQueue(dir, read_only=True) when the listener filling it runs in another process)
+# and POSTs them; the queue position is committed - which releases fully consumed segments - only once every
+# batch up to it is acknowledged (with sender.use_ack and a tracker) or, without acks, once Splunk answered 200.
+# Only the queue position is remembered per in-flight batch; a lost ack rewinds the queue and resends from the
+# last commit.
+class HecQueueForwarder:
+    #--------------------------------------------------------------
+    def __init__(self, disk, sender, tracker=None, max_inflight=HEC_ACK_MAX_INFLIGHT, idle_interval=0.5,
+                 backoff_base=HEC_BACKOFF_BASE, backoff_max=HEC_BACKOFF_MAX):
+        if tracker is not None and not sender.use_ack:
+            raise ValueError("A tracker needs a HecSender created with use_ack=True")
+        self.disk = disk
+        self.sender = sender
+        self.tracker = tracker
+        self.max_inflight = max_inflight
+        self.idle_interval = idle_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lock = threading.Lock()
+        self.inflight = []          # [position, acked] per sent batch, in queue order
+        self.by_ack_id = {}         # ackId -> its inflight entry
+        self.forwarded = 0          # Events POSTed
+        self.committed = 0          # Batches committed
+        self.rewinds = 0
+        self.generation = 0         # Bumped by a rewind: batches read before it are not tracked
+        self.no_ack = 0             # Batches accepted without an ackId (acknowledgement disabled on the token)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hec-forward", daemon=True)
+        self._thread.start()
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _run(self):
+        while not self._closed.is_set():
+            with self.lock:     # A rewind cannot slip between reading the generation and reading the records
+                full = len(self.inflight) >= self.max_inflight
+                generation = self.generation
+                if not full:
+                    records, position = self.disk.read(max_records=self.sender.max_batch_events)
+            if full:
+                self._closed.wait(self.idle_interval)
+                continue
+            if not records:
+                self._closed.wait(self.idle_interval)
+                continue
+            body = b''.join(self.sender.encode(record) for record in records)
+            response = self._post(body, len(records))
+            if response is None:
+                return          # Closing. Unsent records stay in the queue
+            self.forwarded += len(records)
+            if self.tracker is None:
+                self._commit_through(position)
+                continue
+            with self.lock:
+                if generation != self.generation:
+                    continue        # Rewound meanwhile. These records are read (and sent) again
+                ack_id = _response_ack_id(response) if response.status_code == 200 else None
+                if ack_id is None:
+                    if response.status_code == 200:
+                        self.no_ack += 1
+                        if self.no_ack == 1:
+                            _warn_no_ack(self.sender.url)
+                    self.inflight.append([position, True])      # Dropped, or no ack coming: nothing to wait for
+                    self._commit_acked_prefix()
+                    continue
+                entry = [position, False]
+                self.inflight.append(entry)
+                self.by_ack_id[ack_id] = entry
+            self.tracker.track(self.sender, ack_id, self._on_ack, self._on_timeout)
+    #End of _run()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _post(self, body, count):
+        """POST until it goes through (the data is safe on disk). Returns None when closing"""
+        attempt = 0
+        while not self._closed.is_set():
+            try:
+                return self.sender.post_batch(body, count)
+            except requests.HTTPError as e:
+                if e.response.status_code in HEC_DROP_STATUSES:
+                    print(f"Splunk rejected a batch of {count} events [{e.response.status_code}]. Skipping it")
+                    return e.response
+                print(f"HEC forward failed [{e.response.status_code}]. Retrying")
+            except requests.RequestException as e:
+                print(f"HEC forward failed [{e}]. Retrying")
+            self._closed.wait(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+            attempt += 1
+        return None
+    #End of _post()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _commit_through(self, position):
+        self.disk.commit(position)
+        self.committed += 1
+    #--------------------------------------------------------------
+    def _on_ack(self, ack_id):
+        with self.lock:
+            entry = self.by_ack_id.pop(ack_id, None)
+            if entry is None:
+                return          # From before a rewind
+            entry[1] = True
+            self._commit_acked_prefix()
+    #End of _on_ack()
+    #--------------------------------------------------------------
+    def _commit_acked_prefix(self):
+        """Commit the longest acknowledged prefix of the in-flight batches. Caller holds the lock"""
+        position = None
+        while self.inflight and self.inflight[0][1]:
+            position = self.inflight.pop(0)[0]
+        if position is not None:
+            self._commit_through(position)
+    #End of _commit_acked_prefix()
+    #--------------------------------------------------------------
+    def _on_timeout(self, ack_id):
+        """An ack never came: resend everything after the last commit"""
+        with self.lock:
+            if self.by_ack_id.pop(ack_id, None) is None:
+                return
+            print(f"No ack for batch [{ack_id}] after {self.tracker.ack_timeout}s. Resending from the last commit")
+            self.tracker.forget(self.sender, list(self.by_ack_id))
+            self.by_ack_id.clear()
+            self.inflight.clear()
+            self.generation += 1
+            self.rewinds += 1
+            self.disk.rewind()
+    #End of _on_timeout()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def close(self):
+        self._closed.set()
+        self._thread.join()
+    #--------------------------------------------------------------
+    def stats(self):
+        with self.lock:
+            return {'forwarded': self.forwarded, 'inflight': len(self.inflight), 'committed': self.committed,
+                    'rewinds': self.rewinds, 'no_ack': self.no_ack, 'backlog_bytes': self.disk.backlog_bytes()}
+    #--------------------------------------------------------------
+#End of HecQueueForwarder class()
+#**********************************************************************************
+
 
 #=========================================================        
 #if __name__ == "__main__":
@@ -26,6 +26,7 @@ from sources.hec2_wsgi_module  import start_hec2_server
 from sources.hec3_splunk_Flask_receiver_module import start_hec3_server as start_hec1_server_flask, start_hec3_server
 from sources.rest1_api_collector_module import run_rest1_api_collector
 from sources.rest2_hateoas_api_collector_module import run_rest2_hateoas_api_collector
+from utils.rate_limit_module import configure_rate_limits, RATE_LIMIT_POLICIES
 #------------------  Importing my modules & Local configs -------------------
 
 
@@ -54,22 +55,61 @@ if __name__ == "__main__":
                         help="Levels [0:none(default) 1:Show connections only 2:Show failed parsing 3:Show raw lines 4:Show json]]", required=False ), \
     parser.add_argument('-R', '--syslog', action='store_true', default=False, \
                         help="Enable syslog reciever mode.", required=False)
+    parser.add_argument('--workers', type=int, default=1, \
+                        help="Number of worker processes (syslog: sharing the ports with SO_REUSEPORT, HEC3: sharing one listening socket). [default: 1]", required=False)
+    parser.add_argument('--udp_rcvbuf', type=int, default=8*1024*1024, \
+                        help="Kernel receive buffer (SO_RCVBUF) in bytes for the syslog UDP listener. [default: 8MB]", required=False)
+    parser.add_argument('--udp_batch', type=int, default=256, \
+                        help="Max UDP datagrams drained per batch by the syslog listener. [default: 256]", required=False)
     parser.add_argument('-S', '--socket', action='store_true', default=False, \
                         help="Enable raw (TCP) socket reciever mode.", required=False)
     parser.add_argument('-H1', '--hec1', action='store_true', default=False, \
                         help="Enable Splunk HEC server mode.", required=False )
     parser.add_argument('-H2', '--hec2', action='store_true', default=False, \
                         help="Enable Splunk HEC server mode (WSGI).", required=False )
+    parser.add_argument('--hec_mode', type=str, default='threaded', choices=['threaded', 'simple'], \
+                        help="HEC2 server: threaded (HTTP/1.1 keep-alive, worker pool) or simple (wsgiref). [default: threaded]", required=False)
+    parser.add_argument('--hec_workers', type=int, default=256, \
+                        help="HEC2 worker threads (concurrent keep-alive connections). [default: 256]", required=False)
+    parser.add_argument('--hec_line_breaker', type=str, default='\\n', \
+                        help="HEC2 event delimiter on /services/collector/raw, backslash escapes allowed (e.g. '\\r\\n', '||'). Tokens may set their own line_breaker. [default: \\n]", required=False)
+    parser.add_argument('--hec_threads', type=int, default=16, \
+                        help="HEC3 threads per worker process (gunicorn gthread). [default: 16]", required=False)
+    parser.add_argument('--rate_limit', type=float, default=0, \
+                        help="Events/sec allowed per source IP (syslog, raw TCP, HEC) or per HEC token. 0 = no limit. [default: 0]", required=False)
+    parser.add_argument('--rate_burst', type=float, default=0, \
+                        help="Events a quiet source may send at once above --rate_limit. 0 = same as --rate_limit. [default: 0]", required=False)
+    parser.add_argument('--rate_policy', type=str, default='drop', choices=RATE_LIMIT_POLICIES, \
+                        help="Events over the limit: drop, sample (keep 1 of --rate_sample) or tag (keep, mark osps_rate_limited). [default: drop]", required=False)
+    parser.add_argument('--rate_sample', type=int, default=100, \
+                        help="With --rate_policy sample: keep 1 of every N events over the limit. [default: 100]", required=False)
     parser.add_argument('-H3', '--hec3', action='store_true', default=False, \
                         help="Enable Splunk HEC server mode (Flask).", required=False )
     parser.add_argument('-A1', '--rest1', action='store_true', default=False, \
                         help="Enable REST API collector mode.", required=False )
+    parser.add_argument('--rest_concurrency', type=int, default=8, \
+                        help="REST API1 page requests in flight at once (1 = one page after another). [default: 8]", required=False)
+    parser.add_argument('--rest_full', action='store_true', default=False, \
+                        help="REST collectors: ignore the checkpoints in checkpoints/ and collect everything again.", required=False)
+    parser.add_argument('--rest_newest_first', action='store_true', default=False, \
+                        help="REST API1: the API lists newest records first (new data on page 1, e.g. GitHub). Re-poll from page 1 and keep records newer than the last run. [default: oldest first, resume at the last page]", required=False)
+    parser.add_argument('--rest_cache_ttl', type=int, default=0, \
+                        help="REST API2 (HATEOAS): serve responses younger than this many seconds from memory. 0 = no cache. [default: 0]", required=False)
+    parser.add_argument('--rest_crawl', action='store_true', default=False, \
+                        help="REST API2 (HATEOAS): crawl every _links relation breadth first instead of following 'next' only.", required=False)
+    parser.add_argument('--crawl_relations', type=str, default=None, \
+                        help="REST API2 crawl: comma separated relations to follow (e.g. item,children,related). [default: all]", required=False)
+    parser.add_argument('--crawl_depth', type=int, default=3, \
+                        help="REST API2 crawl: link hops followed from the root. [default: 3]", required=False)
+    parser.add_argument('--crawl_workers', type=int, default=16, \
+                        help="REST API2 crawl: requests in flight at once. [default: 16]", required=False)
     parser.add_argument('-A2', '--rest2', action='store_true', default=False, \
                         help="Enable REST API2 collector mode (HATEOAS).", required=False )
     
     
     args = parser.parse_args()
     DEBUG_LEVEL= args.debug
+    configure_rate_limits(args.rate_limit, args.rate_burst, args.rate_policy, args.rate_sample)   # Before any listener starts
     #print(f"  [Type:{args.type}]   [Debug Level:{DEBUG_LEVEL}]  [Enable Syslog:{args.syslog}]")   # type: ignore #debug 
 
     if args.socket:
@@ -81,7 +121,7 @@ if __name__ == "__main__":
         print("\n")
         print (f"🟢 {Back.YELLOW+Fore.BLACK}Syslog server enabled...")
         logger.info(f"🟢 {Back.YELLOW+Fore.BLACK}Syslog server enabled...")   
-        start_syslog_server(DEBUG_LEVEL=args.debug)    # From sources/syslog_receiver_server_module.py
+        start_syslog_server(DEBUG_LEVEL=args.debug, udp_rcvbuf=args.udp_rcvbuf, udp_batch_size=args.udp_batch, workers=args.workers)    # From sources/syslog_receiver_server_module.py
     elif args.hec1:
         print("\n")
         print (f"🟢 {Back.YELLOW+Fore.BLACK}Splunk HEC1 server enabled.")
@@ -91,22 +131,25 @@ if __name__ == "__main__":
         print("\n")
         print (f"🟢 {Back.YELLOW+Fore.BLACK}Splunk HEC2 server enabled (WSGI implementation)")
         logger.info(f"🟢 {Back.YELLOW+Fore.BLACK}Splunk HEC2 server enabled (WSGI implementaion)")
-        start_hec2_server(DEBUG_LEVEL=args.debug)     # From sources/hec2_wsgi_module.py
+        start_hec2_server(DEBUG_LEVEL=args.debug, mode=args.hec_mode, workers=args.hec_workers, line_breaker=args.hec_line_breaker)     # From sources/hec2_wsgi_module.py
     elif args.hec3:
         print("\n")
         print (f"🟢 {Back.YELLOW+Fore.BLACK}Splunk HEC3 server enabled (Flask)")
         logger.info(f"🟢 {Back.YELLOW+Fore.BLACK}Splunk HEC3 server enabled (Flask)")
-        start_hec3_server(DEBUG_LEVEL=args.debug)   # From sources/hec3_splunk_Flask_receiver_module.py
+        start_hec3_server(DEBUG_LEVEL=args.debug, workers=args.workers, threads=args.hec_threads)   # From sources/hec3_splunk_Flask_receiver_module.py
     elif args.rest1:
         print("\n")
         print (f"🟢 {Back.YELLOW+Fore.BLACK}REST API collector enabled")
         logger.info(f"🟢 {Back.YELLOW+Fore.BLACK}REST API collector enabled")
-        run_rest1_api_collector(DEBUG_LEVEL=args.debug)      # From sources/rest1_api_collector_module.py
+        run_rest1_api_collector(DEBUG_LEVEL=args.debug, max_in_flight=args.rest_concurrency, incremental=not args.rest_full,
+                                newest_first=args.rest_newest_first)      # From sources/rest1_api_collector_module.py
     elif args.rest2:
         print("\n")
         print (f"🟢 {Back.YELLOW+Fore.BLACK}REST2 API collector enabled (HATEOAS)")
         logger.info(f"🟢 {Back.YELLOW+Fore.BLACK}REST2 API collector enabled (HATEOAS)")
-        run_rest2_hateoas_api_collector(DEBUG_LEVEL=args.debug)    # From sources/rest2_hateoas_api_collector_module.py
+        run_rest2_hateoas_api_collector(DEBUG_LEVEL=args.debug, incremental=not args.rest_full, cache_ttl=args.rest_cache_ttl,
+                                        crawl=args.rest_crawl, relations=args.crawl_relations.split(',') if args.crawl_relations else None,
+                                        max_depth=args.crawl_depth, workers=args.crawl_workers)    # From sources/rest2_hateoas_api_collector_module.py
         
 
     #print("Press Ctrl+C to stop the server")
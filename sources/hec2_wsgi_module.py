@@ -13,96 +13,289 @@
 # For a production environment, you should consider using a more robust WSGI server such as gunicorn or uWSGI and add security 
 # features like token validation.
 
+# start_hec2_server() serves the app on HecThreadPoolServer by default: HTTP/1.1 keep-alive connections handled
+# by a fixed pool of worker threads (one per open connection). mode='simple' keeps the old wsgiref server.
 #--------------------------------------------------------------
 
 import json
+import sys
+import uuid
+from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
 from colorama import Fore, Back, Style, init
 init(autoreset=True)  # Automatically reset color after each print
 
 #------------------  Importing my modules & Local configs -------------------
 from wsgiref.simple_server import make_server
 from utils.misc_utils_module import C, setup_logging, signal_handler
-from configs.globals_module import HEC_RECV_HOST, HEC_RECV_PORT, HEC_RECV_PATH, OSPS_DEFAULT_LOG_FILE
+from utils.queues_module import get_ingest_queue
+from utils.hec_token_module import get_token_registry
+from utils.hec_stream_module import HecRequestError, read_body_chunks, decompress_chunks, iter_hec_events, \
+    queue_hec_events, split_raw_events, hec_rate_key, limit_hec_events, limit_raw_batch, parse_line_breaker, HEC_MAX_BODY_SIZE
+from utils.rate_limit_module import get_rate_limiter
+from configs.globals_module import HEC_RECV_HOST, HEC_RECV_PORT, HEC_RECV_PATH, HEC_RAW_PATH, OSPS_DEFAULT_LOG_FILE
+CACHE_DIR = 'hec2_que'  # Directory to store cache files
+HEC2_LINE_BREAKER = b'\n'  # Default event delimiter on HEC_RAW_PATH (start_hec2_server(line_breaker=...), or per token)
+HEC2_WORKERS = 256  # Worker threads = keep-alive connections served concurrently
+HEC2_BACKLOG = 1024  # listen() backlog
+HEC2_IDLE_TIMEOUT = 30  # Seconds an idle keep-alive connection is kept before it is closed
+HEC2_MAX_DRAIN = 1024 * 1024  # Unread request body bytes we skip to keep a connection alive. Larger: close it
 #------------------  Importing my modules & Local configs -------------------
 
 logger = setup_logging(OSPS_DEFAULT_LOG_FILE)  # Set up logging configuration
+_line_breaker = HEC2_LINE_BREAKER     # Server-wide raw delimiter, set by start_hec2_server()
 
+#--------------------------------------------------------------
+def _reply(start_response, status, response):
+    """Call start_response exactly once and return the JSON body"""
+    body = json.dumps(response).encode('utf-8')
+    start_response(status, [('Content-type', 'application/json'), ('Content-Length', str(len(body)))])
+    return [body]
+#End of _reply()
+#--------------------------------------------------------------
 #--------------------------------------------------------------
 # WSGI application to handle Splunk HEC requests
 def splunk_hec_app(environ, start_response):
-    # Set default response status and headers
-    status = '200 OK'
-    headers = [('Content-type', 'application/json')]
-    start_response(status, headers)
-
     # Check if the request path matches the HEC endpoint
-    if environ.get('PATH_INFO') != HEC_RECV_PATH:
-        # If not, return a 404 Not Found response
-        status = '404 Not Found'
-        start_response(status, headers)
-        return [b'Not Found']
-    
+    path = environ.get('PATH_INFO')
+    if path != HEC_RECV_PATH and path != HEC_RAW_PATH:
+        return _reply(start_response, '404 Not Found', {"status": "error", "message": "Not Found"})
+
     # Check if the request method is POST
     if environ.get('REQUEST_METHOD') != 'POST':
-        # If not, return a 405 Method Not Allowed response
-        status = '405 Method Not Allowed'
-        start_response(status, headers)
-        return [b'Method Not Allowed']
-    
-    # Check for the presence of the Splunk HEC token in the request headers
-    # In a real-world scenario, you would validate the token against your Splunk configuration
-    # For this example, we will just check if it matches a hardcoded value
-    token = environ.get('HTTP_X_SPLUNK_HEC_TOKEN')
-    if token != "your_splunk_token":
-        status = '403 Forbidden'
-        response = {"status": "error", "message": "Forbidden"}
-        return [json.dumps(response).encode('utf-8')]
+        return _reply(start_response, '405 Method Not Allowed', {"status": "error", "message": "Method Not Allowed"})
 
     try:
-        # Read the request body from the WSGI environment
-        content_length = int(environ.get('CONTENT_LENGTH', 0))
-        raw_data = environ['wsgi.input'].read(content_length) if content_length else b""   
+        # Validate the Splunk HEC token ("Authorization: Splunk <token>" or X-Splunk-HEC-Token) against the registry
+        token = get_token_registry().authenticate(environ.get('HTTP_AUTHORIZATION'), environ.get('HTTP_X_SPLUNK_HEC_TOKEN'))
+
+        content_length = int(environ.get('CONTENT_LENGTH') or 0)
+        rate_key = hec_rate_key(token, environ.get('REMOTE_ADDR'))     # (key, rate, burst)
+        if path == HEC_RAW_PATH:
+            return _reply(start_response, '200 OK', receive_raw_events(environ, content_length, rate_key,
+                                                                       token.line_breaker or _line_breaker))
         # Determine the content type and parse accordingly
-        if environ.get('CONTENT_TYPE') == 'application/json':
-            # Parse JSON if it's JSON data
-            try:
-                data = json.loads(raw_data)
-                print("Received JSON:", data)
-                # Process the JSON as needed
-                response = {"status": "success", "message": "JSON data received"}
-            except json.JSONDecodeError:
-                response = {"status": "error", "message": "Invalid JSON format"}
+        if environ.get('CONTENT_TYPE', '').startswith('application/json'):
+            # Concatenated JSON envelopes, decoded while the body streams in
+            chunks = decompress_chunks(read_body_chunks(environ['wsgi.input'], content_length, HEC_MAX_BODY_SIZE),
+                                       environ.get('HTTP_CONTENT_ENCODING'))
+            events = queue_hec_events(limit_hec_events(iter_hec_events(chunks), get_rate_limiter('hec2'), *rate_key),
+                                      get_ingest_queue(CACHE_DIR), defaults=token.defaults())
+            response = {"status": "success", "message": "JSON data received", "events": events}
         else:
+            # Read the request body from the WSGI environment
+            raw_data = b''.join(decompress_chunks(read_body_chunks(environ['wsgi.input'], content_length, HEC_MAX_BODY_SIZE),
+                                                  environ.get('HTTP_CONTENT_ENCODING')))
             # Treat raw data as text
-            raw_text = raw_data.decode('utf-8')
-            print("Received Raw Text:", raw_text)
-            # Process the raw text as needed
+            for event in limit_raw_batch([raw_data], get_rate_limiter('hec2'), *rate_key):
+                get_ingest_queue(CACHE_DIR).put(event)
             response = {"status": "success", "message": "Raw text data received"}
-    
+
         # Return the response as a JSON string
-        return [json.dumps(response).encode('utf-8')]
+        return _reply(start_response, '200 OK', response)
 
+    except HecRequestError as e:
+        return _reply(start_response, e.status, e.response())
     except Exception as e:
         # If there was an error, return an error message
-        response = {"status": "error", "message": str(e)}
-        return [json.dumps(response).encode('utf-8')]
-#End of splunk_hec_app()    
+        return _reply(start_response, '500 Internal Server Error', {"status": "error", "message": str(e)})
+#End of splunk_hec_app()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def receive_raw_events(environ, content_length, rate_key=(None, None, None), line_breaker=HEC2_LINE_BREAKER):
+    """
+    HEC_RAW_PATH: split the (optionally compressed) body on line_breaker while it streams in and queue each chunk's
+    events with one put_many(). The channel comes from ?channel= or X-Splunk-Request-Channel and must be a GUID if given.
+    """
+    channel = parse_qs(environ.get('QUERY_STRING', '')).get('channel', [None])[0] or environ.get('HTTP_X_SPLUNK_REQUEST_CHANNEL')
+    if channel is not None:
+        try:
+            uuid.UUID(channel)
+        except ValueError:
+            raise HecRequestError('400 Bad Request', 11, "Invalid data channel")
+    chunks = decompress_chunks(read_body_chunks(environ['wsgi.input'], content_length, HEC_MAX_BODY_SIZE),
+                               environ.get('HTTP_CONTENT_ENCODING'))
+    que = get_ingest_queue(CACHE_DIR)
+    limiter = get_rate_limiter('hec2')
+    events = 0
+    for batch in split_raw_events(chunks, line_breaker):
+        events += len(batch)
+        admitted = limit_raw_batch(batch, limiter, *rate_key)
+        if admitted:
+            que.put_many(admitted)
+    if not events:
+        raise HecRequestError('400 Bad Request', 5, "No data")
+    return {"status": "success", "message": "Raw data received", "events": events}
+#End of receive_raw_events()
 #--------------------------------------------------------------
+
+#*********************************************************************************
+# _BodyReader Class
+# wsgi.input for one request: reads stop at Content-Length so an app can never consume the next pipelined request.
+# drain() skips what the app left unread, which keeps the connection usable for the next request.
+class _BodyReader:
+    #--------------------------------------------------------------
+    def __init__(self, rfile, length):
+        self.rfile = rfile
+        self.remaining = length
+    #--------------------------------------------------------------
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.rfile.read(size) if size else b''
+        self.remaining -= len(data)
+        if len(data) < size:
+            self.remaining = 0      # Peer closed mid-body
+        return data
+    #--------------------------------------------------------------
+    def readline(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.rfile.readline(size) if size else b''
+        self.remaining -= len(data)
+        return data
+    #--------------------------------------------------------------
+    def __iter__(self):
+        while self.remaining:
+            line = self.readline(65536)
+            if not line:
+                return
+            yield line
+    #--------------------------------------------------------------
+    def drain(self, limit):
+        """Skip the unread rest of the body. Returns False if more than limit bytes were left (close instead)"""
+        if self.remaining > limit:
+            return False
+        while self.remaining:
+            if not self.read(65536):
+                return False
+        return True
+    #--------------------------------------------------------------
+#End of _BodyReader class()
+#**********************************************************************************
+
+#*********************************************************************************
+# HecWSGIRequestHandler Class
+# Minimal HTTP/1.1 WSGI gateway. Serves requests on one connection until the client closes it, sends
+# "Connection: close", idles for HEC2_IDLE_TIMEOUT or leaves more than HEC2_MAX_DRAIN body bytes unread.
+class HecWSGIRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    timeout = HEC2_IDLE_TIMEOUT
+
+    #--------------------------------------------------------------
+    def _run_wsgi(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            self.send_error(411, "Length Required")      # Bodies must carry Content-Length
+            self.close_connection = True
+            return
+        path, _, query = self.path.partition('?')
+        length = int(self.headers.get('Content-Length') or 0)
+        body = _BodyReader(self.rfile, length)
+        environ = {
+            'REQUEST_METHOD': self.command, 'PATH_INFO': path, 'QUERY_STRING': query,
+            'CONTENT_TYPE': self.headers.get('Content-Type', ''), 'CONTENT_LENGTH': str(length),
+            'SERVER_NAME': self.server.server_name, 'SERVER_PORT': str(self.server.server_port),
+            'SERVER_PROTOCOL': self.request_version, 'REMOTE_ADDR': self.client_address[0],
+            'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': body, 'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+        }
+        for name, value in self.headers.items():
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            if key not in ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
+                environ[key] = value
+
+        response = {}
+        def start_response(status, headers, exc_info=None):
+            response['status'] = status
+            response['headers'] = headers
+            return self.wfile.write     # Legacy write() callable
+
+        result = self.server.app(environ, start_response)
+        try:
+            payload = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+        if not body.drain(HEC2_MAX_DRAIN):
+            self.close_connection = True
+        code, _, reason = response['status'].partition(' ')
+        self.send_response(int(code), reason)
+        names = set()
+        for name, value in response['headers']:
+            self.send_header(name, value)
+            names.add(name.lower())
+        if 'content-length' not in names:
+            self.send_header('Content-Length', str(len(payload)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(payload)
+    #End of _run_wsgi()
+    #--------------------------------------------------------------
+    do_POST = do_GET = do_PUT = do_DELETE = _run_wsgi
+
+    def log_message(self, format, *args):
+        logger.debug(f"[{self.client_address[0]}] {format % args}")
+#End of HecWSGIRequestHandler class()
+#**********************************************************************************
+
+#*********************************************************************************
+# HecThreadPoolServer Class
+# Accepts on one thread and hands each connection to a fixed ThreadPoolExecutor. A worker owns its connection
+# for all keep-alive requests on it. Connections beyond the worker count wait in the executor queue.
+class HecThreadPoolServer(HTTPServer):
+    request_queue_size = HEC2_BACKLOG
+    allow_reuse_address = True
+    daemon_threads = True
+
+    #--------------------------------------------------------------
+    def __init__(self, server_address, app, workers=HEC2_WORKERS):
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hec2")
+        super().__init__(server_address, HecWSGIRequestHandler)
+    #--------------------------------------------------------------
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+    #--------------------------------------------------------------
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+    #--------------------------------------------------------------
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False)
+    #--------------------------------------------------------------
+#End of HecThreadPoolServer class()
+#**********************************************************************************
+
 #==============================================================
-# Create and run the WSGI server on port 
-def start_hec2_server(DEBUG_LEVEL=0):
+# Create and run the WSGI server on port
+def start_hec2_server(DEBUG_LEVEL=0, mode='threaded', workers=HEC2_WORKERS, host=HEC_RECV_HOST, port=HEC_RECV_PORT,
+                      line_breaker=HEC2_LINE_BREAKER):
+    global _line_breaker
 
     if DEBUG_LEVEL != 0:
         print(f"{Fore.YELLOW+Back.LIGHTRED_EX+Style.BRIGHT} **** LEVEL:{DEBUG_LEVEL} DEBUG MODE ENABLED **** {Fore.RESET}")
-        
-    # Set the host and port for the server
+
+    _line_breaker = parse_line_breaker(line_breaker)   # e.g. '\\r\\n' from the command line. Tokens may set their own
+    get_ingest_queue(CACHE_DIR, DEBUG_LEVEL)    # Set up the spool once, before the first request
+    get_token_registry().watch_sighup()         # kill -HUP <pid> reloads HEC_TOKENS_FILE without a restart
 
     # Define the server and the application
-    httpd = make_server(HEC_RECV_HOST, HEC_RECV_PORT, splunk_hec_app)
-    print(f"{Fore.BLUE}Splunk HEC (WSGI) server running on {HEC_RECV_HOST}:{HEC_RECV_PORT}")
-    logger.info(f"Splunk HEC (WSGI) server running on {HEC_RECV_HOST}:{HEC_RECV_PORT}")
-    httpd.serve_forever()   # 
-#End of start_hec2_server()    
+    if mode == 'simple':
+        httpd = make_server(host, port, splunk_hec_app)     # One request at a time, HTTP/1.0
+    else:
+        httpd = HecThreadPoolServer((host, port), splunk_hec_app, workers)
+    print(f"{Fore.BLUE}Splunk HEC (WSGI) server running on {host}:{port} [mode:{mode}] [workers:{workers if mode != 'simple' else 1}]")
+    logger.info(f"Splunk HEC (WSGI) server running on {host}:{port} [mode:{mode}] [workers:{workers if mode != 'simple' else 1}]")
+    httpd.serve_forever()   #
+#End of start_hec2_server()
 #==============================================================
 
 #if __name__ == '__main__':
@@ -10,14 +10,31 @@
 
 
 from flask import Flask, request, jsonify
+from werkzeug.serving import make_server, run_simple, WSGIRequestHandler
+import os
+import sys
 import json
+import time
+import signal
+import socket
+import multiprocessing
 from colorama import Back, Style, init, Fore
 init(autoreset=True)  # Automatically reset color after each print
 
 #------------------  Importing my modules & Local configs -------------------
-from utils.misc_utils_module import is_json
-from utils.queues_module import send_to_que
+from utils.queues_module import get_ingest_queue, flush_ingest_queues
+from utils.hec_stream_module import HecRequestError, read_body_chunks, decompress_chunks, iter_hec_events, queue_hec_events, \
+    limit_hec_events
+from utils.rate_limit_module import get_rate_limiter, reset_rate_limiters, configure_rate_limits, rate_limit_settings
 from colorama import Fore, Back, Style, init
+CACHE_DIR = 'hec3_que'
+HEC3_HOST = '0.0.0.0'
+HEC3_PORT = 8080
+HEC3_WORKERS = 4  # Worker processes (each with its own queue directory CACHE_DIR/worker-N)
+HEC3_THREADS = 16  # Threads per worker process (gunicorn gthread)
+HEC3_BACKLOG = 1024  # listen() backlog
+HEC3_KEEPALIVE = 30  # Seconds an idle keep-alive connection is kept (gunicorn)
+HEC3_MAX_WORKER_SLOTS = 256  # worker-N queue directories a gunicorn worker may claim
 #------------------  Importing my modules & Local configs -------------------
 
 
@@ -25,6 +42,9 @@ from colorama import Fore, Back, Style, init
 # Create Flask app
 app = Flask(__name__)
 #app.run(host='0.0.0.0', port=8080, debug=True)
+_worker_cache_dir = CACHE_DIR   # Queue directory of this process. Per worker with workers > 1 (see _init_worker())
+_debug_level = 0
+_worker_lock = None             # Held flock on this gunicorn worker's queue slot
 
 # Splunk HEC endpoint setup
 splunk_url = 'https://<splunk-server>:8088'  # Replace with your Splunk HEC endpoint
@@ -78,45 +98,172 @@ def send_event_to_que(event_data):
 # Endpoint to receive events from Splunk HEC
 @app.route('/receive_event', methods=['POST'])
 def receive_event():
-    #print(f"{Fore.YELLOW+Style.BRIGHT}--------------------------------{Style.RESET_ALL}"); exit(0)
     """
     Endpoint to receive events from Splunk HEC
+    Body: one or more concatenated JSON objects, optionally gzip/deflate encoded. Each object is parsed exactly once
+    (raw_decode while the body streams in) and its original bytes are queued; nothing is re-serialized.
+    A JSON array of objects is accepted too (one event per object, re-encoded). Other JSON values get a 400.
     """
-    #sent_to_que(event_data)  # Send raw data to the queue
     try:
-        event_data = request.get_json()  # Get JSON payload from the incoming request
-        str_event_data = str(event_data)
-        print(f"{Back.GREEN}Received event data: [{str_event_data}]")
-        if is_json (str_event_data):
-            # Process JSON data as needed
-            print(f"{Fore.LIGHTWHITE_EX}1)Received JSON event data: {str_event_data}") 
-            sent_to_que(event_data)  # Send raw data to the queue
-        else:
-             # Process raw data as needed
-            print(f"{Fore.LIGHTMAGENTA_EX}2)Received raw event data: {event_data}")
-            #event_data = request.data.decode('utf-8')  # Fallback to raw data if JSON parsing fails
-            sent_to_que(event_data)  # Send raw data to the queue
-  
-        if not event_data:
+        chunks = decompress_chunks(read_body_chunks(request.stream, request.content_length),
+                                   request.headers.get('Content-Encoding'))
+        events = queue_hec_events(limit_hec_events(iter_hec_events(chunks, require_event=False), get_rate_limiter('hec3'),
+                                                   request.remote_addr), get_ingest_queue(_worker_cache_dir))
+    except HecRequestError as e:
+        if e.code == 5:
             return jsonify({"error": "No event data found"}), 400
-
-        # Send the event data to Splunk HEC
-        #send_event_to_splunk(event_data)
-
-        return jsonify({"status": "Event received and sent to Splunk successfully"}), 200
+        return jsonify(e.response()), int(e.status.split()[0])
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    if _debug_level >= 3:
+        print(f"{Back.GREEN}Received {events} event(s) [queue:{_worker_cache_dir}]")
+    return jsonify({"status": "Event received and sent to Splunk successfully", "events": events}), 200
+#End of receive_event()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+class HecRequestHandler(WSGIRequestHandler):
+    """Werkzeug handler without the per-request access log line (kept at DEBUG_LEVEL 3+)"""
+    def log_request(self, code='-', size='-'):
+        if _debug_level >= 3:
+            super().log_request(code, size)
+#End of HecRequestHandler class()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _init_worker(cache_dir, DEBUG_LEVEL, rate_limits=None):
+    """
+    Per-process setup: own queue directory (DiskQueue segments have one writer), debug level and rate limits
+    (the supervisor's rate_limit_settings(): module globals are not inherited under the spawn start method)
+    """
+    global _worker_cache_dir, _debug_level
+    _worker_cache_dir = cache_dir
+    _debug_level = DEBUG_LEVEL
+    if rate_limits:
+        configure_rate_limits(**rate_limits)
+    reset_rate_limiters()       # Buckets and counters are per process
+    get_ingest_queue(cache_dir, DEBUG_LEVEL)   # Create the listener's queue once, before requests arrive
+#End of _init_worker()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _claim_worker_cache_dir(max_slots=HEC3_MAX_WORKER_SLOTS):
+    """
+    Gunicorn workers have no stable index. Claim the first hec3_que/worker-N whose lock nobody holds, so a restarted
+    worker takes over (and replays) the queue of the worker it replaces. The lock dies with the process.
+    """
+    global _worker_lock
+    import fcntl        # POSIX only (gunicorn is too). Imported here so this module still loads on Windows
+    for slot in range(max_slots):
+        cache_dir = os.path.join(CACHE_DIR, f"worker-{slot}")
+        os.makedirs(cache_dir, exist_ok=True)
+        lock = open(os.path.join(cache_dir, 'worker.lock'), 'a')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            continue
+        _worker_lock = lock
+        return cache_dir
+    raise RuntimeError(f"No free HEC3 worker queue slot under [{CACHE_DIR}]")
+#End of _claim_worker_cache_dir()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _run_gunicorn(host, port, DEBUG_LEVEL, workers, threads):
+    """Serve app with gunicorn: `workers` processes x `threads` threads (gthread worker, keep-alive)"""
+    from gunicorn.app.base import BaseApplication
+    rate_limits = rate_limit_settings()
+
+    def post_fork(server, worker):
+        _init_worker(_claim_worker_cache_dir(), DEBUG_LEVEL, rate_limits)
+
+    def worker_exit(server, worker):
+        flush_ingest_queues()
+
+    class HecGunicornApp(BaseApplication):
+        def load_config(self):
+            for key, value in {'bind': f"{host}:{port}", 'workers': workers, 'threads': threads,
+                               'worker_class': 'gthread', 'backlog': HEC3_BACKLOG, 'keepalive': HEC3_KEEPALIVE,
+                               'post_fork': post_fork, 'worker_exit': worker_exit}.items():
+                self.cfg.set(key, value)
+        def load(self):
+            return app
+
+    HecGunicornApp().run()
+#End of _run_gunicorn()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def hec3_worker(index, listener, host, port, DEBUG_LEVEL, rate_limits=None):
+    """
+    Worker process (no gunicorn): threaded Werkzeug server on the supervisor's listening socket. listener is the
+    socket object itself: under the spawn start method (macOS, Windows) multiprocessing duplicates it into the child.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)    # Supervisor owns shutdown
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    _init_worker(os.path.join(CACHE_DIR, f"worker-{index}"), DEBUG_LEVEL, rate_limits)
+    server = make_server(host, port, app, threaded=True, request_handler=HecRequestHandler, fd=listener.fileno())
+    try:
+        server.serve_forever()
+    finally:
+        flush_ingest_queues()   # multiprocessing children skip atexit
+#End of hec3_worker()
 #--------------------------------------------------------------
-##============================================================
-#if __name__ == "__main__":
-#    # Run the Flask app
-#    
 #============================================================
-def start_hec3_server(DEBUG_LEVEL):
-    
+def start_hec3_server(DEBUG_LEVEL, workers=HEC3_WORKERS, threads=HEC3_THREADS, host=HEC3_HOST, port=HEC3_PORT):
+    """
+    Production serving. With gunicorn installed: `workers` processes x `threads` threads. Otherwise a threaded
+    Werkzeug server (debugger and reloader off), forked into `workers` processes sharing one listening socket.
+    """
     print(f"{Fore.GREEN}>>Starting Splunk HEC3 server..." )
 
     if DEBUG_LEVEL != 0:
         print(f"{Fore.YELLOW+Back.LIGHTRED_EX+Style.BRIGHT} **** LEVEL:{DEBUG_LEVEL} DEBUG MODE ENABLED **** {Fore.RESET}")
-    
-    app.run(host='0.0.0.0', port=8080, debug=True)
\ No newline at end of file
+
+    try:
+        import gunicorn     # Optional dependency
+    except ImportError:
+        gunicorn = None
+    if gunicorn is not None:
+        print(f"{Fore.BLUE}HEC3 (gunicorn) on {host}:{port} [workers:{workers}] [threads:{threads}]")
+        _run_gunicorn(host, port, DEBUG_LEVEL, workers, threads)
+        return
+
+    if workers <= 1:
+        _init_worker(CACHE_DIR, DEBUG_LEVEL)
+        print(f"{Fore.BLUE}HEC3 (werkzeug, threaded) on {host}:{port}")
+        run_simple(host, port, app, threaded=True, request_handler=HecRequestHandler, use_reloader=False, use_debugger=False)
+        return
+
+    # Supervisor: one listening socket shared by every worker (fork inherits it, spawn gets a duplicate)
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(HEC3_BACKLOG)
+    processes = [None] * workers
+    rate_limits = rate_limit_settings()
+
+    def spawn(index):
+        process = multiprocessing.Process(target=hec3_worker, name=f"hec3-worker-{index}",
+                                          args=(index, listener, host, port, DEBUG_LEVEL, rate_limits))
+        process.daemon = True   # Workers die with the supervisor
+        process.start()
+        processes[index] = process
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))    # Run the cleanup below on SIGTERM too
+    for index in range(workers):
+        spawn(index)
+    print(f"{Fore.BLUE}HEC3 (werkzeug) supervisor [pid:{os.getpid()}] on {host}:{port} [workers:{workers}] [threads: one per connection]")
+    try:
+        while True:
+            time.sleep(1)
+            for index, process in enumerate(processes):
+                if not process.is_alive():
+                    print(f"{Fore.LIGHTRED_EX}HEC3 worker {index} [pid:{process.pid}] died [exit:{process.exitcode}]. Restarting...")
+                    spawn(index)
+    finally:
+        for process in processes:
+            if process is not None and process.is_alive():
+                process.terminate()     # SIGTERM: worker flushes its queue and exits
+        for process in processes:
+            if process is not None:
+                process.join(5)
+#End of start_hec3_server()
+#============================================================
+
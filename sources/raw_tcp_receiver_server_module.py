@@ -14,10 +14,14 @@ init(autoreset=True)  # Automatically reset color after each print
 
 #-----------------------  Importing my modules & local configs -------------------
 from utils.misc_utils_module import print_error_details, DLevel
-from utils.queues_module import send_to_que, setup_cache_directory
+from utils.queues_module import get_ingest_queue
+from utils.stream_framing_module import StreamFramer
+from utils.rate_limit_module import get_rate_limiter, tag_event, RATE_PASS, RATE_TAG
 #RAW_TCP_RECV_PORT=1614  # Port for raw TCP socket receiver
 #RAW_TCP_RECV_HOST = '0.0.0.0'  # Listen on all interfaces
 CACHE_DIR = 'raw_tcp_que'
+RAW_TCP_FRAMING = 'lf'  # Record framing: auto | octet | lf | nul  (see utils/stream_framing_module.py)
+RAW_TCP_RECV_BUFF_SIZE = 65536  # Bytes read per recv()
 #-----------------------  Importing my modules & local configs -------------------
 
 #------------------------------- raw tcp listener  -------------
@@ -32,11 +36,8 @@ def start_raw_tcp_server(raw_tcp_recv_host, raw_tcp_recv_port, debug_level=0):
     logging.info(f"{Fore.GREEN}>>Starting raw (TCP) socket server..." )
 
     ################Initialize for sending to queue() ###
-    cache_dir = CACHE_DIR
-    setup_cache_directory(cache_dir,debug_level)  # Ensure the cache directory exists. Delete on startup
-    message_count = 0
-    last_timestamp = time.time()
-    event_cache = []
+    que = get_ingest_queue(CACHE_DIR, debug_level)  # One long-lived queue for the listener, shared by all connections
+    limiter = get_rate_limiter('raw_tcp')   # Token bucket per source IP
     #################################
 
     try:
@@ -51,26 +52,31 @@ def start_raw_tcp_server(raw_tcp_recv_host, raw_tcp_recv_port, debug_level=0):
             client_socket, client_address = server_socket.accept()   #Accept a connection
             try:
                 print(f"Connection from {client_address}")
-                setup_cache_directory(cache_dir,debug_level)  # Ensure the cache directory exists. Delete on startup
-                message_count = 0
-                last_timestamp = time.time()
-                event_cache = []
+                framer = StreamFramer(RAW_TCP_FRAMING)  # A recv() chunk is not a record. Frame the stream
                 #----------------------
                 while True: #Receive data from the client
-                    data = client_socket.recv(1024)   #bufsize argument of 1024 used above is the maximum amount of data to be received at once   
-                    if not data:        
-                        break
-                    if debug_level >= 2:
-                        #print(f"D{debug_level}{Back.GREEN+Fore.YELLOW}[{__name__}] {Fore.RESET}1)Received:{Style.RESET_ALL} ->{Fore.LIGHTMAGENTA_EX}{data}<- {Style.RESET_ALL}[len:{len(data)}]")
-                        print(f"{DLevel(2)} [Bytes received:{len(data)}] RAW TCP message from {client_address} ")
-                    if debug_level >= 3:
-                         #if len(data)==0: print ("\n") # Print newline if data is empty
-                        print(f"{DLevel(3)}{Fore.LIGHTMAGENTA_EX} DATA:{Fore.YELLOW+Style.BRIGHT}[{Fore.LIGHTBLACK_EX}{data}{Fore.YELLOW+Style.BRIGHT}]{Fore.BLUE}[lenght:{len(data)}]{Fore.RESET} ")
-                       #logger.info(f"{DLevel(3)}{Fore.LIGHTMAGENTA_EX} DATA:{Fore.YELLOW+Style.BRIGHT}[{Fore.LIGHTBLACK_EX}{data}{Fore.YELLOW+Style.BRIGHT}]{Fore.BLUE}[lenght:{len(data)}]{Fore.RESET} ")
+                    chunk = client_socket.recv(RAW_TCP_RECV_BUFF_SIZE)
+                    if chunk and debug_level >= 2:
+                        #print(f"D{debug_level}{Back.GREEN+Fore.YELLOW}[{__name__}] {Fore.RESET}1)Received:{Style.RESET_ALL} ->{Fore.LIGHTMAGENTA_EX}{chunk}<- {Style.RESET_ALL}[len:{len(chunk)}]")
+                        print(f"{DLevel(2)} [Bytes received:{len(chunk)}] RAW TCP message from {client_address} ")
+                    if chunk and debug_level >= 3:
+                         #if len(chunk)==0: print ("\n") # Print newline if data is empty
+                        print(f"{DLevel(3)}{Fore.LIGHTMAGENTA_EX} DATA:{Fore.YELLOW+Style.BRIGHT}[{Fore.LIGHTBLACK_EX}{chunk}{Fore.YELLOW+Style.BRIGHT}]{Fore.BLUE}[lenght:{len(chunk)}]{Fore.RESET} ")
+                       #logger.info(f"{DLevel(3)}{Fore.LIGHTMAGENTA_EX} DATA:{Fore.YELLOW+Style.BRIGHT}[{Fore.LIGHTBLACK_EX}{chunk}{Fore.YELLOW+Style.BRIGHT}]{Fore.BLUE}[lenght:{len(chunk)}]{Fore.RESET} ")
 
-                    message_count += 1
-                    last_timestamp = time.time()
-                    send_to_que(data, cache_dir, message_count, last_timestamp, event_cache, debug_level)  
+                    records = framer.feed(chunk) if chunk else [framer.flush()]  # Peer closed: last unterminated record
+                    admitted = []
+                    for data in records:
+                        if not data:
+                            continue
+                        verdict = limiter.admit(client_address[0])
+                        if verdict == RATE_PASS:
+                            admitted.append(data)
+                        elif verdict == RATE_TAG:
+                            admitted.append(tag_event(data))
+                    que.put_many(admitted)
+                    if not chunk:
+                        break
                     
             finally:
                 client_socket.close()
@@ -2,15 +2,32 @@
 # # # # This module implements a generic REST API client that can fetch data from a specified API endpoint.
 # # # # It is designed to be run as a standalone script or integrated into a larger system for receiving and processing data.
 # # # # It is intended to be used in conjunction with other components, such as a logging framework or data processing pipeline.
+# # # # iter_pages_concurrent() fetches ?page=N pages through a thread pool with a bounded number of requests in flight,
+# # # # probing ahead when the page count is unknown, and still yields pages in page order.
+# # # # With a CheckpointStore (utils/checkpoint_module.py) a run resumes at the page/offset where the last one stopped,
+# # # # skips records below the high-water timestamp and sends conditional requests (304 = page unchanged).
 # # # #--------------------------------------------------------------
 
 from colorama import Fore, Back, Style, init
 # Initialize colorama
 init(autoreset=True)  # Automatically reset color after each print
+import json
+import math
 import requests
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 #--------------------------------------------------------------
 from configs.globals_module import GITHUB_ADVISORY_URL, GITHUB_TOKEN, CISA_KEV_URL
+from utils.queues_module import get_ingest_queue
+from utils.checkpoint_module import get_checkpoint_store
+CACHE_DIR = 'rest1_que'
+REST1_MAX_IN_FLIGHT = 8  # Page requests in flight at once (1 = sequential)
+REST1_MAX_PAGES = 100000  # Hard stop for APIs that never return an empty page
+REST1_TIMEOUT = 30  # Seconds per page request
+PAGE_COUNT_KEYS = ('total_pages', 'totalPages', 'last_page', 'lastPage', 'pages', 'page_count')  # Page count in the body
+TIMESTAMP_KEYS = ('updated_at', 'updatedAt', 'modified', 'last_modified', 'published_at', 'created_at', 'timestamp', 'dateAdded')  # High-water field, first one a record has
 
 #--------------------------------------------------------------
 def get_user_configuration():
@@ -32,6 +49,7 @@ def get_user_configuration():
     if auth_type == 'bearer':
         auth_token = api_key
         headers = {'Authorization': f'Bearer {auth_token}'}
+        auth = None
     elif auth_type == 'basic':
         username = input("Enter your username: ")
         password = input("Enter your password: ")
@@ -45,31 +63,39 @@ def get_user_configuration():
     return api_url, headers, auth
 #--------------------------------------------------------------
 #--------------------------------------------------------------
-# Function to fetch data from the API with pagination
-def fetch_data_from_api(api_url, headers, auth):
-    page = 1
-    all_data = []
+# Sequential pagination: yields (page, results) one page at a time, so nothing but the current page is held.
+# With a CheckpointStore, requests are conditional and a 304 page is skipped (nothing new on it)
+def iter_pages(api_url, headers, auth, DEBUG_LEVEL=0, start_page=1, store=None):
+    page = start_page
 
-    while True:
+    while page <= REST1_MAX_PAGES:
         params = {'page': page}
-        print(f"Fetching data from page {page}...")
+        if DEBUG_LEVEL >= 2:
+            print(f"Fetching data from page {page}...")
+        page_url = _page_url(api_url, page)
+        request_headers = store.conditional_headers(page_url, headers) if store else headers
         # Send GET request with pagination and authentication if provided
         if auth:
-            response = requests.get(api_url, params=params, auth=auth, headers=headers)
+            response = requests.get(api_url, params=params, auth=auth, headers=request_headers, timeout=REST1_TIMEOUT)
         else:
-            response = requests.get(api_url, params=params, headers=headers)
+            response = requests.get(api_url, params=params, headers=request_headers, timeout=REST1_TIMEOUT)
             #response = requests.get(api_url)
             
+        if response.status_code == 304:     # Unchanged since the last run
+            page += 1
+            continue
         # Check if the response is successful
         if response.status_code == 200:
+            if store:
+                store.remember_response(page_url, response)
             data = response.json()
             # Check if the response is a dictionary
             if not isinstance(data, dict):
-                print("Response is not a dictionary.")
-                all_data = data
+                if not data:
+                    break   # Plain list responses end with an empty page
+                yield page, data
+                page += 1
             else: #--------
-                keys = data.keys()
-                print(f"Respoinse is dictonary. Keys in the response:") # {keys}")
                 # Dynamically find the key that contains the results
                 results_key = None
                 for key in data.keys():
@@ -78,7 +104,9 @@ def fetch_data_from_api(api_url, headers, auth):
                         break # Exit the loop once we find the first list key
 
                 if results_key:
-                    all_data.extend(data[results_key])  # Use the dynamically found results key
+                    if not data[results_key]:
+                        break   # Past the last page (or nothing new on it yet)
+                    yield page, data[results_key]  # Use the dynamically found results key
                     # Check if there's a 'next' page
                     if 'next' in data and data['next']:
                         page += 1
@@ -86,29 +114,253 @@ def fetch_data_from_api(api_url, headers, auth):
                         break
                 else: # No results key found
                     print("No results key found in the response.")
-                break
+                    break
                 #--------
        
         else: #response.status_code != 200
             print(f"Error fetching data: {response.status_code} - {response.text}")
             break  #We exit the loop on error
+#End of iter_pages()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+# Function to fetch data from the API with pagination. Holds every record: use iter_pages()/collect_to_queue() for big collections
+def fetch_data_from_api(api_url, headers, auth):
+    all_data = []
+    for page, results in iter_pages(api_url, headers, auth):
+        all_data.extend(results)
+    return all_data
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _page_results(data):
+    """Split a page body into (results list, has_next). has_next is False only if the body says so ('next' falsy)"""
+    if not isinstance(data, dict):
+        return (data if isinstance(data, list) else []), True
+    for key in data.keys():
+        if isinstance(data[key], list):  # Assumption: results will be a list (same rule as fetch_data_from_api())
+            return data[key], ('next' not in data or bool(data['next']))
+    return [], False
+#--------------------------------------------------------------
+def _discover_page_count(response, data, results):
+    """Page count from a Link rel="last" header, a page count key in the body, or count / page size. None if unknown"""
+    last_url = response.links.get('last', {}).get('url')
+    if last_url:
+        last_page = parse_qs(urlparse(last_url).query).get('page', [None])[0]
+        if last_page and last_page.isdigit():
+            return int(last_page)
+    if isinstance(data, dict):
+        for key in PAGE_COUNT_KEYS:
+            if isinstance(data.get(key), int):
+                return data[key]
+        if isinstance(data.get('count'), int) and results:
+            return math.ceil(data['count'] / len(results))
+    return None
+#--------------------------------------------------------------
+def _page_url(api_url, page):
+    """Full URL of a page (the key its ETag/Last-Modified are stored under)"""
+    return requests.Request('GET', api_url, params={'page': page}).prepare().url
+#--------------------------------------------------------------
+def _make_session(max_in_flight):
+    """One Session for all page requests: connections are reused and the pool is as large as the window"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+#--------------------------------------------------------------
+def _fetch_page(session, api_url, page, headers, auth, timeout=REST1_TIMEOUT, store=None):
+    """
+    GET one page. Returns (results, has_next, page count or None), or None on an error (logged).
+    results is None if the page answered 304 Not Modified to a conditional request.
+    """
+    page_url = _page_url(api_url, page)
+    if store:
+        headers = store.conditional_headers(page_url, headers)
+    try:
+        response = session.get(api_url, params={'page': page}, headers=headers, auth=auth, timeout=timeout)
+    except requests.RequestException as e:
+        print(f"{Fore.LIGHTRED_EX}Error fetching page {page}: {e}")
+        return None
+    if response.status_code == 304:
+        return None, True, None
+    if store and response.status_code == 200:
+        store.remember_response(page_url, response)
+    if response.status_code != 200:
+        if response.status_code != 404:     # Many APIs answer 404 past the last page
+            print(f"{Fore.LIGHTRED_EX}Error fetching page {page}: {response.status_code} - {response.text[:200]}")
+        return None
+    data = response.json()
+    results, has_next = _page_results(data)
+    return results, has_next, _discover_page_count(response, data, results)
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def iter_pages_concurrent(api_url, headers=None, auth=None, max_in_flight=REST1_MAX_IN_FLIGHT, page_count=None,
+                          timeout=REST1_TIMEOUT, DEBUG_LEVEL=0, start_page=1, store=None):
+    """
+    Yield (page, results) for ?page=start_page,... in page order while up to max_in_flight pages are fetched
+    concurrently. The first page is fetched alone; if it reveals the page count (or page_count is given) only those
+    pages are requested, otherwise pages are probed ahead within the window. Iteration stops at the first empty or
+    failed page, at a page saying there is no next one, or at a page repeating the previous one (an API ignoring
+    ?page=). Pages answering 304 to a conditional request (store given) are skipped.
+    """
+    session = _make_session(max_in_flight)
+    first = _fetch_page(session, api_url, start_page, headers, auth, timeout, store)
+    if first is None:
+        session.close()
+        return
+    results, has_next, discovered = first
+    if results is not None:
+        if not results:
+            session.close()
+            return
+        yield start_page, results
+    last_page = min(page_count or discovered or REST1_MAX_PAGES, REST1_MAX_PAGES)
+    if not has_next or last_page <= start_page:
+        session.close()
+        return
+    if DEBUG_LEVEL >= 1:
+        print(f"Paging [{api_url}] [pages:{last_page if page_count or discovered else 'unknown, probing'}] [in flight:{max_in_flight}]")
 
+    pool = ThreadPoolExecutor(max_in_flight, thread_name_prefix='rest1-page')
+    pending = {}            # page -> Future. Never more than max_in_flight pages ahead of the next one to yield
+    next_submit = start_page + 1
+    previous = results
+    try:
+        for page in range(start_page + 1, last_page + 1):
+            while next_submit <= last_page and next_submit < page + max_in_flight:
+                pending[next_submit] = pool.submit(_fetch_page, session, api_url, next_submit, headers, auth, timeout, store)
+                next_submit += 1
+            fetched = pending.pop(page).result()    # Wait in page order. Later pages keep downloading meanwhile
+            if fetched is None:
+                break
+            results, has_next, _ = fetched
+            if results is None:     # 304: nothing new on this page
+                continue
+            if not results or results == previous:
+                break
+            yield page, results
+            if not has_next:
+                break
+            previous = results
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)     # Probes past the end are not waited for
+        session.close()
+#End of iter_pages_concurrent()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def fetch_data_from_api_concurrent(api_url, headers, auth, max_in_flight=REST1_MAX_IN_FLIGHT, DEBUG_LEVEL=0):
+    """All records of all pages, in page order (see iter_pages_concurrent())"""
+    all_data = []
+    for page, results in iter_pages_concurrent(api_url, headers, auth, max_in_flight, DEBUG_LEVEL=DEBUG_LEVEL):
+        if DEBUG_LEVEL >= 2:
+            print(f"Page {page}: {len(results)} records")
+        all_data.extend(results)
     return all_data
+#End of fetch_data_from_api_concurrent()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def iter_api_pages(api_url, headers, auth, max_in_flight=REST1_MAX_IN_FLIGHT, DEBUG_LEVEL=0, start_page=1, store=None):
+    """(page, results) in page order: concurrent window if max_in_flight > 1, else one page after another"""
+    if max_in_flight > 1:
+        return iter_pages_concurrent(api_url, headers, auth, max_in_flight, DEBUG_LEVEL=DEBUG_LEVEL, start_page=start_page, store=store)
+    return iter_pages(api_url, headers, auth, DEBUG_LEVEL, start_page, store)
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _record_timestamp(record):
+    if isinstance(record, dict):
+        for key in TIMESTAMP_KEYS:
+            if record.get(key) is not None:
+                return record[key]
+    return None
+#--------------------------------------------------------------
+def incremental_pages(pages, store, stream, DEBUG_LEVEL=0, que=None, newest_first=False):
+    """
+    Drop what earlier runs delivered from (page, results) and checkpoint each page once the consumer took it:
+    records of the resume page before the saved offset, and records older than the high-water timestamp.
+    Empty pages never move the checkpoint (a page past the end is not a page we finished).
+    que (the consumer's IngestQueue) is flushed to disk before the checkpoint moves, so a crash cannot skip a page
+    that was only batched in memory.
+    Default: the API appends (oldest first), new records land on the last page. Feed it the pages of
+    iter_api_pages(..., start_page=store.get(stream)['cursor']['page'], store=store).
+    newest_first: new records land on page 1 (e.g. GitHub). Feed it every page from 1; only the high-water timestamp
+    filters, paging stops at the first page with nothing newer, and the mark is saved once the run is complete.
+    Records without a timestamp field (TIMESTAMP_KEYS) are then collected again on every run.
+    """
+    cursor = {} if newest_first else store.get(stream).get('cursor', {})
+    resume_page, offset = cursor.get('page'), cursor.get('offset', 0)
+    high_water = store.get(stream).get('high_water')
+    newest = None           # newest_first: largest timestamp of this run, saved at the end
+    for page, results in pages:
+        if not results:     # An empty page says nothing about where we are: keep the cursor where it is
+            continue
+        fresh = results[offset:] if page == resume_page else results
+        if high_water is not None:
+            try:
+                fresh = [record for record in fresh if (_record_timestamp(record) is None or _record_timestamp(record) >= high_water)]
+            except TypeError:       # Timestamp type changed. Deliver rather than lose
+                pass
+        if DEBUG_LEVEL >= 2 and len(fresh) != len(results):
+            print(f"Page {page}: {len(results) - len(fresh)} records already collected")
+        if fresh:
+            yield page, fresh
+        if que is not None:
+            que.flush()     # The page is on disk before the checkpoint says it was collected
+        page_newest = max((ts for ts in map(_record_timestamp, fresh) if ts is not None), default=None)
+        if newest_first:
+            if page_newest is not None and (newest is None or page_newest > newest):
+                newest = page_newest
+            if not fresh:
+                break       # Everything from here on is older than the last run's newest record
+            continue
+        # Consumer has queued the page: move the checkpoint past it
+        store.update(stream, cursor={'page': page, 'offset': len(results)})
+        store.advance_high_water(stream, page_newest)
+        store.save()
+    if newest_first:        # Only a complete run may raise the mark: older pages of this run were not all seen before
+        store.advance_high_water(stream, newest)
+        store.save()
+#End of incremental_pages()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def collect_to_queue(pages, que, DEBUG_LEVEL=0):
+    """
+    Stream (page, results) into que, one put_many() per page, as the pages arrive. Only the page in hand (plus the
+    concurrent window) is ever held, whatever the size of the collection. Returns the record count.
+    """
+    count = 0
+    for page, results in pages:
+        que.put_many([json.dumps(record, separators=(',', ':')) for record in results])
+        count += len(results)
+        if DEBUG_LEVEL >= 1:
+            print(f"Page {page}: {len(results)} records queued [total:{count}]")
+    return count
+#End of collect_to_queue()
 #--------------------------------------------------------------
 #==============================================================
 # Function to run the REST API collector
-def run_rest1_api_collector(DEBUG_LEVEL=0):
+def run_rest1_api_collector(DEBUG_LEVEL=0, max_in_flight=REST1_MAX_IN_FLIGHT, incremental=True, newest_first=False):
 
     if DEBUG_LEVEL != 0:
         print(f"{Fore.YELLOW+Back.LIGHTRED_EX+Style.BRIGHT} **** LEVEL:{DEBUG_LEVEL} DEBUG MODE ENABLED **** {Fore.RESET}")
     api_url, headers, auth = get_user_configuration()
 
     print("Fetching data from the API...")
-    data = fetch_data_from_api(api_url, headers, auth)
+    que = get_ingest_queue(CACHE_DIR, DEBUG_LEVEL)
+    if incremental:     # Resume where the last run stopped (checkpoints/rest1.json)
+        store = get_checkpoint_store('rest1')
+        start_page = 1 if newest_first else store.get(api_url).get('cursor', {}).get('page', 1)
+        if start_page > 1:
+            print(f"Resuming [{api_url}] at page {start_page}")
+        validators = None if newest_first else store    # Newest first: page 1 must come back with data, not a 304
+        pages = incremental_pages(iter_api_pages(api_url, headers, auth, max_in_flight, DEBUG_LEVEL, start_page, validators),
+                                  store, api_url, DEBUG_LEVEL, que, newest_first)
+    else:
+        pages = iter_api_pages(api_url, headers, auth, max_in_flight, DEBUG_LEVEL)
+    try:
+        count = collect_to_queue(pages, que, DEBUG_LEVEL)
+    finally:
+        que.flush()     # Pages collected before an error are kept
 
-    # Optionally, save to file or process the data
-    #print(data)
-    print(f"Fetched {len(data)} items.")
+    print(f"Fetched {count} items.")
 #===============================================================
 
 #if __name__ == "__main__":
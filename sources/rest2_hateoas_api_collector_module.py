@@ -9,16 +9,44 @@
 #HATEOAS (Hypermedia As The Engine of Application State) is a REST architectural style where the client interacts with the server entirely
 #through hypermedia provided by the server. In a HATEOAS-compliant API, each response includes relevant links (usually under a _links key)
 #that tell the client where to go next.
+#
+#All requests go through one shared requests.Session (get_http_session()): link hops reuse pooled keep-alive
+#connections instead of a new TCP/TLS handshake each. An optional TTL response cache (CacheEngine) serves repeated
+#traversals of mostly static trees locally, and a visited-URL set stops "next" chains that loop.
+#crawl_hateoas() goes beyond "next": a breadth-first crawl of every _links relation (allow-list, depth limit, URL
+#dedup) with a bounded worker pool and a per-host cap on requests in flight, so link latency overlaps. It fetches every
+#URL once, so it does not use the response cache (which would only hold on to every body crawled).
 
 
 
 
+import json
+import threading
 import requests
+from collections import deque, defaultdict
+from urllib.parse import urldefrag, urljoin, urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
 from colorama import Fore, Back, Style, init
 # Initialize colorama
 init(autoreset=True)  # Automatically reset color after each print
 #-----------------------  Importing my modules & local configs -------------------
 from configs.globals_module import GITHUB_ADVISORY_URL, GITHUB_TOKEN, CISA_KEV_URL
+from utils.checkpoint_module import get_checkpoint_store, NOT_MODIFIED
+from utils.caching_engine_module import CacheEngine
+from configs.globals_module import CACHEDIR, HIGH_REQ_THRESHOLD
+from utils.queues_module import get_ingest_queue
+CACHE_DIR = 'rest2_que'
+REST2_POOL_HOSTS = 16  # Hosts with a connection pool in the shared session
+REST2_POOL_SIZE = 32  # Keep-alive connections kept per host
+REST2_TIMEOUT = 30  # Seconds per request
+REST2_CACHE_TTL = 0  # Response cache lifetime in seconds (0 = no cache)
+REST2_CRAWL_WORKERS = 16  # Crawler requests in flight at once
+REST2_CRAWL_PER_HOST = 8  # Crawler requests in flight per host (keep <= REST2_POOL_SIZE)
+REST2_CRAWL_DEPTH = 3  # Link hops from the root the crawler follows
+REST2_CRAWL_MAX_URLS = 100000  # Distinct URLs a crawl may discover
+REST2_CRAWL_RELATIONS = None  # Relations the crawler follows (None = all but the ones below)
+REST2_CRAWL_SKIP_RELATIONS = ('self', 'curies')  # Never followed: the page itself, HAL documentation links
 #------------------------  Importing my modules & local configs -------------------
 
 #--------------------------------------------------------------
@@ -60,28 +88,90 @@ def get_user_configuration():
 #End of get_user_configuration function()
 #--------------------------------------------------------------
 
+#--------------------------------------------------------------
+_session = None
+_session_lock = threading.Lock()
+#--------------------------------------------------------------
+def get_http_session():
+    """The process-wide Session for HATEOAS requests (pooled keep-alive connections per host). Thread safe for GETs"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=REST2_POOL_HOSTS, pool_maxsize=REST2_POOL_SIZE)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+#End of get_http_session()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def make_response_cache(ttl=REST2_CACHE_TTL):
+    """In-memory TTL cache for HATEOAS responses, or None if ttl is 0"""
+    if not ttl:
+        return None
+    return CacheEngine(cache_lifetime=ttl, high_request_threshold=HIGH_REQ_THRESHOLD, cache_dir=CACHEDIR, verbose=False)
+#End of make_response_cache()
+#--------------------------------------------------------------
+
 #---------------------------------------------------------------
 # Function to make a HATEOAS request to the API
 # This function performs a GET request to the API, either with authentication or not.
 # It handles pagination and follows HATEOAS links to navigate through the API.
 # It returns the JSON response from the API.
 # If the request fails, it prints an error message and returns None.
-def make_hateoas_request(api_url, headers, auth, endpoint=""):
+# With a CheckpointStore the request is conditional; a 304 Not Modified returns NOT_MODIFIED.
+# With a cache (make_response_cache()) a response younger than its TTL is returned without a request.
+def make_hateoas_request(api_url, headers, auth, endpoint="", store=None, cache=None, session=None):
+    url = _resolve_url(api_url, endpoint)
+    if cache is None:
+        return _get_hateoas(url, headers, auth, store, session)
+    data, _ = cache.get_cached_data(url, lambda: _get_hateoas(url, headers, auth, store, session), 0)
+    if not isinstance(data, (dict, list)):     # Errors and 304s are not served from the cache
+        cache.invalidate(url)
+    return data
+#WEND of make_hateoas_request function()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _get_hateoas(url, headers, auth, store=None, session=None):
     # Perform a GET request to the API, either with authentication or not
-    url = f"{api_url}/{endpoint}" if endpoint else api_url
     print(f"Making request to: {url}")
-    
-    if auth:
-        response = requests.get(url, headers=headers, auth=auth)
-    else:
-        response = requests.get(url, headers=headers)
+    if store:
+        headers = store.conditional_headers(url, headers)
+    session = session or get_http_session()
+    try:
+        response = session.get(url, headers=headers, auth=auth, timeout=REST2_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Error fetching data: {e}")
+        return None
 
+    if response.status_code == 304:
+        return NOT_MODIFIED
     if response.status_code == 200:
-        return response.json()
+        data = response.json()
+        if store:
+            store.remember_response(url, response, _next_href(data))
+        return data
     else:
         print(f"Error fetching data: {response.status_code} - {response.text}")
         return None
-#WEND of make_hateoas_request function()
+#End of _get_hateoas()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _resolve_url(api_url, endpoint):
+    """Absolute hrefs (what HATEOAS APIs usually return) are used as they are, relative ones are joined to api_url"""
+    if not endpoint:
+        url = api_url
+    elif endpoint.startswith(('http://', 'https://')):
+        url = endpoint
+    else:
+        url = f"{api_url.rstrip('/')}/{endpoint.lstrip('/')}"
+    return urldefrag(url)[0]    # '#fragment' never reaches the server: same resource
+#--------------------------------------------------------------
+def _next_href(data):
+    links = data.get('_links') if isinstance(data, dict) else None
+    if not isinstance(links, dict):
+        return None
+    return (links.get('next') or {}).get('href')
 #--------------------------------------------------------------
 #--------------------------------------------------------------
 # Function to navigate through the API using HATEOAS
@@ -96,24 +186,48 @@ def make_hateoas_request(api_url, headers, auth, endpoint=""):
 # This function is the main entry point for navigating through the API.
 # It uses the make_hateoas_request function to fetch data from the API.
 # It handles the pagination and navigation through the API using HATEOAS links.
-def navigate_hateoas(api_url, headers, auth):
-    current_endpoint = ""
+# With a CheckpointStore it resumes from the last href of the previous run (checkpoint "next_href"), and a 304 page
+# is not processed again: its stored "next" link is followed instead.
+# A link to a URL already visited in this traversal ends it (cycle). Returns the number of pages processed.
+def navigate_hateoas(api_url, headers, auth, store=None, cache=None, DEBUG_LEVEL=0):
+    current_endpoint = store.get(api_url).get('next_href', "") if store else ""
+    if current_endpoint:
+        print(f"Resuming from checkpoint: {current_endpoint}")
+    visited = set()
+    pages = 0
     while True:
+        url = _resolve_url(api_url, current_endpoint)
+        if url in visited:
+            print(f"{Fore.LIGHTRED_EX}Link cycle: [{url}] was already visited. Stopping navigation.")
+            break
+        visited.add(url)
         # Make a request to the current endpoint
-        data = make_hateoas_request(api_url, headers, auth, current_endpoint)
-        
+        data = make_hateoas_request(api_url, headers, auth, current_endpoint, store, cache)
+
+        if data is NOT_MODIFIED:
+            next_link = store.validator(url).get('next')
+            if not next_link:
+                print("No changes since the last run.")
+                break
+            current_endpoint = next_link
+            continue
         if not data:
             break
 
         # Process the data as needed (for example, print or store it)
+        pages += 1
         print(f"Data fetched from {current_endpoint}:")
-        print(data)
+        if DEBUG_LEVEL >= 2:
+            print(data)
 
         # Look for '_links' to find next steps
         if '_links' in data:
             links = data['_links']
             next_link = links.get('next', {}).get('href')
             
+            if store:       # Processed: next run starts from the next page, or re-polls this last one
+                store.update(api_url, next_href=next_link or current_endpoint)
+                store.save()
             if next_link:
                 # If there's a 'next' link, use it for the next API call
                 current_endpoint = next_link
@@ -124,18 +238,118 @@ def navigate_hateoas(api_url, headers, auth):
         else:
             print("No '_links' found in response. Stopping navigation.")
             break
+    return pages
 #END of navigate_hateoas function()
 #--------------------------------------------------------------
+#--------------------------------------------------------------
+def _iter_links(data):
+    """Yield (relation, href) for every link of a HAL-style resource, including the resources in _embedded"""
+    if not isinstance(data, dict):
+        return
+    links = data.get('_links')
+    if isinstance(links, dict):
+        for relation, targets in links.items():
+            for target in (targets if isinstance(targets, list) else [targets]):
+                if isinstance(target, dict) and target.get('href') and not target.get('templated'):
+                    yield relation, target['href']
+    embedded = data.get('_embedded')
+    if isinstance(embedded, dict):
+        for resources in embedded.values():
+            for resource in (resources if isinstance(resources, list) else [resources]):
+                yield from _iter_links(resource)
+#End of _iter_links()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def crawl_hateoas(api_url, headers, auth, relations=REST2_CRAWL_RELATIONS, max_depth=REST2_CRAWL_DEPTH,
+                  workers=REST2_CRAWL_WORKERS, per_host=REST2_CRAWL_PER_HOST, max_urls=REST2_CRAWL_MAX_URLS,
+                  on_resource=None, DEBUG_LEVEL=0):
+    """
+    Breadth-first crawl from api_url over every _links relation (or only `relations`), up to max_depth hops.
+    Up to `workers` requests run at once, at most `per_host` of them against one host; each URL is fetched once
+    (so responses are not cached).
+    on_resource(url, data) is called from this thread for every resource fetched. Returns the crawl counters.
+    """
+    session = get_http_session()
+    frontier = deque([(_resolve_url(api_url, ""), 0)])      # (url, depth), FIFO = breadth first
+    seen = {frontier[0][0]}
+    in_flight = {}                                          # Future -> (url, depth, host)
+    host_active = defaultdict(int)
+    stats = {'fetched': 0, 'failed': 0, 'discovered': 1, 'duplicates': 0, 'max_depth': 0}
+    pool = ThreadPoolExecutor(workers, thread_name_prefix='rest2-crawl')
+    try:
+        while frontier or in_flight:
+            deferred = []       # Next in line but their host is at its cap. Keep their place
+            while frontier and len(in_flight) < workers and len(deferred) < workers * 4:
+                url, depth = frontier.popleft()
+                host = urlsplit(url).netloc
+                if host_active[host] >= per_host:
+                    deferred.append((url, depth))
+                    continue
+                future = pool.submit(make_hateoas_request, url, headers, auth, "", None, None, session)
+                in_flight[future] = (url, depth, host)
+                host_active[host] += 1
+            frontier.extendleft(reversed(deferred))
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, depth, host = in_flight.pop(future)
+                host_active[host] -= 1
+                try:
+                    data = future.result()
+                except Exception as e:      # A bad resource must not end the crawl
+                    print(f"{Fore.LIGHTRED_EX}Error processing [{url}]: {e}")
+                    data = None
+                if not isinstance(data, (dict, list)):
+                    stats['failed'] += 1
+                    continue
+                stats['fetched'] += 1
+                stats['max_depth'] = max(stats['max_depth'], depth)
+                if on_resource:
+                    on_resource(url, data)
+                if depth >= max_depth:
+                    continue
+                for relation, href in _iter_links(data):
+                    if relation in REST2_CRAWL_SKIP_RELATIONS or (relations and relation not in relations):
+                        continue
+                    link = urldefrag(urljoin(url, href))[0]     # Relative hrefs are relative to the resource
+                    if link in seen:
+                        stats['duplicates'] += 1
+                        continue
+                    if len(seen) >= max_urls:
+                        continue
+                    seen.add(link)
+                    stats['discovered'] += 1
+                    frontier.append((link, depth + 1))
+            if DEBUG_LEVEL >= 1:
+                print(f"Crawl [fetched:{stats['fetched']}] [in flight:{len(in_flight)}] [queued:{len(frontier)}]")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return stats
+#End of crawl_hateoas()
+#--------------------------------------------------------------
 ###============================================================
-def run_rest2_hateoas_api_collector(DEBUG_LEVEL=0):
+def run_rest2_hateoas_api_collector(DEBUG_LEVEL=0, incremental=True, cache_ttl=REST2_CACHE_TTL, crawl=False,
+                                    relations=REST2_CRAWL_RELATIONS, max_depth=REST2_CRAWL_DEPTH, workers=REST2_CRAWL_WORKERS):
     
     if DEBUG_LEVEL != 0:
         print(f"{Fore.YELLOW+Back.LIGHTRED_EX+Style.BRIGHT} **** LEVEL:{DEBUG_LEVEL} DEBUG MODE ENABLED **** {Fore.RESET}")
 
     api_url, headers, auth = get_user_configuration()
 
+    if crawl:
+        que = get_ingest_queue(CACHE_DIR, DEBUG_LEVEL)
+        if cache_ttl:
+            print(f"{Fore.YELLOW}The response cache is not used in crawl mode (each URL is fetched once). Ignoring cache TTL [{cache_ttl}]")
+        print(f"Crawling the API using HATEOAS [relations:{relations or 'all'}] [depth:{max_depth}] [workers:{workers}]...")
+        stats = crawl_hateoas(api_url, headers, auth, relations, max_depth, workers,
+                              on_resource=lambda url, data: que.put(json.dumps(data, separators=(',', ':'))), DEBUG_LEVEL=DEBUG_LEVEL)
+        que.flush()
+        print(f"Crawl done: {stats}")
+        return
+
     print("Navigating through the API using HATEOAS...")
-    navigate_hateoas(api_url, headers, auth)
+    navigate_hateoas(api_url, headers, auth, get_checkpoint_store('rest2') if incremental else None,
+                     make_response_cache(cache_ttl), DEBUG_LEVEL)
 #===========================================================
 
 #if __name__ == "__main__":
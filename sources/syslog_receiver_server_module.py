@@ -5,15 +5,21 @@
 # # #--------------------------------------------------------------
 
 from datetime import datetime
+import errno
 import json
 import logging
+import multiprocessing
+import os
 import re
+import selectors
+import signal
 import socket
+import sys
 import threading
 import time
 from colorama import Fore, Back, Style, init
 
-from utils.queues_module import send_to_que, setup_cache_directory
+from utils.queues_module import get_ingest_queue, flush_ingest_queues
 # Initialize colorama
 init(autoreset=True)  # Automatically reset color after each print
 
@@ -24,18 +30,34 @@ DEFAULT_SYSLOG_FILE = "syslog_server.log"
 SYSLOG_RECV_HOST = '0.0.0.0'
 SYSLOG_RECV_UDP_PORT = 1514  # Default syslog UDP port
 SYSLOG_RECV_TCP_PORT = 1514  # Default syslog TCP port
-SYSLOG_TCP_RECV_BUFF_SIZE = 1024  # Buffer size for TCP. Increase if needed
+SYSLOG_TCP_RECV_BUFF_SIZE = 65536  # Bytes read per recv() on a TCP connection
+SYSLOG_TCP_MAX_LINE = 65536  # A TCP record longer than this without a terminator is handed over as is
+SYSLOG_TCP_FRAMING = 'auto'  # RFC 6587 framing: auto | octet | lf | nul  (auto = octet counting if the frame starts with a digit)
+SYSLOG_TCP_IDLE_TIMEOUT = 300  # Seconds before an idle TCP sender is disconnected
+SYSLOG_TCP_BACKLOG = 1024  # listen() backlog. Many forwarders may (re)connect at once
+SYSLOG_TCP_ACCEPT_BACKOFF = 0.1  # Seconds accept() pauses after running out of file descriptors/memory (EMFILE...)
+SYSLOG_UDP_RCVBUF = 8 * 1024 * 1024  # Requested kernel SO_RCVBUF for UDP (capped by net.core.rmem_max)
+SYSLOG_UDP_MAX_DATAGRAM = 65535  # Largest possible UDP datagram. Buffers this size never truncate
+SYSLOG_UDP_BATCH_SIZE = 256  # Max datagrams drained from the socket per batch
+SYSLOG_UDP_DROPS_INTERVAL = 1  # Seconds between /proc/net/udp drop counter reads
+SYSLOG_WORKERS = 1  # Number of SO_REUSEPORT worker processes (1 = single process, no supervisor)
+SYSLOG_WORKER_STATS_INTERVAL = 1  # Seconds between worker counter publishes / supervisor health checks
+SYSLOG_WORKER_REPORT_INTERVAL = 10  # Seconds between combined counter reports from the supervisor
 CACHE_DIR = 'syslog_que'
 
 from utils.misc_utils_module import DLevel, print_error_details, setup_logging, signal_handler
 from utils.caching_engine_module import CacheEngine, fetch_data_from_api2
+from utils.syslog_parser_module import parse_syslog
+from utils.stream_framing_module import StreamFramer
+from utils.rate_limit_module import get_rate_limiter, reset_rate_limiters, configure_rate_limits, rate_limit_settings, \
+    tag_event, RATE_DROP, RATE_TAG
 #-----------------------  Importing my modules & local configs -------------------
 
 logger = setup_logging(DEFAULT_SYSLOG_FILE)  # Set up logging configuration
 
 #--------------------------------------------------------------
 def parse_syslog_message(data, DEBUG_LEVEL=0):
-    """Parse syslog message based on RFC 3164 or RFC 5424"""
+    """Parse syslog message based on RFC 3164 or RFC 5424 (legacy regex parser, see utils/syslog_parser_module.py)"""
     #-----
     #RFC3164_REGEX = re.compile(
     #   r"^(?P<pri><\d{1,3}>)(?P<timestamp>\w{3} \d{1,2} \d{2}:\d{2}:\d{2}) (?P<hostname>[\w.-]+) (?P<appname>\w+) (?P<msgid>\S+) (?P<message>.*)$")
@@ -85,15 +107,10 @@ def parse_syslog_message(data, DEBUG_LEVEL=0):
 #-------------------------------------------------------------- 
 
 #--------------------------------------------------------------
-def handle_syslog_message(data, address, protocol, DEBUG_LEVEL=0, mps=0):
-    """Process and log the syslog message"""
-    #.......Initialize for sending to queue() .........
-    cache_dir = CACHE_DIR
-    setup_cache_directory(cache_dir,DEBUG_LEVEL)  # Ensure the cache directory exists. Delete on startup
-    message_count = 0
-    last_timestamp = time.time()
-    event_cache = []
-    #.......Initialize for sending to queue() .........
+def handle_syslog_message(data, address, protocol, DEBUG_LEVEL=0, mps=0, que=None, rate_limited=False):
+    """Process and log the syslog message. que is the listener's long-lived IngestQueue. rate_limited: tag it (RATE_TAG)"""
+    if que is None:
+        que = get_ingest_queue(CACHE_DIR, DEBUG_LEVEL)
     
     rfc_type = "RCF"
     if DEBUG_LEVEL >= 2:
@@ -101,18 +118,23 @@ def handle_syslog_message(data, address, protocol, DEBUG_LEVEL=0, mps=0):
         logger.info(f"{DLevel(2)} [Bytes received:{len(data)}]{Fore.MAGENTA}{protocol}{Fore.RESET} syslog message from {address}")   # Log to file
     
     #print(f"XXXXXXX\033[91mReceived syslog message from {address}: {data}{Fore.RESET}")
-    rfc_type, log_data = parse_syslog_message(data, DEBUG_LEVEL)   #; print(f"\n{Fore.MAGENTA}Parsed syslog message:{Fore.RESET} >[{log_data}]<") ; exit()
-    #print (f"XXXXXXX {rfc_type}:  {type(rfc_type)}")
+    log_data = parse_syslog(data)   # Single-pass parser. Returns SyslogRecord or None
     if log_data:
-        message = log_data.get('message', '')
-        timestamp = log_data.get('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        rfc_type = log_data.rfc
+        if DEBUG_LEVEL >= 2:
+            print(f"{Fore.LIGHTGREEN_EX}[Matched:{rfc_type}]")
+            logger.info(f"{Fore.LIGHTGREEN_EX}[Matched:{rfc_type}]")
+        if DEBUG_LEVEL >= 4:
+            print(f"{DLevel(4)} {Fore.LIGHTYELLOW_EX}{json.dumps(log_data.as_dict(), indent=4)}")  #show syslog lines as json
+        message = log_data.message
+        timestamp = log_data.timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         log_msg = f"{timestamp} - {message}"
+        if rate_limited:
+            log_msg = tag_event(log_msg)
         logger.info(f"Logged: {log_msg}")   # Log to file    
         
         #......... we have data, send to que .....................................
-        message_count += 1
-        last_timestamp = time.time()
-        send_to_que({log_msg}, cache_dir, message_count, last_timestamp, event_cache, DEBUG_LEVEL)  
+        que.put(log_msg)
         #......... we have data, send to que .....................................
 
     else:   #no data detected
@@ -128,25 +150,96 @@ def handle_syslog_message(data, address, protocol, DEBUG_LEVEL=0, mps=0):
 #End of handle_syslog_message()        
 #--------------------------------------------------------------        
 #--------------------------------------------------------------
-def syslog_server_udp(host, port, DEBUG_LEVEL=0):
-    """Run a syslog server for UDP"""
+# UDP intake counters. kernel_drops is read from /proc/net/udp (datagrams the kernel discarded because
+# our receive buffer was full)
+udp_stats = {'datagrams': 0, 'bytes': 0, 'batches': 0, 'kernel_drops': 0}
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def read_udp_drops(port):
+    """Return the kernel drop counter for UDP sockets bound to port (Linux /proc/net/udp[6]), or None if unavailable"""
+    port_hex = f":{port:04X}"
+    drops = None
+    for proc_file in ('/proc/net/udp', '/proc/net/udp6'):
+        try:
+            with open(proc_file, 'r') as f:
+                next(f)     # Skip header line
+                for line in f:
+                    fields = line.split()
+                    if len(fields) > 12 and fields[1].endswith(port_hex):
+                        drops = (drops or 0) + int(fields[-1])     # Last column is "drops"
+        except (OSError, StopIteration, ValueError):
+            continue
+    return drops
+#End of read_udp_drops()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def recv_udp_batch(server_socket, views):
+    """
+    Block for one datagram, then drain whatever else is already queued (MSG_DONTWAIT) into the
+    preallocated buffer pool. Returns a list of (nbytes, address, view) up to len(views).
+    """
+    nbytes, address = server_socket.recvfrom_into(views[0])
+    batch = [(nbytes, address, views[0])]
+    dontwait = getattr(socket, 'MSG_DONTWAIT', 0)
+    if not dontwait:        # Platform cannot do non-blocking reads per call. One datagram per batch
+        return batch
+    for view in views[1:]:
+        try:
+            nbytes, address = server_socket.recvfrom_into(view, 0, dontwait)
+        except (BlockingIOError, InterruptedError):
+            break
+        batch.append((nbytes, address, view))
+    return batch
+#End of recv_udp_batch()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def syslog_server_udp(host, port, DEBUG_LEVEL=0, rcvbuf=SYSLOG_UDP_RCVBUF, batch_size=SYSLOG_UDP_BATCH_SIZE,
+                      reuse_port=False, cache_dir=CACHE_DIR):
+    """Run a syslog server for UDP. Reads datagrams in batches into a preallocated 64KB buffer pool"""
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    server_socket.bind((host, port))
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1) # Allow address reuse when restarting the server quickly
-  #  server_socket.setblocking(False)  # Set non-blocking mode
-    print(f"Syslog server {Fore.GREEN}(UDP){Fore.RESET} listening on {host}:{port}\n")
-    logger.info(f"Syslog server {Fore.GREEN}(UDP){Fore.RESET} listening on {host}:{port}")   # Log to file   
-    #print(f"\033[96mSyslog server (UDP) listening on {host}:{port}{Fore.RESET}")
+    if reuse_port:
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)    # Kernel load-balances datagrams across workers
+    try:
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)   # Absorb bursts in the kernel
+    except OSError as e:
+        logger.warning(f"Could not set SO_RCVBUF to {rcvbuf}: {e}")
+    server_socket.bind((host, port))
+    que = get_ingest_queue(cache_dir, DEBUG_LEVEL)     # Created once per listener, used from the hot path
+    actual_rcvbuf = server_socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+    print(f"Syslog server {Fore.GREEN}(UDP){Fore.RESET} listening on {host}:{port} [SO_RCVBUF:{actual_rcvbuf}] [batch:{batch_size}]\n")
+    logger.info(f"Syslog server {Fore.GREEN}(UDP){Fore.RESET} listening on {host}:{port} [SO_RCVBUF:{actual_rcvbuf}] [batch:{batch_size}]")   # Log to file
+
+    # Buffer pool allocated once. recvfrom_into() writes straight into these, no per-datagram allocation
+    buffers = [bytearray(SYSLOG_UDP_MAX_DATAGRAM) for _ in range(max(1, batch_size))]
+    views = [memoryview(buffer) for buffer in buffers]
+    base_drops = read_udp_drops(port) or 0      # Drops from before we started are not ours
+    next_drops_check = time.time() + SYSLOG_UDP_DROPS_INTERVAL
+    limiter = get_rate_limiter('syslog')        # Shared with the TCP listener: one budget per source IP
     counter = 0
-    data = {}
     while True:
-        counter += 1
-        data, address = server_socket.recvfrom(1024)  # buffer size
-        data = data.decode('utf-8').strip()
-        if DEBUG_LEVEL >= 1:
-                    print(f"{DLevel(1)} 🔸UDP Connection received from {address}: {counter}")
-                    logger.info(f"{DLevel(1)} 🔸UDP Connection received from {address}")
-        handle_syslog_message(data, address, "UDP", DEBUG_LEVEL,0)  # Process the message
+        batch = recv_udp_batch(server_socket, views)   # Drain the socket before anything goes to the queue
+        udp_stats['batches'] += 1
+        for nbytes, address, view in batch:
+            counter += 1
+            udp_stats['datagrams'] += 1
+            udp_stats['bytes'] += nbytes
+            verdict = limiter.admit(address[0])
+            if verdict == RATE_DROP:        # Shed before spending anything on decoding/parsing
+                continue
+            data = str(view[:nbytes], 'utf-8', 'replace').strip()
+            if DEBUG_LEVEL >= 1:
+                print(f"{DLevel(1)} 🔸UDP Connection received from {address}: {counter}")
+                logger.info(f"{DLevel(1)} 🔸UDP Connection received from {address}")
+            handle_syslog_message(data, address, "UDP", DEBUG_LEVEL,0, que, verdict == RATE_TAG)  # Process the message
+
+        if time.time() >= next_drops_check:
+            next_drops_check = time.time() + SYSLOG_UDP_DROPS_INTERVAL
+            drops = read_udp_drops(port)
+            if drops is not None and drops - base_drops > udp_stats['kernel_drops']:
+                udp_stats['kernel_drops'] = drops - base_drops
+                print(f"{Fore.LIGHTRED_EX}UDP kernel drops on port {port}: {udp_stats['kernel_drops']}")
+                logger.warning(f"UDP kernel drops on port {port}: {udp_stats['kernel_drops']} [datagrams:{udp_stats['datagrams']}]")
 #End of syslog_server_udp()        
 #--------------------------------------------------------------
 #--------------------------------------------------------------
@@ -164,58 +257,159 @@ def calc_msg_per_sec(message_count, previous_time):
 #End of calc_msg_per_sec()
 #--------------------------------------------------------------
 #--------------------------------------------------------------
-def syslog_server_tcp(host, port, DEBUG_LEVEL=0):
-    """Run a syslog server for TCP"""
+tcp_stats = {'messages': 0, 'bytes': 0, 'accepted': 0, 'connections': 0, 'accept_errors': 0}     # TCP intake counters. connections is a gauge
+#--------------------------------------------------------------
+#*********************************************************************************
+# TcpConnection Class
+# Per-connection state for the event-loop TCP server: socket, framer (read buffer) and idle/rate bookkeeping.
+class TcpConnection:
+    __slots__ = ('sock', 'address', 'framer', 'last_activity', 'message_count', 'previous_time')
+
+    def __init__(self, sock, address, framing=SYSLOG_TCP_FRAMING):
+        self.sock = sock
+        self.address = address
+        self.framer = StreamFramer(framing, SYSLOG_TCP_MAX_LINE)     # Bytes received but not yet a complete record
+        self.last_activity = time.time()
+        self.message_count = 0
+        self.previous_time = self.last_activity
+#End of TcpConnection class()
+#**********************************************************************************
+#--------------------------------------------------------------
+def _close_tcp_connection(selector, conn, DEBUG_LEVEL=0, que=None, reason="closed"):
+    """Deliver any unterminated tail, unregister and close a connection"""
+    tail = conn.framer.flush()
+    if tail:
+        _deliver_tcp_record(conn, tail, DEBUG_LEVEL, que)
+    try:
+        selector.unregister(conn.sock)
+    except (KeyError, ValueError):
+        pass
+    conn.sock.close()
+    tcp_stats['connections'] -= 1
+    if DEBUG_LEVEL >= 1:
+        print(f"{DLevel(1)} 🔹TCP Connection {reason} from {conn.address}")
+        logger.info(f"{DLevel(1)} 🔹TCP Connection {reason} from {conn.address}")
+#End of _close_tcp_connection()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _deliver_tcp_record(conn, record, DEBUG_LEVEL=0, que=None):
+    data = record.decode('utf-8', 'replace').strip()
+    if data:
+        tcp_stats['messages'] += 1
+        verdict = get_rate_limiter('syslog').admit(conn.address[0])
+        if verdict == RATE_DROP:
+            return
+        conn.message_count += 1
+        mps = calc_msg_per_sec(conn.message_count, conn.previous_time)   #Added msg per sec calcuation to be used with caching engine -MyH 4/7/25
+        handle_syslog_message(data, conn.address, "TCP", DEBUG_LEVEL, mps, que, verdict == RATE_TAG)
+#End of _deliver_tcp_record()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _read_tcp_connection(selector, conn, DEBUG_LEVEL=0, que=None):
+    """Read what is available on a ready connection and hand the complete (framed) records on as a batch"""
+    try:
+        chunk = conn.sock.recv(SYSLOG_TCP_RECV_BUFF_SIZE)
+    except (BlockingIOError, InterruptedError):
+        return
+    except OSError as e:
+        logger.error(f"Error handling client {conn.address}: {e}")
+        _close_tcp_connection(selector, conn, DEBUG_LEVEL, que, "reset")
+        return
+    if not chunk:
+        _close_tcp_connection(selector, conn, DEBUG_LEVEL, que)
+        return
+
+    conn.last_activity = time.time()
+    tcp_stats['bytes'] += len(chunk)
+    for record in conn.framer.feed(chunk):
+        _deliver_tcp_record(conn, record, DEBUG_LEVEL, que)
+#End of _read_tcp_connection()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _accept_tcp_connections(selector, server_socket, DEBUG_LEVEL=0):
+    """
+    Accept every pending connection on the (non-blocking) listening socket. Returns False if accept() ran out of
+    resources (EMFILE, ENFILE, ENOBUFS, ENOMEM): the caller stops watching the listener for SYSLOG_TCP_ACCEPT_BACKOFF
+    seconds (pending connections wait in the backlog) while the open connections keep being served.
+    """
+    while True:
+        try:
+            client_socket, client_address = server_socket.accept()
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError as e:
+            tcp_stats['accept_errors'] += 1
+            if tcp_stats['accept_errors'] == 1 or tcp_stats['accept_errors'] % 1000 == 0:
+                print(f"{Fore.LIGHTRED_EX}TCP accept() failed [{e}] [errors:{tcp_stats['accept_errors']}] [open:{tcp_stats['connections']}]")
+                logger.error(f"TCP accept() failed [{e}] [errors:{tcp_stats['accept_errors']}] [open:{tcp_stats['connections']}]")
+            if e.errno in (errno.ECONNABORTED, errno.EPROTO, errno.EPERM):
+                continue        # That one connection is gone. Take the next
+            return False
+        client_socket.setblocking(False)
+        selector.register(client_socket, selectors.EVENT_READ, TcpConnection(client_socket, client_address))
+        tcp_stats['accepted'] += 1
+        tcp_stats['connections'] += 1
+        if DEBUG_LEVEL >= 1:
+            print(f"{DLevel(1)} 🔹TCP Connection received from {client_address}: {tcp_stats['accepted']} [open:{tcp_stats['connections']}]")
+            logger.info(f"{DLevel(1)} 🔹TCP Connection received from {client_address} [open:{tcp_stats['connections']}]")
+#End of _accept_tcp_connections()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def syslog_server_tcp(host, port, DEBUG_LEVEL=0, reuse_port=False, cache_dir=CACHE_DIR, idle_timeout=SYSLOG_TCP_IDLE_TIMEOUT):
+    """Run a syslog server for TCP. One selectors event loop multiplexes all sender connections"""
     if DEBUG_LEVEL >= 5:
         print(f"{DLevel(5)}")
         logger.info(f"{DLevel(5)}")
     
     server_socket = None
+    selector = selectors.DefaultSelector()
+    que = get_ingest_queue(cache_dir, DEBUG_LEVEL)     # Created once per listener, used from the hot path
     try:
         server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)  # TCP socket
-        server_socket.bind((host, port))  # Bind to host and port
-        server_socket.listen(5)  # Listen for incoming connections (max 5)
         server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1) # Allow address reuse when restarting the server quickly
+        if reuse_port:
+            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)    # Kernel spreads new connections across workers
+        server_socket.bind((host, port))  # Bind to host and port
+        server_socket.listen(SYSLOG_TCP_BACKLOG)  # Listen for incoming connections
+        server_socket.setblocking(False)
+        selector.register(server_socket, selectors.EVENT_READ, None)    # data=None marks the listening socket
 
         print(f"Syslog server {Fore.LIGHTBLUE_EX}(TCP){Fore.RESET} listening on {host}:{port}\n")
         logger.info(f"Syslog server {Fore.LIGHTBLUE_EX}(TCP){Fore.RESET} listening on {host}:{port}")
-        counter = 0
+        next_idle_check = time.time() + 1
+        accept_resume = 0       # While set, the listener is out of the selector (accept() backoff)
         while True:
-            counter += 1
-            client_socket, client_address = server_socket.accept()  # Accept incoming connection
-            try:
-                if DEBUG_LEVEL >= 1:
-                    print(f"{DLevel(1)} 🔹TCP Connection received from {client_address}: {counter}")
-                    logger.info(f"{DLevel(1)} 🔹TCP Connection received from {client_address}")
-
-                #Added msg per sec calcuation to be used with caching engine -MyH 4/7/25
-                message_count = 0
-                start_time = time.time()
-                previous_time = start_time
-                while True:
-                    data = client_socket.recv(SYSLOG_TCP_RECV_BUFF_SIZE).decode('utf-8').strip()
-                    if data:
-                        #print(f"D{DEBUG_LEVEL}{Back.GREEN+Fore.YELLOW}[{__name__}] {Fore.RESET}1)Received:{Style.RESET_ALL} ->{Fore.LIGHTMAGENTA_EX}{data}<- {Style.RESET_ALL}[len:{len(data)}]")
-                        message_count += 1
-                        mps = calc_msg_per_sec(message_count, previous_time)
-                        #print (f"Message per second: {mps:.2f}")
-                        #previous_time = time.time( )
-                        handle_syslog_message(data, client_address, "TCP", DEBUG_LEVEL, mps)
-                    else:
-                        break
-            except Exception as e:
-                print_error_details(e)
-                logger.error(f"Error handling client: {e}")
-            finally:
-                if client_socket:
-                    client_socket.close()
-                    if DEBUG_LEVEL >= 1:
-                        print(f"{DLevel(1)} 🔹TCP Connection closed from {client_address}")
-                        logger.info(f"{DLevel(1)} 🔹TCP Connection closed from {client_address}")                       
+            for key, mask in selector.select(timeout=SYSLOG_TCP_ACCEPT_BACKOFF if accept_resume else 1):
+                if key.data is None:
+                    if not _accept_tcp_connections(selector, server_socket, DEBUG_LEVEL):
+                        selector.unregister(server_socket)      # Readable until accepted: do not spin on it
+                        accept_resume = time.time() + SYSLOG_TCP_ACCEPT_BACKOFF
+                else:
+                    try:
+                        _read_tcp_connection(selector, key.data, DEBUG_LEVEL, que)
+                    except Exception as e:      # One bad sender must not take the loop down
+                        print_error_details(e)
+                        logger.error(f"Error handling client {key.data.address}: {e}")
+                        _close_tcp_connection(selector, key.data, DEBUG_LEVEL, que, "dropped")
+
+            now = time.time()
+            if accept_resume and now >= accept_resume:
+                selector.register(server_socket, selectors.EVENT_READ, None)
+                accept_resume = 0
+            if idle_timeout and now >= next_idle_check:     # Sweep idle senders once a second
+                next_idle_check = now + 1
+                idle = [key.data for key in selector.get_map().values()
+                        if key.data is not None and now - key.data.last_activity > idle_timeout]
+                for conn in idle:
+                    _close_tcp_connection(selector, conn, DEBUG_LEVEL, que, "timed out")
     except Exception as e:
         print_error_details(e)
         logger.info(f"syslog_server_tcp(): An error occurred. Exit:{e}")
     finally:
+        for key in list(selector.get_map().values()):
+            if key.data is not None:
+                _close_tcp_connection(selector, key.data, DEBUG_LEVEL, que)
+        selector.close()
         if server_socket:
             server_socket.close()
             print("🟢 Server closed.")     
@@ -223,13 +417,18 @@ def syslog_server_tcp(host, port, DEBUG_LEVEL=0):
 #End of syslog_server_tcp()        
 #--------------------------------------------------------------
 #==============================================================
-def start_syslog_server(host=SYSLOG_RECV_HOST, udp_port=SYSLOG_RECV_UDP_PORT, tcp_port=SYSLOG_RECV_TCP_PORT, DEBUG_LEVEL=0):
+def start_syslog_server(host=SYSLOG_RECV_HOST, udp_port=SYSLOG_RECV_UDP_PORT, tcp_port=SYSLOG_RECV_TCP_PORT, DEBUG_LEVEL=0,
+                        udp_rcvbuf=SYSLOG_UDP_RCVBUF, udp_batch_size=SYSLOG_UDP_BATCH_SIZE, workers=SYSLOG_WORKERS):
     """Run both UDP and TCP syslog servers"""
     
     if DEBUG_LEVEL != 0:
         print(f"{Fore.YELLOW+Back.LIGHTRED_EX+Style.BRIGHT} **** LEVEL:{DEBUG_LEVEL} DEBUG MODE ENABLED **** {Fore.RESET}")
+
+    if workers > 1:     # One process per core, all bound to the same ports with SO_REUSEPORT
+        start_syslog_workers(host, udp_port, tcp_port, DEBUG_LEVEL, udp_rcvbuf, udp_batch_size, workers)
+        return
     
-    udp_thread = threading.Thread(target=syslog_server_udp, args=(host, udp_port, DEBUG_LEVEL))  
+    udp_thread = threading.Thread(target=syslog_server_udp, args=(host, udp_port, DEBUG_LEVEL, udp_rcvbuf, udp_batch_size))
     tcp_thread = threading.Thread(target=syslog_server_tcp, args=(host, tcp_port, DEBUG_LEVEL))
 
     udp_thread.daemon = True    # Set as daemon thread
@@ -241,4 +440,138 @@ def start_syslog_server(host=SYSLOG_RECV_HOST, udp_port=SYSLOG_RECV_UDP_PORT, tc
     udp_thread.join()          # Wait for UDP server to finish
     tcp_thread.join()          # Wait for TCP server to finish
 #End of start_syslog_server()    
-#==========================================================
\ No newline at end of file
+#==========================================================
+#--------------------------------------------------------------
+# Shared counter layout for worker mode: one row of WORKER_COUNTERS per worker in a multiprocessing.Array.
+# Each worker only writes its own row, so no lock is needed.
+WORKER_COUNTERS = ('messages', 'bytes', 'connections', 'shed')
+WORKER_GAUGES = ('connections',)   # Point-in-time values. Not carried forward when a worker dies
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _publish_worker_stats(index, shared_counters):
+    """Copy this process' UDP+TCP counters into its row of the shared array"""
+    base = index * len(WORKER_COUNTERS)
+    while True:
+        shared_counters[base] = udp_stats['datagrams'] + tcp_stats['messages']
+        shared_counters[base + 1] = udp_stats['bytes'] + tcp_stats['bytes']
+        shared_counters[base + 2] = tcp_stats['connections']
+        shared_counters[base + 3] = get_rate_limiter('syslog').counters['shed']
+        time.sleep(SYSLOG_WORKER_STATS_INTERVAL)
+#End of _publish_worker_stats()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _run_listener(listener_done, target, *args):
+    """Run a worker's listener. Whichever way it ends, wake the worker's main thread so the process exits"""
+    try:
+        target(*args)
+    except Exception as e:
+        print_error_details(e)
+        logger.error(f"Syslog listener {target.__name__} failed: {e}")
+    finally:
+        listener_done.set()
+#End of _run_listener()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def syslog_worker(index, host, udp_port, tcp_port, DEBUG_LEVEL, udp_rcvbuf, udp_batch_size, shared_counters, rate_limits=None):
+    """
+    Worker process: own UDP+TCP listeners (SO_REUSEPORT), own parser state and own queue segment.
+    rate_limits: the supervisor's rate_limit_settings() (module globals are not inherited under spawn)
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)    # Supervisor owns shutdown
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    cache_dir = os.path.join(CACHE_DIR, f"worker-{index}")
+    udp_stats.update(datagrams=0, bytes=0, batches=0, kernel_drops=0)   # Counters inherited over fork() belong to the parent
+    tcp_stats.update(messages=0, bytes=0, accepted=0, connections=0, accept_errors=0)
+    if rate_limits:
+        configure_rate_limits(**rate_limits)
+    reset_rate_limiters()
+    logger.info(f"Syslog worker {index} started [pid:{os.getpid()}] [queue:{cache_dir}]")
+
+    listener_done = threading.Event()
+    threads = [
+        threading.Thread(target=_run_listener, args=(listener_done, syslog_server_udp, host, udp_port, DEBUG_LEVEL, udp_rcvbuf, udp_batch_size, True, cache_dir)),
+        threading.Thread(target=_run_listener, args=(listener_done, syslog_server_tcp, host, tcp_port, DEBUG_LEVEL, True, cache_dir)),
+        threading.Thread(target=_publish_worker_stats, args=(index, shared_counters)),
+    ]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    try:
+        while not listener_done.wait(1):    # Listeners only return on a fatal error. The supervisor restarts us
+            pass
+        logger.warning(f"Syslog worker {index} lost a listener. Exiting to be restarted")
+        sys.exit(1)
+    finally:
+        flush_ingest_queues()   # multiprocessing children skip atexit
+#End of syslog_worker()
+#--------------------------------------------------------------
+#==============================================================
+def start_syslog_workers(host=SYSLOG_RECV_HOST, udp_port=SYSLOG_RECV_UDP_PORT, tcp_port=SYSLOG_RECV_TCP_PORT, DEBUG_LEVEL=0,
+                         udp_rcvbuf=SYSLOG_UDP_RCVBUF, udp_batch_size=SYSLOG_UDP_BATCH_SIZE, workers=SYSLOG_WORKERS):
+    """Supervisor: fork N SO_REUSEPORT workers, restart dead ones and report their combined counters"""
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        print(f"{Fore.LIGHTRED_EX}SO_REUSEPORT not supported on this platform. Running a single process.")
+        logger.warning("SO_REUSEPORT not supported on this platform. Running a single process.")
+        start_syslog_server(host, udp_port, tcp_port, DEBUG_LEVEL, udp_rcvbuf, udp_batch_size, workers=1)
+        return
+
+    shared_counters = multiprocessing.Array('Q', workers * len(WORKER_COUNTERS), lock=False)
+    retired = [0] * len(WORKER_COUNTERS)     # Counters of workers that died (their rows are reset on restart)
+    processes = [None] * workers
+    rate_limits = rate_limit_settings()
+
+    def spawn(index):
+        process = multiprocessing.Process(target=syslog_worker, name=f"syslog-worker-{index}",
+                                          args=(index, host, udp_port, tcp_port, DEBUG_LEVEL, udp_rcvbuf, udp_batch_size, shared_counters,
+                                                rate_limits))
+        process.daemon = True   # Workers die with the supervisor
+        process.start()
+        processes[index] = process
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))    # Run the cleanup below on SIGTERM too
+    for index in range(workers):
+        spawn(index)
+    print(f"Syslog supervisor [pid:{os.getpid()}] started {Fore.GREEN}{workers}{Fore.RESET} workers on UDP:{udp_port} TCP:{tcp_port}")
+    logger.info(f"Syslog supervisor [pid:{os.getpid()}] started {workers} workers on UDP:{udp_port} TCP:{tcp_port}")
+
+    next_report = time.time() + SYSLOG_WORKER_REPORT_INTERVAL
+    try:
+        while True:
+            time.sleep(SYSLOG_WORKER_STATS_INTERVAL)
+            for index, process in enumerate(processes):
+                if process.is_alive():
+                    continue
+                print(f"{Fore.LIGHTRED_EX}Syslog worker {index} [pid:{process.pid}] died [exit:{process.exitcode}]. Restarting...")
+                logger.warning(f"Syslog worker {index} [pid:{process.pid}] died [exit:{process.exitcode}]. Restarting...")
+                base = index * len(WORKER_COUNTERS)
+                for slot, name in enumerate(WORKER_COUNTERS):
+                    if name not in WORKER_GAUGES:
+                        retired[slot] += shared_counters[base + slot]
+                    shared_counters[base + slot] = 0
+                spawn(index)
+
+            if time.time() >= next_report:
+                next_report = time.time() + SYSLOG_WORKER_REPORT_INTERVAL
+                totals = get_worker_totals(shared_counters, retired)
+                if DEBUG_LEVEL >= 1:
+                    print(f"{DLevel(1)} Syslog workers [{workers}] messages:{totals['messages']} bytes:{totals['bytes']} tcp connections:{totals['connections']} shed:{totals['shed']}")
+                logger.info(f"Syslog workers [{workers}] messages:{totals['messages']} bytes:{totals['bytes']} tcp connections:{totals['connections']} shed:{totals['shed']}")
+    finally:
+        for process in processes:
+            if process is not None and process.is_alive():
+                process.terminate()     # SIGTERM: worker flushes its queues and exits
+        for process in processes:
+            if process is not None:
+                process.join(5)
+#End of start_syslog_workers()
+#==============================================================
+#--------------------------------------------------------------
+def get_worker_totals(shared_counters, retired=None):
+    """Combine per-worker counter rows (plus counters of retired workers) into one dict"""
+    width = len(WORKER_COUNTERS)
+    totals = dict.fromkeys(WORKER_COUNTERS, 0)
+    for slot, name in enumerate(WORKER_COUNTERS):
+        totals[name] = sum(shared_counters[slot::width]) + (retired[slot] if retired else 0)
+    return totals
+#End of get_worker_totals()
+#--------------------------------------------------------------
@@ -0,0 +1,9 @@
+#Module: conftest.py
+# # # pytest setup: the modules import each other from the repository root (from utils..., from sources...), as
+# # # they do when osps.py runs. Run the suite from the root: python -m pytest
+# # #--------------------------------------------------------------
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
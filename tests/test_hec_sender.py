@@ -0,0 +1,207 @@
+#Module: test_hec_sender.py
+# # # destinations/splunk_hec3_sender_module.py against the stub HEC of bench/stub_servers.py: batches arrive whole,
+# # # a 200 without an ackId (acknowledgement disabled on the token) is not an error, and HecOutputPool retries,
+# # # drops, spills and replays batches by response status, and DiskQueue commits wait for indexer acknowledgement.
+# # #--------------------------------------------------------------
+
+import time
+
+import pytest
+
+from bench.stub_servers import start_stub_hec_server
+from destinations.splunk_hec3_sender_module import HecSender, HecOutputPool, HecAckTracker, HecQueueForwarder, \
+    _response_ack_id
+from utils.queues_module import DiskQueue
+
+
+class _Response:
+    def __init__(self, body):
+        self.body = body
+    def json(self):
+        if self.body is ValueError:
+            raise ValueError("not JSON")
+        return self.body
+
+
+def test_every_event_is_delivered_in_batches():
+    server = start_stub_hec_server()
+    try:
+        sender = HecSender(url=server.url, token='stub-token', max_batch_events=100)
+        for i in range(1000):
+            sender.send({'n': i})
+        sender.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert server.events == 1000
+    assert sender.stats()['batches'] == server.requests >= 10     # The linger timer may close a batch early
+
+
+def test_ack_id_of_a_response():
+    assert _response_ack_id(_Response({'text': 'Success', 'code': 0, 'ackId': 7})) == 7
+    assert _response_ack_id(_Response({'text': 'Success', 'code': 0})) is None
+    assert _response_ack_id(_Response(ValueError)) is None
+    assert _response_ack_id(_Response(['not', 'a', 'dict'])) is None
+
+
+#--------------------------------------------------------------
+# HecOutputPool: retries, drop vs spill by status, replay. The stub's server.responses injects failures
+def _wait(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def hec():
+    server = start_stub_hec_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_pool(hec, tmp_path):
+    pools = []
+    def make(**options):
+        sender = HecSender(url=hec.url, token='stub-token', linger_ms=60000)
+        pool = HecOutputPool(sender, workers=1, max_retries=2, backoff_base=0.001, replay_interval=3600,
+                             spill_dir=str(tmp_path / 'spill'), **options)
+        pools.append(pool)
+        return pool
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def _send(pool, events=10):
+    for i in range(events):
+        pool.sender.send({'n': i})
+    pool.sender.flush()
+
+
+def test_5xx_is_retried_then_delivered(hec, make_pool):
+    pool = make_pool()
+    hec.responses = [503, 500]
+    _send(pool)
+    _wait(lambda: pool.stats()['batches'] == 1)
+    assert pool.stats()['retries'] == 2
+    assert hec.events == 10 and hec.requests == 3
+
+
+def test_5xx_exhausting_retries_is_spilled_and_replayed(hec, make_pool):
+    pool = make_pool()
+    hec.responses = [503] * 3
+    _send(pool)
+    _wait(lambda: pool.stats()['spilled'] == 1)
+    stats = pool.stats()
+    assert (stats['retries'], stats['batches'], hec.events) == (2, 0, 0)
+    assert stats['spill_backlog_bytes'] > 0
+
+    hec.responses = [500]       # Replay stops at the first failure and keeps the batch
+    pool.replay()
+    assert pool.stats()['replayed'] == 0 and pool.stats()['spill_backlog_bytes'] > 0
+    pool.replay()
+    stats = pool.stats()
+    assert (stats['replayed'], stats['spill_backlog_bytes'], hec.events) == (1, 0, 10)
+
+
+def test_400_is_dropped(hec, make_pool):
+    pool = make_pool()
+    hec.responses = [400]
+    _send(pool)
+    _wait(lambda: pool.stats()['rejected'] == 10)
+    stats = pool.stats()
+    assert (stats['retries'], stats['spilled'], stats['spill_backlog_bytes'], hec.requests) == (0, 0, 0, 1)
+
+
+def test_401_is_spilled_without_retries(hec, make_pool):
+    pool = make_pool()
+    hec.responses = [401]
+    _send(pool)
+    _wait(lambda: pool.stats()['spilled'] == 1)
+    assert pool.stats()['retries'] == 0 and hec.requests == 1
+    pool.replay()               # Token fixed: the stub answers 200 again
+    assert pool.stats()['replayed'] == 1 and hec.events == 10
+
+
+def test_close_spills_what_it_cannot_deliver(hec, make_pool, tmp_path):
+    pool = make_pool()
+    hec.responses = [503] * 100
+    for _ in range(5):
+        _send(pool, events=2)
+    pool.close()
+    assert pool.stats()['spilled'] == 5
+    spill = DiskQueue(str(tmp_path / 'spill'), read_only=True)
+    assert len(spill.read()[0]) == 5
+    spill.close()
+
+
+#--------------------------------------------------------------
+# Indexer acknowledgement: HecQueueForwarder commits the DiskQueue only once Splunk acked, rewinds when it never does
+@pytest.fixture
+def forward(hec, tmp_path):
+    parts = []
+    def start(records=30, ack_timeout=60):
+        disk = DiskQueue(str(tmp_path / 'spool'), durability='none')
+        disk.append_many([f'record-{i}' for i in range(records)])
+        sender = HecSender(url=hec.url, token='stub-token', use_ack=True, max_batch_events=10, linger_ms=60000)
+        tracker = HecAckTracker(poll_interval=0.02, ack_timeout=ack_timeout)
+        forwarder = HecQueueForwarder(disk, sender, tracker, idle_interval=0.02, backoff_base=0.001)
+        parts.append((forwarder, tracker, sender, disk))
+        return forwarder, tracker, disk
+    yield start
+    for forwarder, tracker, sender, disk in parts:
+        forwarder.close()
+        tracker.close()
+        sender.close()
+        disk.close()
+
+
+def test_commit_waits_for_the_ack(hec, forward):
+    hec.withhold_acks = True
+    forwarder, tracker, disk = forward()
+    _wait(lambda: forwarder.stats()['forwarded'] == 30 and tracker.stats()['polls'] >= 3)
+    assert disk.committed == (0, 0)
+    assert forwarder.stats()['inflight'] == 3
+
+    hec.withhold_acks = False
+    _wait(lambda: forwarder.stats()['inflight'] == 0)
+    assert disk.backlog_bytes() == 0
+    assert hec.events == 30
+
+
+def test_withheld_acks_rewind_and_resend(hec, forward):
+    hec.withhold_acks = True
+    forwarder, tracker, disk = forward(ack_timeout=0.1)
+    _wait(lambda: forwarder.stats()['rewinds'] >= 1 and hec.events >= 60)
+    assert disk.committed == (0, 0)
+
+    hec.withhold_acks = False
+    _wait(lambda: disk.backlog_bytes() == 0)
+    assert tracker.stats()['timed_out'] >= 1
+
+
+def test_missing_ack_id_counts_as_delivered(hec, forward):
+    hec.no_ack_ids = True
+    forwarder, tracker, disk = forward()
+    _wait(lambda: disk.backlog_bytes() == 0)
+    stats = forwarder.stats()
+    assert (stats['no_ack'], stats['inflight'], stats['rewinds']) == (3, 0, 0)
+    assert len(tracker) == 0 and hec.events == 30
+
+
+def test_output_pool_journal_without_ack_ids(hec, tmp_path):
+    hec.no_ack_ids = True
+    tracker = HecAckTracker(poll_interval=0.02)
+    sender = HecSender(url=hec.url, token='stub-token', use_ack=True, linger_ms=60000)
+    pool = HecOutputPool(sender, workers=1, spill_dir=str(tmp_path / 'spill'), tracker=tracker,
+                         unacked_dir=str(tmp_path / 'unacked'), replay_interval=3600)
+    try:
+        _send(pool)
+        _wait(lambda: pool.stats()['no_ack'] == 1)
+        assert pool.stats()['unacked'] == 0 and len(tracker) == 0
+    finally:
+        pool.close()
+        tracker.close()
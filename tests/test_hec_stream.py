@@ -0,0 +1,111 @@
+#Module: test_hec_stream.py
+# # # utils/hec_stream_module.py: HEC bodies decode into the original envelope bytes whatever the chunking,
+# # # compressed bodies inflate, and malformed requests get the HEC error Splunk would send.
+# # #--------------------------------------------------------------
+
+import gzip
+import zlib
+
+import pytest
+
+from utils.hec_stream_module import HecRequestError, iter_hec_events, decompress_chunks, split_raw_events, \
+    parse_line_breaker, HEC_LINE_BREAKER
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 5, 4096])
+def test_concatenated_envelopes_keep_their_bytes(size):
+    body = b'{"event":"a","host":"h1"} {"event":{"k":"\xc3\xa9"}}\n{"event":3}'
+    raws = [raw for envelope, raw in iter_hec_events(_chunks(body, size))]
+    assert raws == [b'{"event":"a","host":"h1"}', b'{"event":{"k":"\xc3\xa9"}}', b'{"event":3}']
+
+
+def test_array_of_objects_without_require_event():
+    events = list(iter_hec_events([b'[{"a":1},{"b":2}] {"c":3}'], require_event=False))
+    assert [raw for envelope, raw in events] == [b'{"a":1}', b'{"b":2}', b'{"c":3}']
+
+
+@pytest.mark.parametrize('body, code', [
+    (b'', 5),
+    (b'   ', 5),
+    (b'{"event":"a"} not json', 6),
+    (b'{"event":"a"', 6),
+    (b'"just a string"', 6),
+    (b'{"host":"h"}', 12),
+    (b'{"event":""}', 13),
+])
+def test_invalid_bodies(body, code):
+    with pytest.raises(HecRequestError) as error:
+        list(iter_hec_events([body]))
+    assert error.value.code == code
+
+
+def test_array_is_rejected_for_envelopes():
+    with pytest.raises(HecRequestError):
+        list(iter_hec_events([b'[{"event":1}]']))
+
+
+def test_gzip_members_are_concatenated():
+    body = gzip.compress(b'{"event":1}') + gzip.compress(b'{"event":2}')
+    assert b''.join(decompress_chunks(_chunks(body, 7), 'gzip')) == b'{"event":1}{"event":2}'
+
+
+@pytest.mark.parametrize('size', [1, 2, 4096])
+def test_deflate_zlib_wrapped_and_raw(size):
+    raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    for body in (zlib.compress(b'{"event":1}'), raw.compress(b'{"event":1}') + raw.flush()):
+        assert b''.join(decompress_chunks(_chunks(body, size), 'deflate')) == b'{"event":1}'
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'deflate'])
+def test_empty_compressed_body_is_no_data(encoding):
+    assert list(decompress_chunks([], encoding)) == []
+    assert list(decompress_chunks([b''], encoding)) == []
+    with pytest.raises(HecRequestError) as error:
+        list(iter_hec_events(decompress_chunks([b''], encoding)))
+    assert error.value.code == 5
+
+
+def test_truncated_and_corrupt_compressed_bodies():
+    body = gzip.compress(b'{"event":1}' * 100)
+    with pytest.raises(HecRequestError, match='Truncated'):
+        list(decompress_chunks([body[:len(body) // 2]], 'gzip'))
+    with pytest.raises(HecRequestError, match='Invalid'):
+        list(decompress_chunks([b'not gzip at all'], 'gzip'))
+    with pytest.raises(HecRequestError) as error:
+        list(decompress_chunks([body], 'br'))
+    assert error.value.status.startswith('415')
+
+
+def test_decompressed_size_limit():
+    with pytest.raises(HecRequestError) as error:
+        list(decompress_chunks([gzip.compress(b'x' * 100000)], 'gzip', max_size=1000))
+    assert error.value.status.startswith('413')
+
+
+def test_raw_events_split_on_line_breaker():
+    batches = list(split_raw_events([b'one\r\ntw', b'o\n\nthree']))
+    assert [event for batch in batches for event in batch] == [b'one', b'two', b'three']
+    batches = list(split_raw_events([b'a||b||', b'c'], line_breaker=b'||'))
+    assert [event for batch in batches for event in batch] == [b'a', b'b', b'c']
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, HEC_LINE_BREAKER),
+    ('', HEC_LINE_BREAKER),
+    ('\\r\\n', b'\r\n'),
+    ('\\0', b'\0'),
+    ('||', b'||'),
+    ('\u00a7', b'\xc2\xa7'),
+    (b'##', b'##'),
+])
+def test_parse_line_breaker(value, expected):
+    assert parse_line_breaker(value) == expected
+
+
+def test_parse_line_breaker_rejects_bad_escapes():
+    with pytest.raises(ValueError):
+        parse_line_breaker('\\x')
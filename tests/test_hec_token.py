@@ -0,0 +1,46 @@
+#Module: test_hec_token.py
+# # # utils/hec_token_module.py: tokens authenticate with Splunk's error codes and carry their per-token options.
+# # #--------------------------------------------------------------
+
+import json
+
+import pytest
+
+from utils.hec_stream_module import HecRequestError
+from utils.hec_token_module import HecTokenRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = tmp_path / 'hec_tokens.json'
+    path.write_text(json.dumps({'tokens': {
+        'token-a': {'name': 'a', 'index': 'main', 'line_breaker': '\\r\\n'},
+        'token-b': {'name': 'b', 'disabled': True},
+    }}))
+    return HecTokenRegistry(str(path))
+
+
+def test_token_options(registry):
+    token = registry.authenticate('Splunk token-a')
+    assert token.name == 'a'
+    assert token.defaults() == {'index': 'main'}
+    assert token.line_breaker == b'\r\n'
+    assert registry.authenticate(hec_token='token-a') is token
+
+
+@pytest.mark.parametrize('authorization, code', [
+    (None, 2),
+    ('Bearer token-a', 3),
+    ('Splunk wrong', 4),
+    ('Splunk token-b', 1),
+])
+def test_authentication_errors(registry, authorization, code):
+    with pytest.raises(HecRequestError) as error:
+        registry.authenticate(authorization)
+    assert error.value.code == code
+
+
+def test_bad_line_breaker_keeps_the_current_tokens(registry, tmp_path):
+    (tmp_path / 'hec_tokens.json').write_text(json.dumps({'tokens': {'token-c': {'line_breaker': '\\x'}}}))
+    assert not registry.reload()
+    assert registry.lookup('token-a') is not None
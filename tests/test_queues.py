@@ -0,0 +1,175 @@
+#Module: test_queues.py
+# # # utils/queues_module.py DiskQueue: the committed cursor survives a restart, uncommitted records are replayed,
+# # # a torn tail is cut, a damaged record is not delivered, and a read-only consumer follows the producer's segment
+# # # rotations. IngestQueue: the spool size is re-read once another process has drained it.
+# # #--------------------------------------------------------------
+
+import os
+
+from utils.queues_module import DiskQueue, IngestQueue, SEGMENT_SUFFIX, CURSOR_FILE_NAME, write_cache_to_disk, get_tracked_cache_size, \
+    get_cache_size, _cache_sizes
+
+
+def _records(count, start=0):
+    return [f"record-{i}".encode('utf-8') for i in range(start, start + count)]
+
+
+def test_commit_survives_restart(tmp_path):
+    que = DiskQueue(str(tmp_path), durability='none')
+    que.append_many(_records(10))
+    records, position = que.read(4)
+    assert records == _records(4)
+    que.commit(position)
+    que.close()
+
+    que = DiskQueue(str(tmp_path), durability='none')
+    records, _ = que.read()
+    assert records == _records(6, start=4)
+    que.close()
+
+
+def test_uncommitted_records_are_replayed(tmp_path):
+    que = DiskQueue(str(tmp_path), durability='none')
+    que.append_many(_records(5))
+    assert que.read()[0] == _records(5)     # Read but never committed
+    que.close()
+
+    que = DiskQueue(str(tmp_path), durability='none')
+    assert que.read()[0] == _records(5)
+    que.rewind()
+    assert que.read(2)[0] == _records(2)
+    que.close()
+
+
+def test_rotation_deletes_consumed_segments(tmp_path):
+    que = DiskQueue(str(tmp_path), segment_max_bytes=64, durability='none')
+    que.append_many(_records(20))
+    assert len(que.segments) > 1
+    records, position = que.read()
+    assert records == _records(20)
+    que.commit(position)
+    assert que.segments == [position[0]]
+    assert sorted(os.listdir(tmp_path)) == sorted([CURSOR_FILE_NAME, f"{position[0]:016d}{SEGMENT_SUFFIX}"])
+    assert que.backlog_bytes() == 0
+    que.close()
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    que = DiskQueue(str(tmp_path), durability='none')
+    que.append_many(_records(3))
+    que.close()
+    segment = os.path.join(tmp_path, f"{0:016d}{SEGMENT_SUFFIX}")
+    size = os.path.getsize(segment)
+    with open(segment, 'ab') as f:
+        f.write(b'\x40\x00\x00\x00\x00\x00\x00\x00half a rec')     # Header promises 64 bytes, crash after 10
+
+    que = DiskQueue(str(tmp_path), durability='none')
+    assert os.path.getsize(segment) == size
+    que.append(b'after')
+    assert que.read()[0] == _records(3) + [b'after']
+    que.close()
+
+
+def test_read_skips_a_damaged_record(tmp_path):
+    producer = DiskQueue(str(tmp_path), segment_max_bytes=64, durability='none')
+    producer.append_many(_records(6))      # 16 bytes a record: 0-3 in segment 0, 4-5 in segment 1
+    with open(os.path.join(tmp_path, f"{0:016d}{SEGMENT_SUFFIX}"), 'r+b') as f:
+        f.seek(16 + 8)                      # Payload of record 1
+        f.write(b'X')
+    consumer = DiskQueue(str(tmp_path), durability='none', read_only=True)
+    assert consumer.read()[0] == _records(1) + _records(2, start=4)
+    consumer.close()
+    producer.close()
+
+
+def test_read_stops_at_a_damaged_tail(tmp_path):
+    producer = DiskQueue(str(tmp_path), durability='none')
+    producer.append_many(_records(3))
+    with open(os.path.join(tmp_path, f"{0:016d}{SEGMENT_SUFFIX}"), 'r+b') as f:
+        f.seek(2 * 16 + 8)
+        f.write(b'X')
+    consumer = DiskQueue(str(tmp_path), durability='none', read_only=True)
+    assert consumer.read() == (_records(2), (0, 32))
+    consumer.close()
+    producer.close()
+
+
+def test_read_at_returns_the_appended_record(tmp_path):
+    que = DiskQueue(str(tmp_path), segment_max_bytes=64, durability='none')
+    positions = [que.append(record) for record in _records(10)]
+    assert [que.read_at(position) for position in positions] == _records(10)
+    assert que.read_at((99, 0)) is None
+    que.close()
+
+
+def test_read_only_consumer_follows_the_producer(tmp_path):
+    producer = DiskQueue(str(tmp_path), segment_max_bytes=64, durability='none')
+    consumer = DiskQueue(str(tmp_path), durability='none', read_only=True)
+    producer.append_many(_records(3))
+    assert consumer.read()[0] == _records(3)
+
+    producer.append_many(_records(20, start=3))      # Rotates several times after the consumer opened
+    records, position = consumer.read()
+    assert records == _records(20, start=3)
+    consumer.commit(position)
+    assert consumer.backlog_bytes() == 0
+    consumer.close()
+    producer.close()
+
+
+def test_read_only_consumer_leaves_the_tail_alone(tmp_path):
+    producer = DiskQueue(str(tmp_path), durability='none')
+    producer.append(b'complete')
+    producer.write_file.write(b'\x10\x00\x00\x00')      # The producer is in the middle of a record
+    producer.write_file.flush()
+    segment = os.path.join(tmp_path, f"{0:016d}{SEGMENT_SUFFIX}")
+    size = os.path.getsize(segment)
+
+    consumer = DiskQueue(str(tmp_path), durability='none', read_only=True)
+    assert os.path.getsize(segment) == size
+    assert consumer.read()[0] == [b'complete']
+    assert consumer.write_file is None
+    consumer.close()
+    producer.close()
+
+
+def test_interval_fsync_across_rotations(tmp_path):
+    que = DiskQueue(str(tmp_path), segment_max_bytes=256, durability='interval', fsync_interval_ms=1)
+    for i in range(200):
+        que.append_many(_records(5, start=i * 5))
+    que.close()
+    assert que.fsyncs > 0
+
+    que = DiskQueue(str(tmp_path), durability='none')
+    assert que.read(2000)[0] == _records(1000)
+    que.close()
+
+
+def test_tracked_cache_size_counts_a_write_once(tmp_path):
+    cache_dir = str(tmp_path)
+    _cache_sizes.pop(cache_dir, None)       # Counter unset: the first write reconciles with a scan
+    write_cache_to_disk([b"first", "second"], cache_dir, 0)
+    assert get_tracked_cache_size(cache_dir) == get_cache_size(cache_dir) == 13
+    write_cache_to_disk([b"third\n"], cache_dir, 0)
+    assert get_tracked_cache_size(cache_dir) == get_cache_size(cache_dir) == 19
+    _cache_sizes.pop(cache_dir, None)
+
+
+def test_ingest_queue_sees_another_consumer_drain_the_spool(tmp_path):
+    que = IngestQueue(str(tmp_path), messages_threshold=10 ** 6, rate_threshold=10 ** 9, max_cache_size=100,
+                      durability='none')
+    que.disk.segment_max_bytes = 64
+    que.put_many(_records(20))
+    que.flush()
+    assert que.cache_bytes > que.max_cache_size
+
+    consumer = DiskQueue(str(tmp_path), durability='none', read_only=True)     # e.g. a forwarder process
+    records, position = consumer.read()
+    assert records == _records(20)
+    consumer.commit(position)
+    consumer.close()
+
+    que.put(b'next')
+    assert que.cache_bytes <= que.max_cache_size
+    assert que.flushes == 1 and que.stats()['pending'] == 1      # Not spilled on a stale size
+    que.disk.close()
@@ -0,0 +1,80 @@
+#Module: test_rate_limit.py
+# # # utils/rate_limit_module.py RateLimiter with a fake clock: token bucket refill, the drop/sample/tag policies,
+# # # per-key overrides and LRU eviction at max_keys.
+# # #--------------------------------------------------------------
+
+import pytest
+
+from utils.rate_limit_module import RateLimiter, RATE_PASS, RATE_TAG, RATE_DROP, tag_event, RATE_LIMIT_TAG
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+def test_rate_zero_never_limits(clock):
+    limiter = RateLimiter(rate=0, clock=clock)
+    assert all(limiter.admit('a') == RATE_PASS for _ in range(1000))
+    assert len(limiter) == 0
+
+
+def test_burst_then_refill(clock):
+    limiter = RateLimiter(rate=10, burst=5, clock=clock)
+    assert [limiter.admit('a') for _ in range(6)] == [RATE_PASS] * 5 + [RATE_DROP]
+    clock.now += 0.25           # 2.5 tokens
+    assert [limiter.admit('a') for _ in range(3)] == [RATE_PASS, RATE_PASS, RATE_DROP]
+    clock.now += 60             # Refill is capped at the burst
+    assert [limiter.admit('a') for _ in range(6)] == [RATE_PASS] * 5 + [RATE_DROP]
+    assert limiter.stats()['passed'] == 12 and limiter.stats()['shed'] == 3
+
+
+def test_keys_have_their_own_buckets(clock):
+    limiter = RateLimiter(rate=1, burst=1, clock=clock)
+    assert [limiter.admit(key) for key in ('a', 'b', 'a', 'b')] == [RATE_PASS, RATE_PASS, RATE_DROP, RATE_DROP]
+
+
+def test_sample_policy_keeps_one_in_n(clock):
+    limiter = RateLimiter(rate=1, burst=1, policy='sample', sample_every=10, clock=clock)
+    verdicts = [limiter.admit('a') for _ in range(31)]
+    assert verdicts[0] == RATE_PASS
+    assert verdicts[1:].count(RATE_PASS) == 3       # Over-limit events 1, 11 and 21
+    assert limiter.stats()['sampled'] == 3 and limiter.stats()['shed'] == 27
+
+
+def test_tag_policy_keeps_and_marks(clock):
+    limiter = RateLimiter(rate=1, burst=2, policy='tag', clock=clock)
+    assert [limiter.admit('a') for _ in range(4)] == [RATE_PASS, RATE_PASS, RATE_TAG, RATE_TAG]
+    assert limiter.stats()['tagged'] == 2
+    assert tag_event('msg') == f'msg {RATE_LIMIT_TAG}'
+    assert tag_event(b'msg') == f'msg {RATE_LIMIT_TAG}'.encode('ascii')
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        RateLimiter(rate=1, policy='queue')
+
+
+def test_per_key_override(clock):
+    limiter = RateLimiter(rate=100, burst=100, clock=clock)
+    assert [limiter.admit('token', 1, 3) for _ in range(4)] == [RATE_PASS] * 3 + [RATE_DROP]
+    assert [limiter.admit('token0', 1, 0) for _ in range(2)] == [RATE_PASS, RATE_DROP]     # burst 0 = the rate
+    assert [limiter.admit('tokenN', 1, None) for _ in range(101)].count(RATE_PASS) == 100    # None = limiter's burst
+
+
+def test_lru_eviction_at_max_keys(clock):
+    limiter = RateLimiter(rate=1, burst=1, max_keys=3, clock=clock)
+    for key in ('a', 'b', 'c'):
+        limiter.admit(key)
+    limiter.admit('a')                  # 'a' is now the most recently seen, 'b' the least
+    limiter.admit('d')                  # Evicts 'b'
+    assert len(limiter) == 3 and limiter.stats()['evicted'] == 1
+    assert limiter.admit('a') == RATE_DROP      # Still tracked: its bucket is empty
+    assert limiter.admit('b') == RATE_PASS      # Forgotten: starts with a full bucket
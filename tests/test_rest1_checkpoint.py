@@ -0,0 +1,96 @@
+#Module: test_rest1_checkpoint.py
+# # # sources/rest1_api_collector_module.py incremental collection: a second run delivers nothing, new records
+# # # appended to the last page are picked up from the saved offset, and empty pages never move the cursor.
+# # #--------------------------------------------------------------
+
+import json
+
+import pytest
+
+from bench.stub_servers import start_stub_paged_api
+from sources.rest1_api_collector_module import iter_api_pages, incremental_pages, collect_to_queue
+from utils.checkpoint_module import CheckpointStore
+
+
+class _ListQueue:
+    def __init__(self):
+        self.records = []
+    def put_many(self, records):
+        self.records.extend(records)
+    def flush(self):
+        pass
+
+
+def _run(server, store, max_in_flight):
+    start_page = store.get(server.url).get('cursor', {}).get('page', 1)
+    que = _ListQueue()
+    pages = iter_api_pages(server.url, None, None, max_in_flight, 0, start_page, store)
+    return collect_to_queue(incremental_pages(pages, store, server.url, que=que), que), que.records
+
+
+@pytest.mark.parametrize('max_in_flight', [1, 8])
+def test_incremental_runs_resume_from_the_checkpoint(tmp_path, max_in_flight):
+    server = start_stub_paged_api(pages=3, page_size=50, latency=0)
+    server.total_records = 120
+    path = str(tmp_path / 'rest1.json')
+    try:
+        count, records = _run(server, CheckpointStore(path), max_in_flight)
+        assert count == 120
+        assert records[0] == '{"id":0}' and records[-1] == '{"id":119}'
+        assert CheckpointStore(path).get(server.url)['cursor'] == {'page': 3, 'offset': 20}
+
+        assert _run(server, CheckpointStore(path), max_in_flight)[0] == 0     # Nothing new
+        assert CheckpointStore(path).get(server.url)['cursor'] == {'page': 3, 'offset': 20}
+
+        server.total_records = 130
+        count, records = _run(server, CheckpointStore(path), max_in_flight)
+        assert count == 10
+        assert records == [f'{{"id":{i}}}' for i in range(120, 130)]
+        assert CheckpointStore(path).get(server.url)['cursor'] == {'page': 3, 'offset': 30}
+    finally:
+        server.shutdown()
+
+
+@pytest.mark.parametrize('max_in_flight', [1, 8])
+def test_newest_first_repolls_page_one(tmp_path, max_in_flight):
+    server = start_stub_paged_api(pages=3, page_size=50, latency=0, newest_first=True)
+    server.total_records = 120
+    path = str(tmp_path / 'rest1.json')
+
+    def run():
+        store = CheckpointStore(path)
+        que = _ListQueue()
+        pages = iter_api_pages(server.url, None, None, max_in_flight, 0, 1)
+        collect_to_queue(incremental_pages(pages, store, server.url, que=que, newest_first=True), que)
+        return sorted(json.loads(record)['id'] for record in que.records)
+
+    try:
+        assert run() == list(range(120))
+        assert CheckpointStore(path).get(server.url)['high_water'] == 119
+        assert run() == [119]       # Only the boundary record again (high water is inclusive)
+        server.total_records = 130
+        assert run() == list(range(119, 130))
+        assert CheckpointStore(path).get(server.url)['high_water'] == 129
+    finally:
+        server.shutdown()
+
+
+def test_checkpoint_never_gets_ahead_of_the_queue(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'rest1.json'))
+    flushed = []
+
+    class _FlushingQueue(_ListQueue):
+        def flush(self):
+            flushed.extend(self.records)
+            self.records = []
+
+    def pages():
+        yield 1, [{'id': 1}]
+        yield 2, [{'id': 2}]
+        raise ValueError("non-JSON page")
+
+    que = _FlushingQueue()
+    with pytest.raises(ValueError):
+        collect_to_queue(incremental_pages(pages(), store, 'stream', que=que), que)
+    assert flushed == ['{"id":1}', '{"id":2}']
+    assert CheckpointStore(str(tmp_path / 'rest1.json')).get('stream')['cursor'] == {'page': 2, 'offset': 1}
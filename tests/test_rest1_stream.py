@@ -0,0 +1,39 @@
+#Module: test_rest1_stream.py
+# # # sources/rest1_api_collector_module.py streaming: collecting a large collection through iter_api_pages() ->
+# # # collect_to_queue() holds a few pages at a time, not the dataset (fetch_data_from_api() does the opposite).
+# # #--------------------------------------------------------------
+
+import tracemalloc
+
+import pytest
+
+from bench.stub_servers import start_stub_paged_api
+from sources.rest1_api_collector_module import iter_api_pages, collect_to_queue
+
+PAGES = 100
+PAGE_SIZE = 500
+MAX_GROWTH = 4 * 1024 * 1024  # Peak traced allocations while streaming. The whole collection as dicts is ~11 MB
+
+
+class _CountingQueue:
+    """Counts and forgets, so only the collector's memory is measured"""
+    def __init__(self):
+        self.total = 0
+    def put_many(self, records):
+        self.total += len(records)
+
+
+@pytest.mark.parametrize('max_in_flight', [1, 8])
+def test_streaming_memory_stays_flat(max_in_flight):
+    server = start_stub_paged_api(PAGES, PAGE_SIZE, latency=0)
+    que = _CountingQueue()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        count = collect_to_queue(iter_api_pages(server.url, None, None, max_in_flight), que)
+        growth = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+        server.shutdown()
+    assert count == que.total == PAGES * PAGE_SIZE
+    assert growth < MAX_GROWTH, f"streaming peaked at {growth / 1e6:.1f} MB"
@@ -0,0 +1,56 @@
+#Module: test_rest2_crawl.py
+# # # sources/rest2_hateoas_api_collector_module.py: the crawl fetches every resource of a HAL tree exactly once,
+# # # the "next" chain navigation stops at a link cycle, and the response cache drops stale entries.
+# # #--------------------------------------------------------------
+
+from bench.stub_servers import start_stub_hateoas_tree, start_stub_hateoas_api
+from sources.rest2_hateoas_api_collector_module import crawl_hateoas, navigate_hateoas
+from utils import caching_engine_module
+from utils.caching_engine_module import CacheEngine
+
+
+def test_crawl_fetches_each_resource_once():
+    server = start_stub_hateoas_tree(fanout=4, latency=0)
+    fetched = []
+    try:
+        stats = crawl_hateoas(server.url, None, None, relations=None, max_depth=5, workers=8, per_host=4,
+                              on_resource=lambda url, data: fetched.append(url))
+    finally:
+        server.shutdown()
+    assert stats['fetched'] == 21           # root + 4 collections + 16 items
+    assert stats['failed'] == 0
+    assert stats['duplicates'] == 16        # Every item links back to /c/0
+    assert stats['max_depth'] == 2
+    assert len(fetched) == len(set(fetched)) == server.requests == 21
+
+
+def test_crawl_respects_max_depth():
+    server = start_stub_hateoas_tree(fanout=4, latency=0)
+    try:
+        stats = crawl_hateoas(server.url, None, None, relations=None, max_depth=1, workers=4, per_host=2)
+    finally:
+        server.shutdown()
+    assert stats['fetched'] == 5
+    assert stats['max_depth'] == 1
+
+
+def test_navigation_stops_at_a_link_cycle():
+    server = start_stub_hateoas_api(pages=5, loop=True)
+    try:
+        assert navigate_hateoas(server.url, None, None) == 5
+    finally:
+        server.shutdown()
+    assert server.requests == 5
+
+
+def test_response_cache_drops_stale_entries(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(caching_engine_module.time, 'time', lambda: now[0])
+    cache = CacheEngine(cache_lifetime=60, cache_dir=str(tmp_path), verbose=False)
+    for i in range(100):
+        cache.get_cached_data(f"/items/{i}", lambda: {'id': i}, 0)
+    now[0] += 30
+    assert cache.get_cached_data("/items/0", lambda: {'id': 'refetched'}, 0) == ({'id': 0}, True)
+    now[0] += 61
+    cache.get_cached_data("/items/new", lambda: {'id': 'new'}, 0)
+    assert list(cache.cache) == ["/items/new"]
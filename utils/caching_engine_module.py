@@ -39,17 +39,19 @@ from configs.globals_module import CACHEDIR, HIGH_REQ_THRESHOLD, CACHE_LIFETIME
 # It uses a dictionary to store cached data and a timestamp to determine if the cache is stale.
 class CacheEngine:
     #--------------------------------------------------------------
-    def __init__(self, cache_lifetime=5*60, high_request_threshold=10, cache_dir="cache"):
+    def __init__(self, cache_lifetime=5*60, high_request_threshold=10, cache_dir="cache", verbose=True):
         """
         Initializes the caching engine with a specific cache lifetime, request rate threshold,
-        and cache directory for file-based caching.
+        and cache directory for file-based caching. verbose=False silences the per-lookup messages.
         """
         self.cache = {}                         # In-memory cache,  type of dictionary
         self.cache_lifetime = cache_lifetime  # Cache lifetime in seconds
         self.cache_dir = cache_dir
         self.high_request_threshold = high_request_threshold  # Number of requests per second to trigger file-based cache
         self.last_request_time = time.time()
+        self.last_prune_time = time.time()    # Stale entries are dropped at most once per cache_lifetime. See _update_cache()
         self.request_count = 0
+        self.verbose = verbose
         
         if not os.path.exists(cache_dir):
             os.makedirs(cache_dir)
@@ -72,7 +74,13 @@ class CacheEngine:
     def _update_cache(self, cache_key, data):
         """
         Updates the cache with new data and the current timestamp.
+        Drops stale entries first (once per cache_lifetime), so keys that are never asked for again do not pile up.
         """
+        current_time = time.time()
+        if current_time - self.last_prune_time > self.cache_lifetime:
+            self.last_prune_time = current_time
+            for key in [key for key, entry in self.cache.items() if current_time - entry['timestamp'] > self.cache_lifetime]:
+                del self.cache[key]
         self.cache[cache_key] = {
             'data': data,
             'timestamp': time.time()  # Store current timestamp
@@ -80,6 +88,14 @@ class CacheEngine:
     #End of _update_cache()    
     #--------------------------------------------------------------
     #--------------------------------------------------------------
+    def invalidate(self, cache_key):
+        """
+        Drops cache_key from the in-memory cache (e.g. a failed fetch that must not be served until it expires).
+        """
+        self.cache.pop(cache_key, None)
+    #End of invalidate()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
     def _is_fast_stream(self,mps):
         """
         Determines if the data stream is too fast based on the request rate.
@@ -129,22 +145,27 @@ class CacheEngine:
     
         # Check if data stream is fast, decide caching strategy
         if self._is_fast_stream(mps):
-            print(f"[{mps:.2f}/{self.high_request_threshold}]\033[31mData stream is FAST, switching to file-based cache for:\033[0m [{cache_key}]")
+            if self.verbose:
+                print(f"[{mps:.2f}/{self.high_request_threshold}]\033[31mData stream is FAST, switching to file-based cache for:\033[0m [{cache_key}]")
             cached_data = self._load_from_file(cache_key)
             if cached_data and not self._is_cache_stale(cache_key):
-                print(f"\033[32mReturning cached data from file for:\033[0m [{cache_key}].")
+                if self.verbose:
+                    print(f"\033[32mReturning cached data from file for:\033[0m [{cache_key}].")
                 from_file_cache = True
                 return cached_data, from_file_cache
         else:
-            print(f"[{mps:.2f}/{self.high_request_threshold}]\033[32mData stream is SLOW, using in-memory cache for:\033[0m [{cache_key}].")
+            if self.verbose:
+                print(f"[{mps:.2f}/{self.high_request_threshold}]\033[32mData stream is SLOW, using in-memory cache for:\033[0m [{cache_key}].")
             if self._is_cache_stale(cache_key):
-                print(f"\033[33mCache for {cache_key} is stale. Fetching fresh data directly from the stream...\033[0m")
+                if self.verbose:
+                    print(f"\033[33mCache for {cache_key} is stale. Fetching fresh data directly from the stream...\033[0m")
                 fresh_data = fetch_stream_data_function()  # Call the function to fetch new data
                 self._update_cache(cache_key, fresh_data)  # Update the cache
                 from_file_cache=False
                 return fresh_data, from_file_cache
             else:
-                print(f"Returning cached data for {cache_key}.")
+                if self.verbose:
+                    print(f"Returning cached data for {cache_key}.")
                 from_file_cache=True
                 return self.cache[cache_key]['data'], from_file_cache
 
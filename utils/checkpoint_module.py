@@ -0,0 +1,149 @@
+#Module: checkpoint_module.py
+# # # This module implements the checkpoint store the REST collectors use to poll incrementally.
+# # # Per stream (one collected API, keyed by its URL) it keeps where the last run stopped:
+# # #   cursor      {"page": N, "offset": k}  records of page N already delivered (rest1 ?page=N paging)
+# # #   next_href   link to resume from (rest2 HATEOAS "next" chain)
+# # #   high_water  largest record timestamp delivered; older records are skipped
+# # # Per URL it keeps the validators of the last 200 response (ETag, Last-Modified, plus the page's "next" link) so
+# # # the next request can be conditional (If-None-Match / If-Modified-Since): 304 Not Modified costs no body and
+# # # means "nothing new here". Validators are kept for the CHECKPOINT_MAX_URLS most recent URLs.
+# # # save() writes a temp file, fsyncs and renames it over the old one: a crash leaves the old or the new file.
+# # #--------------------------------------------------------------
+
+import os
+import json
+import threading
+from colorama import Fore, init
+init(autoreset=True)  # Automatically reset color after each print
+
+#-----------------------  Importing my modules & local configs -------------------
+CHECKPOINT_DIR = 'checkpoints'  # One <name>.json per collector
+CHECKPOINT_MAX_URLS = 1000  # URLs whose validators are remembered (oldest forgotten first)
+NOT_MODIFIED = object()  # Returned by the collectors' request helpers on 304
+#-----------------------  Importing my modules & local configs -------------------
+
+#*********************************************************************************
+# CheckpointStore Class
+class CheckpointStore:
+    #--------------------------------------------------------------
+    def __init__(self, path, max_urls=CHECKPOINT_MAX_URLS):
+        self.path = path
+        self.max_urls = max_urls
+        self.lock = threading.Lock()    # Concurrent page fetches record validators from pool threads
+        self.streams = {}               # stream -> {"cursor":..., "next_href":..., "high_water":...}
+        self.validators = {}            # url -> {"etag":..., "last_modified":..., "next":...}. Insertion order = age
+        self.dirty = False
+        self._load()
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+            self.streams = state.get('streams', {})
+            self.validators = state.get('validators', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"{Fore.LIGHTRED_EX}[{__name__}]Could not read checkpoints [{self.path}]: {e}. Starting from scratch")
+    #End of _load()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def get(self, stream):
+        """Checkpoint of stream (a copy; empty dict if there is none)"""
+        with self.lock:
+            return dict(self.streams.get(stream, {}))
+    #--------------------------------------------------------------
+    def update(self, stream, **fields):
+        with self.lock:
+            self.streams.setdefault(stream, {}).update(fields)
+            self.dirty = True
+    #--------------------------------------------------------------
+    def advance_high_water(self, stream, value):
+        """Raise the stream's high-water mark to value (never lowers it)"""
+        if value is None:
+            return
+        with self.lock:
+            checkpoint = self.streams.setdefault(stream, {})
+            current = checkpoint.get('high_water')
+            try:
+                if current is not None and value <= current:
+                    return
+            except TypeError:       # Mixed types (e.g. str vs int): take the newer value
+                pass
+            checkpoint['high_water'] = value
+            self.dirty = True
+    #--------------------------------------------------------------
+    def reset(self, stream):
+        """Forget stream's checkpoint (next run collects everything again)"""
+        with self.lock:
+            self.streams.pop(stream, None)
+            self.dirty = True
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def conditional_headers(self, url, headers=None):
+        """headers plus If-None-Match / If-Modified-Since for url, if its validators are known"""
+        with self.lock:
+            entry = self.validators.get(url)
+        if not entry:
+            return headers
+        conditional = dict(headers or {})
+        if entry.get('etag'):
+            conditional['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            conditional['If-Modified-Since'] = entry['last_modified']
+        return conditional
+    #--------------------------------------------------------------
+    def remember_response(self, url, response, next_href=None):
+        """Keep the validators of a 200 response for url (and the next link it pointed to, for 304 replays)"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        with self.lock:
+            self.validators.pop(url, None)      # Re-insert: most recent last
+            if etag or last_modified:
+                self.validators[url] = {'etag': etag, 'last_modified': last_modified, 'next': next_href}
+                while len(self.validators) > self.max_urls:
+                    del self.validators[next(iter(self.validators))]
+            self.dirty = True
+    #--------------------------------------------------------------
+    def validator(self, url):
+        with self.lock:
+            return dict(self.validators.get(url, {}))
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def save(self):
+        """Write the store atomically if anything changed"""
+        with self.lock:
+            if not self.dirty:
+                return
+            state = json.dumps({'streams': self.streams, 'validators': self.validators})
+            self.dirty = False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(state)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+    #End of save()
+    #--------------------------------------------------------------
+#End of CheckpointStore class()
+#**********************************************************************************
+
+#--------------------------------------------------------------------------
+_stores = {}
+_stores_lock = threading.Lock()
+#--------------------------------------------------------------------------
+def get_checkpoint_store(name):
+    """Return the CheckpointStore of a collector (CHECKPOINT_DIR/<name>.json), loading it on first use"""
+    with _stores_lock:
+        store = _stores.get(name)
+        if store is None:
+            store = CheckpointStore(os.path.join(CHECKPOINT_DIR, f"{name}.json"))
+            _stores[name] = store
+        return store
+#End of function get_checkpoint_store()
+#--------------------------------------------------------------------------
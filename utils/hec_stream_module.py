@@ -0,0 +1,344 @@
+#Module: hec_stream_module.py
+# # # This module implements streaming decoding of HEC request bodies.
+# # # HEC clients batch events as concatenated JSON objects ('{"event":...}{"event":...}' or one per line), not as a
+# # # JSON array, so json.loads() on the whole body fails and would hold the full body in memory anyway.
+# # # HecEventDecoder is fed the body chunk by chunk (UTF-8 decoded incrementally), pulls every complete object out
+# # # with json.JSONDecoder.raw_decode() and keeps only the unfinished tail buffered.
+# # # iter_hec_events() drives it from a file-like body (wsgi.input) and yields events as soon as they are decoded.
+# # # decompress_chunks() sits in between for "Content-Encoding: gzip|deflate" bodies (zlib.decompressobj, bounded
+# # # output per call, limit on the total decompressed size).
+# # # split_raw_events() line-breaks /services/collector/raw bodies into lists of bytes events, one list per chunk.
+# # # limit_hec_events() / limit_raw_batch() apply a RateLimiter (utils/rate_limit_module.py) to either stream.
+# # #--------------------------------------------------------------
+
+import json
+import zlib
+import codecs
+import itertools
+
+from utils.rate_limit_module import tag_event, RATE_PASS, RATE_TAG, RATE_LIMIT_TAG_FIELD
+
+#-----------------------  Importing my modules & local configs -------------------
+HEC_MAX_BODY_SIZE = 100 * 1024 * 1024  # Largest request body accepted (bytes on the wire)
+HEC_READ_CHUNK = 64 * 1024  # Bytes read from the body per read() call
+HEC_MAX_EVENT_SIZE = 10 * 1024 * 1024  # Largest single envelope buffered while waiting for its closing brace
+HEC_MAX_DECOMPRESSED_SIZE = 512 * 1024 * 1024  # Largest body after gzip/deflate decompression (zip bomb guard)
+HEC_QUEUE_BATCH = 500  # Decoded events handed to the ingest queue per put_many()
+HEC_LINE_BREAKER = b'\n'  # /services/collector/raw event delimiter ("\r\n" line ends are handled too)
+HEC_MAX_RAW_EVENT_SIZE = 1024 * 1024  # Raw event longer than this without a line breaker is cut
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+#-----------------------  Importing my modules & local configs -------------------
+
+#*********************************************************************************
+# HecRequestError Class
+# Raised for a request the client must fix. Carries the HTTP status and the HEC error code/text Splunk would send.
+class HecRequestError(Exception):
+    #--------------------------------------------------------------
+    def __init__(self, status, code, text, events=0):
+        super().__init__(text)
+        self.status = status        # e.g. '400 Bad Request'
+        self.code = code            # HEC response code (5 No data, 6 Invalid data format, 12 Event field is required...)
+        self.text = text
+        self.events = events        # Events accepted before the error (already queued)
+    #--------------------------------------------------------------
+    def response(self):
+        """HEC-style error body"""
+        response = {"text": self.text, "code": self.code}
+        if self.events:
+            response["invalid-event-number"] = self.events
+        return response
+    #--------------------------------------------------------------
+#End of HecRequestError class()
+#**********************************************************************************
+
+#*********************************************************************************
+# HecEventDecoder Class
+# feed(chunk) -> list of (envelope dict, envelope bytes) completed by this chunk. close() checks nothing but
+# whitespace is left. A failed raw_decode() of the tail is only retried once the tail has doubled, so one event
+# spread over many chunks is not re-parsed from its start on every chunk.
+class HecEventDecoder:
+    __slots__ = ('_utf8', '_buffer', '_retry_at', 'events', 'max_event_size', 'require_event')
+
+    #--------------------------------------------------------------
+    def __init__(self, max_event_size=HEC_MAX_EVENT_SIZE, require_event=True):
+        self._utf8 = codecs.getincrementaldecoder('utf-8')('strict')
+        self._buffer = ''
+        self._retry_at = 0          # Tail length needed before the next decode attempt
+        self.events = 0             # Envelopes decoded so far
+        self.max_event_size = max_event_size
+        self.require_event = require_event      # False: any JSON object is an event (not only HEC envelopes), arrays of objects too
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def feed(self, chunk, final=False):
+        try:
+            text = self._utf8.decode(chunk, final)
+        except UnicodeDecodeError:
+            raise HecRequestError('400 Bad Request', 6, "Invalid data format", self.events)
+        buffer = self._buffer + text if self._buffer else text
+        if len(buffer) < self._retry_at and not final:
+            self._buffer = buffer
+            return []
+
+        events = []
+        pos = 0
+        end = len(buffer)
+        while True:
+            while pos < end and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos == end:
+                break
+            try:
+                envelope, stop = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise HecRequestError('400 Bad Request', 6, "Invalid data format", self.events)
+                if end - pos > self.max_event_size:
+                    raise HecRequestError('413 Request Entity Too Large', 6, "Event too large", self.events)
+                break       # Incomplete object. Wait for more bytes
+            if isinstance(envelope, list) and not self.require_event:     # JSON array of objects: one event per object
+                if not all(isinstance(item, dict) for item in envelope):
+                    raise HecRequestError('400 Bad Request', 6, "Invalid data format", self.events)
+                events.extend((item, json.dumps(item, separators=(',', ':')).encode('utf-8')) for item in envelope)
+                self.events += len(envelope)
+                pos = stop
+                continue
+            if not isinstance(envelope, dict):
+                raise HecRequestError('400 Bad Request', 6, "Invalid data format", self.events)
+            if self.require_event:
+                if 'event' not in envelope:
+                    raise HecRequestError('400 Bad Request', 12, "Event field is required", self.events)
+                if envelope['event'] in ('', None):
+                    raise HecRequestError('400 Bad Request', 13, "Event field cannot be blank", self.events)
+            events.append((envelope, buffer[pos:stop].encode('utf-8')))
+            self.events += 1
+            pos = stop
+
+        self._buffer = buffer[pos:] if pos < end else ''     # Compact once per chunk
+        self._retry_at = 2 * len(self._buffer)
+        return events
+    #End of feed()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def close(self):
+        """End of body. Returns the last events; raises if an unfinished object is left"""
+        self._retry_at = 0
+        return self.feed(b'', final=True)
+    #End of close()
+    #--------------------------------------------------------------
+#End of HecEventDecoder class()
+#**********************************************************************************
+
+#--------------------------------------------------------------
+def read_body_chunks(stream, content_length=None, max_body_size=HEC_MAX_BODY_SIZE, chunk_size=HEC_READ_CHUNK):
+    """Yield the body of a request in chunks, enforcing max_body_size (raises HecRequestError 413)"""
+    if content_length is not None and content_length > max_body_size:
+        raise HecRequestError('413 Request Entity Too Large', 27, "Content length exceeds the limit")
+    remaining = content_length
+    received = 0
+    while remaining is None or remaining > 0:
+        chunk = stream.read(chunk_size if remaining is None else min(chunk_size, remaining))
+        if not chunk:
+            return
+        received += len(chunk)
+        if received > max_body_size:
+            raise HecRequestError('413 Request Entity Too Large', 27, "Content length exceeds the limit")
+        if remaining is not None:
+            remaining -= len(chunk)
+        yield chunk
+#End of read_body_chunks()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def iter_hec_events(chunks, require_event=True):
+    """
+    Yield (envelope dict, envelope bytes) for every event of a concatenated-JSON HEC body, given its chunks.
+    Raises HecRequestError on an empty body, invalid JSON or (with require_event) an envelope without "event".
+    """
+    decoder = HecEventDecoder(require_event=require_event)
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
+    if not decoder.events:
+        raise HecRequestError('400 Bad Request', 5, "No data")
+#End of iter_hec_events()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _is_zlib_header(head):
+    """True if head starts with a zlib (RFC 1950) header: deflate method and a header checksum divisible by 31"""
+    return len(head) >= 2 and head[0] & 0x0f == 8 and (head[0] << 8 | head[1]) % 31 == 0
+#--------------------------------------------------------------
+def decompress_chunks(chunks, content_encoding, max_size=HEC_MAX_DECOMPRESSED_SIZE, chunk_size=HEC_READ_CHUNK):
+    """
+    Decompress a gzip/deflate body chunk by chunk (identity passes through). Never produces more than chunk_size
+    bytes per step, so a small, highly compressed body cannot expand in one go. "deflate" may be zlib-wrapped
+    (RFC 1950) or raw deflate (RFC 1951), as many clients send; the first two bytes tell which. An empty body
+    decompresses to nothing (the caller reports "No data"). Raises HecRequestError on an unsupported encoding (415),
+    corrupt or truncated data (400) or more than max_size decompressed bytes (413).
+    """
+    encoding = (content_encoding or '').strip().lower()
+    if encoding in ('', 'identity'):
+        yield from chunks
+        return
+    if encoding in ('gzip', 'x-gzip'):
+        wbits = 16 + zlib.MAX_WBITS
+    elif encoding == 'deflate':
+        wbits = zlib.MAX_WBITS
+    else:
+        raise HecRequestError('415 Unsupported Media Type', 6, f"Unsupported Content-Encoding [{encoding}]")
+
+    chunks = iter(chunks)
+    head = b''
+    for chunk in chunks:        # Hold back the first bytes: an empty body, and which deflate flavour
+        head += chunk
+        if len(head) >= 2:
+            break
+    if not head:
+        return
+    if encoding == 'deflate' and not _is_zlib_header(head):
+        wbits = -zlib.MAX_WBITS     # Raw deflate stream, no zlib header/trailer
+    inflater = zlib.decompressobj(wbits)
+    total = 0
+    try:
+        for chunk in itertools.chain((head,), chunks):
+            data = chunk
+            while True:
+                if inflater.eof:
+                    data = inflater.unused_data + data     # Next gzip member (concatenated gzip streams)
+                    if not data:
+                        break
+                    inflater = zlib.decompressobj(wbits)
+                out = inflater.decompress(data, chunk_size)
+                if out:
+                    total += len(out)
+                    if total > max_size:
+                        raise HecRequestError('413 Request Entity Too Large', 27, "Decompressed body exceeds the limit")
+                    yield out
+                data = inflater.unconsumed_tail
+                if inflater.eof and inflater.unused_data:
+                    continue
+                if not data and len(out) < chunk_size:
+                    break       # Input consumed and no output pending
+        tail = inflater.flush()
+        if not inflater.eof:
+            raise HecRequestError('400 Bad Request', 6, "Truncated compressed body")
+    except zlib.error:
+        raise HecRequestError('400 Bad Request', 6, "Invalid compressed data")
+    if tail:
+        if total + len(tail) > max_size:
+            raise HecRequestError('413 Request Entity Too Large', 27, "Decompressed body exceeds the limit")
+        yield tail
+#End of decompress_chunks()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def queue_hec_events(events, que, batch_size=HEC_QUEUE_BATCH, defaults=None):
+    """
+    Push (envelope, raw bytes) pairs to que in batches while they are decoded. Returns the event count.
+    defaults (e.g. the token's index/sourcetype) are filled into envelopes that lack them; only those are re-encoded.
+    """
+    batch = []
+    count = 0
+    try:
+        for envelope, raw in events:
+            if defaults:
+                missing = [key for key in defaults if key not in envelope]
+                if missing:
+                    envelope.update((key, defaults[key]) for key in missing)
+                    raw = json.dumps(envelope, separators=(',', ':')).encode('utf-8')
+            batch.append(raw)
+            if len(batch) >= batch_size:
+                que.put_many(batch)
+                count += len(batch)
+                batch = []
+    finally:
+        if batch:           # Events decoded before an error are accepted, as Splunk does
+            que.put_many(batch)
+            count += len(batch)
+    return count
+#End of queue_hec_events()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def split_raw_events(chunks, line_breaker=HEC_LINE_BREAKER, max_event_size=HEC_MAX_RAW_EVENT_SIZE):
+    """
+    Yield a list of raw events (bytes) per body chunk, split on line_breaker. Empty lines are skipped and a
+    trailing '\r' is removed for '\n' breakers. The unterminated last line is yielded at the end of the body.
+    """
+    strip_cr = line_breaker == b'\n'
+    step = len(line_breaker)
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        events = []
+        pos = 0
+        while True:
+            stop = buffer.find(line_breaker, pos)
+            if stop < 0:
+                if len(buffer) - pos > max_event_size:     # No breaker in sight. Cut rather than buffer forever
+                    events.append(bytes(buffer[pos:pos + max_event_size]))
+                    pos += max_event_size
+                    continue
+                break
+            end = stop - 1 if strip_cr and stop > pos and buffer[stop - 1] == 13 else stop
+            if end > pos:
+                events.append(bytes(buffer[pos:end]))
+            pos = stop + step
+        del buffer[:pos]        # Compact once per chunk
+        if events:
+            yield events
+    tail = bytes(buffer).rstrip(b'\r') if strip_cr else bytes(buffer)
+    if tail.strip():
+        yield [tail]
+#End of split_raw_events()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def parse_line_breaker(value):
+    """
+    Raw event delimiter from a token option or the command line: str with backslash escapes ("\\r\\n", "\\0", "||")
+    or bytes. None/'' = HEC_LINE_BREAKER. Raises ValueError on a delimiter that does not encode to bytes.
+    """
+    if not value:
+        return HEC_LINE_BREAKER
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    try:
+        return codecs.decode(value.encode('ascii', 'backslashreplace'), 'unicode_escape').encode('utf-8')
+    except (UnicodeError, TypeError) as e:
+        raise ValueError(f"Invalid line breaker [{value}]: {e}")
+#End of parse_line_breaker()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def hec_rate_key(token, remote_addr):
+    """Rate limit key and limits of a request: the token's own bucket if it has a rate_limit, else the source IP's"""
+    if token is not None and token.rate_limit:
+        return ('token', token.name), token.rate_limit, token.burst
+    return remote_addr, None, None
+#End of hec_rate_key()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def limit_hec_events(events, limiter, key, rate=None, burst=None):
+    """Pass (envelope, raw bytes) pairs through limiter. Tagged envelopes get fields.osps_rate_limited and are re-encoded"""
+    for envelope, raw in events:
+        verdict = limiter.admit(key, rate, burst)
+        if verdict == RATE_PASS:
+            yield envelope, raw
+        elif verdict == RATE_TAG:
+            fields = envelope.get('fields')
+            if not isinstance(fields, dict):
+                fields = envelope['fields'] = {}
+            fields[RATE_LIMIT_TAG_FIELD] = 'true'
+            yield envelope, json.dumps(envelope, separators=(',', ':')).encode('utf-8')
+#End of limit_hec_events()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def limit_raw_batch(batch, limiter, key, rate=None, burst=None):
+    """Return the events of one split_raw_events() batch that limiter admits (tagged ones marked)"""
+    admitted = []
+    for event in batch:
+        verdict = limiter.admit(key, rate, burst)
+        if verdict == RATE_PASS:
+            admitted.append(event)
+        elif verdict == RATE_TAG:
+            admitted.append(tag_event(event))
+    return admitted
+#End of limit_raw_batch()
+#--------------------------------------------------------------
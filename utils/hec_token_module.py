@@ -0,0 +1,156 @@
+#Module: hec_token_module.py
+# # # This module implements the HEC token registry used by the HEC receivers.
+# # # Tokens are loaded from a JSON file (HEC_TOKENS_FILE) of the form:
+# # #   {"tokens": {"<token>": {"name": "tenant-a", "index": "main", "sourcetype": "_json",
+# # #                           "rate_limit": 1000, "burst": 2000, "line_breaker": "\\r\\n", "disabled": false}}}
+# # # line_breaker (optional) splits /services/collector/raw bodies sent with that token; backslash escapes apply.
+# # # Lookups hash the presented token (sha256) into a dict and confirm the match with hmac.compare_digest(), so
+# # # neither the lookup nor the comparison time depends on how much of a token an attacker guessed right.
+# # # reload() builds a new dict and swaps it in with one assignment: requests in flight keep the entry they
+# # # already looked up, no connection is dropped. watch_sighup() triggers reload() on SIGHUP.
+# # #--------------------------------------------------------------
+
+import json
+import hmac
+import signal
+import hashlib
+import threading
+from colorama import Fore, init
+init(autoreset=True)  # Automatically reset color after each print
+
+#-----------------------  Importing my modules & local configs -------------------
+from configs.globals_module import HEC_TOKENS_FILE
+from utils.hec_stream_module import HecRequestError, parse_line_breaker
+#-----------------------  Importing my modules & local configs -------------------
+
+#*********************************************************************************
+# HecToken Class
+# One registry entry: the token and the routing/limit metadata attached to it.
+class HecToken:
+    __slots__ = ('token', 'name', 'index', 'sourcetype', 'rate_limit', 'burst', 'line_breaker', 'disabled')
+
+    #--------------------------------------------------------------
+    def __init__(self, token, name=None, index=None, sourcetype=None, rate_limit=0, burst=0, line_breaker=None, disabled=False):
+        self.token = token.encode('utf-8')
+        self.name = name or token[:4] + '...'   # Never log the full token
+        self.index = index                      # Default index for events that do not set one
+        self.sourcetype = sourcetype            # Default sourcetype for events that do not set one
+        self.rate_limit = rate_limit            # Events/sec allowed for this token. 0 = the per source IP default
+        self.burst = burst or rate_limit        # Bucket size for rate_limit
+        self.line_breaker = parse_line_breaker(line_breaker) if line_breaker else None   # Raw endpoint delimiter. None = server's
+        self.disabled = disabled
+    #End of __init__()
+    #--------------------------------------------------------------
+    def defaults(self):
+        """Envelope fields to fill in when an event does not carry them"""
+        defaults = {}
+        if self.index:
+            defaults['index'] = self.index
+        if self.sourcetype:
+            defaults['sourcetype'] = self.sourcetype
+        return defaults
+    #--------------------------------------------------------------
+    def __repr__(self):
+        return f"HecToken({self.name}, index={self.index}, sourcetype={self.sourcetype}, rate_limit={self.rate_limit})"
+#End of HecToken class()
+#**********************************************************************************
+
+#*********************************************************************************
+# HecTokenRegistry Class
+class HecTokenRegistry:
+    #--------------------------------------------------------------
+    def __init__(self, path=HEC_TOKENS_FILE):
+        self.path = path
+        self._tokens = {}           # sha256(token) -> HecToken. Replaced as a whole by reload()
+        self.reloads = 0
+        self.lock = threading.Lock()    # Serializes reloads only. Lookups read self._tokens without locking
+        self.reload()
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def reload(self):
+        """(Re)load the token file. On any error the current tokens stay in effect. Returns True on success"""
+        with self.lock:
+            try:
+                with open(self.path, 'r') as f:
+                    entries = json.load(f).get('tokens', {})
+                tokens = {}
+                for token, options in entries.items():
+                    entry = HecToken(token, **options)
+                    tokens[hashlib.sha256(entry.token).digest()] = entry
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                print(f"{Fore.LIGHTRED_EX}[{__name__}]Could not load HEC tokens from [{self.path}]: {e}. Keeping {len(self._tokens)} token(s)")
+                return False
+            self._tokens = tokens       # Atomic swap
+            self.reloads += 1
+            print(f"{Fore.GREEN}[{__name__}]Loaded {len(tokens)} HEC token(s) from [{self.path}]")
+            return True
+    #End of reload()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def lookup(self, token):
+        """Return the HecToken for token (str), or None"""
+        if not token:
+            return None
+        presented = token.encode('utf-8')
+        entry = self._tokens.get(hashlib.sha256(presented).digest())
+        if entry is None or not hmac.compare_digest(entry.token, presented):
+            return None
+        return entry
+    #End of lookup()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def authenticate(self, authorization=None, hec_token=None):
+        """
+        Resolve the request's token from "Authorization: Splunk <token>" or X-Splunk-Hec-Token.
+        Returns the HecToken; raises HecRequestError with Splunk's codes (2 missing, 3 bad header, 4 invalid, 1 disabled).
+        """
+        token = hec_token
+        if authorization:
+            scheme, _, value = authorization.strip().partition(' ')
+            if scheme.lower() != 'splunk' or not value.strip():
+                raise HecRequestError('401 Unauthorized', 3, "Invalid authorization")
+            token = value.strip()
+        if not token:
+            raise HecRequestError('401 Unauthorized', 2, "Token is required")
+        entry = self.lookup(token)
+        if entry is None:
+            raise HecRequestError('403 Forbidden', 4, "Invalid token")
+        if entry.disabled:
+            raise HecRequestError('403 Forbidden', 1, "Token disabled")
+        return entry
+    #End of authenticate()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def watch_sighup(self):
+        """Reload on SIGHUP (kill -HUP <pid>). Must be called from the main thread"""
+        if not hasattr(signal, 'SIGHUP'):
+            return      # Windows
+        previous = signal.getsignal(signal.SIGHUP)
+        def on_sighup(signum, frame):
+            # Reload on a thread: the handler runs between bytecodes of the main thread, which may hold self.lock
+            threading.Thread(target=self.reload, name="hec-token-reload", daemon=True).start()
+            if callable(previous):
+                previous(signum, frame)
+        signal.signal(signal.SIGHUP, on_sighup)
+    #End of watch_sighup()
+    #--------------------------------------------------------------
+    def __len__(self):
+        return len(self._tokens)
+#End of HecTokenRegistry class()
+#**********************************************************************************
+
+#--------------------------------------------------------------------------
+_registries = {}
+_registries_lock = threading.Lock()
+#--------------------------------------------------------------------------
+def get_token_registry(path=HEC_TOKENS_FILE):
+    """Return the HecTokenRegistry for path, loading it on first use"""
+    with _registries_lock:
+        registry = _registries.get(path)
+        if registry is None:
+            registry = HecTokenRegistry(path)
+            _registries[path] = registry
+        return registry
+#End of function get_token_registry()
+#--------------------------------------------------------------------------
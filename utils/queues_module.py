@@ -23,7 +23,12 @@ Asynchronous File Writing: Implement an asynchronous or buffered file writing me
 import time
 import os
 import glob
+import json
 import math
+import struct
+import zlib
+import atexit
+import threading
 from colorama import Fore, Back, Style,  init    # Import colorama for colored terminal output
 # Initialize colorama
 init(autoreset=True)  # Automatically reset color after each print
@@ -36,11 +41,20 @@ RATE_MSGS_PER_SEC_THRESHOLD = 10000 #10000000  # Messages per second before writ
 CACHE_FILE_NAME = "raw_tcp.tmp"  # File name for the cache
 MAX_CACHE_SIZE = 10 * 1024 * 1024  # Maximum size of the cache file in bytes (10MB)
 TIME_WINDOW = 1  # Time window in seconds for rate calculation (1 second)
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024  # DiskQueue segment size before rotation (16MB)
+SEGMENT_SUFFIX = ".seg"  # DiskQueue segment file extension
+CURSOR_FILE_NAME = "cursor.json"  # DiskQueue consumer checkpoint
+RECORD_HEADER = struct.Struct('<II')  # DiskQueue record header: payload length, CRC32
+DURABILITY_MODES = ('none', 'interval', 'batch')  # DiskQueue fsync policies. See DiskQueue class
+DURABILITY_MODE = 'interval'  # Default fsync policy
+FSYNC_INTERVAL_MS = 200  # 'interval': fsync dirty segment every N ms on a background thread
+FSYNC_BATCH_RECORDS = 1000  # 'batch': group-commit (fsync) once at least K records were appended since the last fsync
 from utils.misc_utils_module import print_error_details, DLevel
 #-----------------------  Importing my modules & local configs -------------------
 
 # Global variables to manage incoming events and message rates
 event_cache = []
+_cache_sizes = {}   # cache_dir -> running byte count of the spool. See get_tracked_cache_size()
 #essage_count = 0
 #last_timestamp = time.time()
 
@@ -54,25 +68,32 @@ def print_que_configs(debug_level,  message_count=0, last_timestamp=0, event_cac
     print(f"MESSAGES_NUM_THRESHOLD (Number of messages before writing to disk): {Fore.BLUE+Style.BRIGHT}{MESSAGES_NUM_THRESHOLD} msgs\t\t{Fore.YELLOW}[Current Msgs Count: {message_count}]")
     print(f"RATE_MSGS_PER_SEC_THRESHOLD (Messages per second before writing to disk): {Fore.BLUE+Style.BRIGHT}{RATE_MSGS_PER_SEC_THRESHOLD} messages/sec")
     print(f"MAX CACHE SIZE (Maximum size of the cache file in bytes): {Fore.BLUE}{MAX_CACHE_SIZE / (1024 * 1024)}MB\t\t\t{Fore.YELLOW}[Event Cache Size: {len(event_cache)}]")
-    print(f"Current Cache Size: {Fore.BLUE}{get_cache_size(cache_dir) / (1024 * 1024)} MB")
+    print(f"Current Cache Size: {Fore.BLUE}{get_tracked_cache_size(cache_dir) / (1024 * 1024)} MB")
     
     print(f"{DLevel(debug_level)}{Fore.YELLOW}---------------[{__name__}] Que configurations---------------")
     #print(f"Event Cache Size: {len(event_cache)}")
     return None
 #End of function print_que_configs()
 #-------------------------------------------------------------------------
-# Function to write events to disk (cache file)
+# Function to write events to disk (cache file). Returns the number of bytes written
 def write_cache_to_disk(events,cache_dir, debug_level):
     timestamp = time.strftime("%Y%m%d-%H%M%S")
     #cache_file_path = os.path.join(cache_dir, f"{timestamp}_{CACHE_FILE_NAME}")
     cache_file_path = os.path.join(cache_dir, CACHE_FILE_NAME)
-    with open(cache_file_path, 'a') as f:
+    tracked = get_tracked_cache_size(cache_dir)    # Before the write, or a first scan would count this batch twice
+    written = 0
+    with open(cache_file_path, 'ab') as f:
         for event in events:
             #print (f"EVENTS:[{events}]  TYPE:[{type(event)}]")    #debug
             #f.write(event + '\n')
-            f.write(event.decode('utf-8'))  # Decode bytes to string before writing
+            record = event if isinstance(event, (bytes, bytearray)) else str(event).encode('utf-8')  # Encode str events before writing
+            written += f.write(record)
+            if not record.endswith(b'\n'):    # Framed records carry no terminator
+                written += f.write(b'\n')
+    _cache_sizes[cache_dir] = tracked + written
     if debug_level >= 2:        
         print(f"{DLevel(debug_level)}{Fore.GREEN}[{__name__}]Cache written to: {cache_file_path}")
+    return written
 #End of function write_cache_to_disk()    
 #-------------------------------------------------------------------------
 #-------------------------------------------------------------------------
@@ -84,6 +105,7 @@ def setup_cache_directory(cache_dir,debug_level=0):
     for file in delete_files:
         os.remove(file)
         #print(f"Deleted old cache files: {file}")
+    _cache_sizes.pop(cache_dir, None)   # Spool changed under the counter. Reconcile on next use
     # Ensure the cache directory exists
     if not os.path.exists(cache_dir):
         if debug_level >= 3:
@@ -108,6 +130,16 @@ def get_cache_size(cache_dir):
     return cache_size
 #End of function get_cache_size()
 #-------------------------------------------------------------------------
+#-------------------------------------------------------------------------
+# Running spool size. Reconciled with one get_cache_size() scan on first use, then kept up to date by
+# write_cache_to_disk() (and segment rotation/deletion), so threshold checks are O(1) instead of an os.walk()
+def get_tracked_cache_size(cache_dir):
+    cache_size = _cache_sizes.get(cache_dir)
+    if cache_size is None:
+        cache_size = _cache_sizes[cache_dir] = get_cache_size(cache_dir)
+    return cache_size
+#End of function get_tracked_cache_size()
+#-------------------------------------------------------------------------
 #=====================================================================
 def send_to_que(data, cache_dir, message_count, last_timestamp=0, event_cache=[], debug_level=0):
     
@@ -134,9 +166,9 @@ def send_to_que(data, cache_dir, message_count, last_timestamp=0, event_cache=[]
     #print(message_count)      
 
 
-    cache_dir_size_mb = get_cache_size(cache_dir) / (1024 * 1024)  # Convert to MB
+    cache_size = get_tracked_cache_size(cache_dir)   # O(1) running counter, no directory walk
+    cache_dir_size_mb = cache_size / (1024 * 1024)  # Convert to MB
     MAX_CACHE_SIZE_MB = MAX_CACHE_SIZE / (1024 * 1024)  # Convert to MB
-    cache_size = get_cache_size(cache_dir)
 
     a=(len(event_cache) >= MESSAGES_NUM_THRESHOLD)
     b=(cache_size > MAX_CACHE_SIZE)
@@ -161,6 +193,477 @@ def send_to_que(data, cache_dir, message_count, last_timestamp=0, event_cache=[]
 #End of function send_to_que()            
 #=======================================================================
 
+#*********************************************************************************
+# DiskQueue Class
+# Persistent FIFO built from fixed-size, append-only segment files ("0000000000000000.seg", ...).
+# Record format: 4-byte little-endian payload length + 4-byte CRC32 + payload.
+# Producers append() (a source spilling under load); one consumer read()s at its own pace and commit()s the
+# position once the records are delivered. The committed position is checkpointed to CURSOR_FILE_NAME and
+# segments that are fully behind it are deleted. On open, a torn tail (crash mid-write) is truncated.
+# The consumer may be another process: open the directory with read_only=True there. A read-only instance never
+# touches the tail or opens a write handle, and follows the producer's rotations by looking at the segments on disk.
+# Durability (when appended records reach the disk, not just the page cache):
+#   none     - never fsync. The OS writes back when it likes; a power loss can lose recent records
+#   interval - a background thread fsyncs the active segment every fsync_interval_ms if anything was appended
+#   batch    - group commit: append_many() fsyncs once at least fsync_batch_records records are unsynced
+# Rotated segments and the cursor checkpoint are always fsynced unless durability is 'none'.
+class DiskQueue:
+    #--------------------------------------------------------------
+    def __init__(self, queue_dir, segment_max_bytes=SEGMENT_MAX_BYTES, debug_level=0, durability=DURABILITY_MODE,
+                 fsync_interval_ms=FSYNC_INTERVAL_MS, fsync_batch_records=FSYNC_BATCH_RECORDS, read_only=False):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability [{durability}]. Use one of {DURABILITY_MODES}")
+        self.queue_dir = queue_dir
+        self.segment_max_bytes = segment_max_bytes
+        self.debug_level = debug_level
+        self.durability = durability
+        self.fsync_interval_ms = fsync_interval_ms
+        self.fsync_batch_records = fsync_batch_records
+        self.read_only = read_only  # Consumer in another process than the producer: no tail recovery, no writes
+        self.fsyncs = 0             # fsync() calls issued on segment data
+        self.unsynced = 0           # Records appended since the last fsync
+        self.lock = threading.RLock()
+        os.makedirs(queue_dir, exist_ok=True)
+
+        self.segments = self._list_segments()
+        if not self.segments:
+            self.segments = [0]
+        if not read_only:
+            self._recover_tail(self.segments[-1])   # The producer's in-flight tail is not ours to cut
+        self.size_bytes = sum(os.path.getsize(self._segment_path(seg)) for seg in self.segments
+                              if os.path.exists(self._segment_path(seg)))
+
+        # Writer: one file handle kept open on the active (last) segment
+        self.write_segment = self.segments[-1]
+        self.write_file = None
+        self.write_offset = 0
+        if not read_only:
+            self.write_file = open(self._segment_path(self.write_segment), 'ab')
+            self.write_offset = self.write_file.tell()
+
+        # Consumer: committed (checkpointed) position and the in-memory read position ahead of it
+        self.committed = self._load_cursor()
+        self.read_segment, self.read_offset = self.committed
+        self.read_file = None
+
+        self._closed = threading.Event()
+        self._sync_thread = None
+        if durability == 'interval' and not read_only:
+            self._sync_thread = threading.Thread(target=self._sync_loop, name=f"fsync-{queue_dir}", daemon=True)
+            self._sync_thread.start()
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _segment_path(self, segment):
+        return os.path.join(self.queue_dir, f"{segment:016d}{SEGMENT_SUFFIX}")
+    #--------------------------------------------------------------
+    def _list_segments(self):
+        return sorted(int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.queue_dir)
+                      if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit())
+    #--------------------------------------------------------------
+    def _rescan(self):
+        """Segment list and size from the directory (read-only instance: the producer's appends are not seen here)"""
+        self.segments = self._list_segments() or [self.read_segment]
+        self.size_bytes = sum(os.path.getsize(self._segment_path(seg)) for seg in self.segments
+                              if os.path.exists(self._segment_path(seg)))
+    #--------------------------------------------------------------
+    def refresh_size(self):
+        """Re-read size_bytes from the segment files. A consumer in another process deletes segments behind our back"""
+        with self.lock:
+            self._rescan()
+            return self.size_bytes
+    #--------------------------------------------------------------
+    def _next_segment(self, segment):
+        """First segment on disk after segment, or None. The producer creates it only after segment is complete"""
+        if os.path.exists(self._segment_path(segment + 1)):
+            return segment + 1
+        return next((seg for seg in self._list_segments() if seg > segment), None)
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _recover_tail(self, segment):
+        """Truncate the last segment after its last complete, CRC-valid record"""
+        path = self._segment_path(segment)
+        if not os.path.exists(path):
+            return
+        valid = 0
+        with open(path, 'rb') as f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                length, crc = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                valid += RECORD_HEADER.size + length
+        if valid < os.path.getsize(path):
+            print(f"{Fore.LIGHTRED_EX}[{__name__}]Torn tail in [{path}]. Truncating to {valid} bytes")
+            with open(path, 'r+b') as f:
+                f.truncate(valid)
+    #End of _recover_tail()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _load_cursor(self):
+        first = (self.segments[0], 0)
+        try:
+            with open(os.path.join(self.queue_dir, CURSOR_FILE_NAME), 'r') as f:
+                cursor = json.load(f)
+            position = (int(cursor['segment']), int(cursor['offset']))
+        except (OSError, ValueError, KeyError, TypeError):
+            return first        # No/garbled checkpoint: replay from the oldest segment (at-least-once)
+        if position < first:
+            return first
+        if position[0] == self.segments[-1] and position[1] > os.path.getsize(self._segment_path(position[0])):
+            return (position[0], os.path.getsize(self._segment_path(position[0])))    # Tail was truncated
+        return position
+    #End of _load_cursor()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def append(self, record):
+        """Append one record (bytes or str). Returns the position it starts at (see read_at())"""
+        with self.lock:
+            position = (self.write_segment, self.write_offset)   # Segments rotate right after the record that fills them
+            self.append_many((record,))
+            return position
+    #--------------------------------------------------------------
+    def append_many(self, records):
+        """Append a batch of records with one write() per segment touched"""
+        if self.read_only:
+            raise ValueError(f"DiskQueue [{self.queue_dir}] was opened read-only")
+        with self.lock:
+            pending = bytearray()
+            for record in records:
+                if not isinstance(record, (bytes, bytearray, memoryview)):
+                    record = str(record).encode('utf-8')
+                pending += RECORD_HEADER.pack(len(record), zlib.crc32(record))
+                pending += record
+                self.unsynced += 1
+                if self.write_offset + len(pending) >= self.segment_max_bytes:
+                    self._write(pending)
+                    pending = bytearray()
+                    self._rotate()
+            if pending:
+                self._write(pending)
+            self.write_file.flush()     # Make records visible to the reader
+            if self.durability == 'batch' and self.unsynced >= self.fsync_batch_records:
+                self._fsync()           # One fsync covers every record of this and earlier calls
+    #End of append_many()
+    #--------------------------------------------------------------
+    def _write(self, data):
+        self.write_file.write(data)
+        self.write_offset += len(data)
+        self.size_bytes += len(data)
+    #--------------------------------------------------------------
+    def _rotate(self):
+        """Close the full segment and start the next one"""
+        if self.durability != 'none':
+            self.write_file.flush()
+            self._fsync()
+        self.write_file.close()
+        self.write_segment += 1
+        self.segments.append(self.write_segment)
+        self.write_file = open(self._segment_path(self.write_segment), 'ab')
+        self.write_offset = 0
+        if self.durability != 'none':
+            self._fsync_dir()       # Make the new segment's directory entry durable
+        if self.debug_level >= 2:
+            print(f"{DLevel(self.debug_level)}{Fore.GREEN}[{__name__}]Rotated to segment: {self._segment_path(self.write_segment)}")
+    #End of _rotate()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _fsync(self):
+        """fsync the active segment. Caller holds the lock and has flushed the file object"""
+        os.fsync(self.write_file.fileno())
+        self.fsyncs += 1
+        self.unsynced = 0
+    #--------------------------------------------------------------
+    def _fsync_dir(self):
+        try:
+            fd = os.open(self.queue_dir, os.O_RDONLY)
+        except OSError:
+            return      # Not supported on this platform (e.g. Windows)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    #--------------------------------------------------------------
+    def sync(self):
+        """Force everything appended so far to disk (any durability mode)"""
+        if self.read_only:
+            return
+        with self.lock:
+            self.write_file.flush()
+            self._fsync()
+    #End of sync()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _sync_loop(self):
+        """'interval' mode: background group commit. Appenders never wait for the disk"""
+        while not self._closed.wait(self.fsync_interval_ms / 1000.0):
+            with self.lock:
+                if not self.unsynced or self.write_file.closed:
+                    continue
+                fd = os.dup(self.write_file.fileno())   # Our own fd: a rotation may close (and the OS reuse) the original
+                self.unsynced = 0
+            try:
+                os.fsync(fd)    # Outside the lock, appenders keep going. A rotation meanwhile fsyncs the old segment itself
+                with self.lock:
+                    self.fsyncs += 1
+            except OSError as e:
+                print(f"{Fore.LIGHTRED_EX}[{__name__}]fsync failed on [{self.queue_dir}]: {e}")
+            finally:
+                os.close(fd)
+    #End of _sync_loop()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def read(self, max_records=1000):
+        """
+        Return (records, position): up to max_records payloads after the read position, and the position just past them.
+        The read position advances; pass position to commit() once the records are safely delivered.
+        """
+        with self.lock:
+            records = []
+            while len(records) < max_records:
+                if self.read_file is None:
+                    if not os.path.exists(self._segment_path(self.read_segment)):
+                        break
+                    self.read_file = open(self._segment_path(self.read_segment), 'rb')
+                self.read_file.seek(self.read_offset)
+                header = self.read_file.read(RECORD_HEADER.size)
+                if len(header) == RECORD_HEADER.size:
+                    length, crc = RECORD_HEADER.unpack(header)
+                    payload = self.read_file.read(length)
+                    if len(payload) == length and zlib.crc32(payload) == crc:
+                        records.append(payload)
+                        self.read_offset += RECORD_HEADER.size + length
+                        continue
+                    if len(payload) == length and self.debug_level >= 1:
+                        print(f"{Fore.LIGHTRED_EX}[{__name__}]CRC mismatch at [{self._segment_path(self.read_segment)}:{self.read_offset}]. Treating as end of segment")
+                # End of this segment (or a damaged record). Move on only if the writer already moved past it (it may be another process)
+                next_segment = self._next_segment(self.read_segment)
+                if next_segment is None:
+                    break
+                self.read_file.close()
+                self.read_file = None
+                self.read_segment = next_segment
+                self.read_offset = 0
+            return records, (self.read_segment, self.read_offset)
+    #End of read()
+    #--------------------------------------------------------------
+    def read_at(self, position):
+        """Payload of the record starting at position (as returned by append()), or None if it is gone or damaged"""
+        try:
+            with open(self._segment_path(position[0]), 'rb') as f:
+                f.seek(position[1])
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return None
+                length, crc = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+        except OSError:
+            return None
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        return payload
+    #End of read_at()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def commit(self, position):
+        """Checkpoint position as consumed and delete every segment that lies fully before it"""
+        with self.lock:
+            if position <= self.committed:
+                return
+            cursor_path = os.path.join(self.queue_dir, CURSOR_FILE_NAME)
+            with open(cursor_path + '.tmp', 'w') as f:
+                json.dump({'segment': position[0], 'offset': position[1]}, f)
+                if self.durability != 'none':
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(cursor_path + '.tmp', cursor_path)   # Atomic: a crash leaves the old or the new cursor
+            self.committed = position
+
+            if self.read_only:      # The producer rotated since we opened: pick up its segments
+                self._rescan()
+            while self.segments and self.segments[0] < position[0]:
+                path = self._segment_path(self.segments.pop(0))
+                try:
+                    self.size_bytes -= os.path.getsize(path)
+                    os.remove(path)
+                except OSError as e:
+                    print(f"{Fore.LIGHTRED_EX}[{__name__}]Could not delete consumed segment [{path}]: {e}")
+    #End of commit()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def rewind(self):
+        """Move the read position back to the last commit (redeliver uncommitted records)"""
+        with self.lock:
+            if self.read_file is not None:
+                self.read_file.close()
+                self.read_file = None
+            self.read_segment, self.read_offset = self.committed
+    #End of rewind()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def backlog_bytes(self):
+        """Approximate bytes appended but not yet committed"""
+        with self.lock:
+            if self.read_only:      # Appends happen in another process: look at the disk
+                self._rescan()
+            committed_segment, committed_offset = self.committed
+            if committed_segment not in self.segments:
+                return self.size_bytes
+            return self.size_bytes - committed_offset - sum(
+                os.path.getsize(self._segment_path(seg)) for seg in self.segments if seg < committed_segment)
+    #End of backlog_bytes()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def close(self):
+        self._closed.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join()
+        with self.lock:
+            if self.write_file is not None and not self.write_file.closed:
+                if self.durability != 'none' and self.unsynced:
+                    self.write_file.flush()
+                    self._fsync()
+                self.write_file.close()
+            if self.read_file is not None:
+                self.read_file.close()
+                self.read_file = None
+    #End of close()
+    #--------------------------------------------------------------
+#End of DiskQueue class()
+#**********************************************************************************
+
+#*********************************************************************************
+# IngestQueue Class
+# Long-lived queue owned by a listener. It replaces the per-message pattern of calling setup_cache_directory()
+# and starting over with a fresh event_cache/message_count for every datagram: the cache directory is set up once,
+# the in-memory batch really accumulates and the rate window is tracked across calls. put() is the hot path.
+# Batches spill into a DiskQueue in cache_dir, which a destination can drain (read()/commit()) at its own pace.
+class IngestQueue:
+    #--------------------------------------------------------------
+    def __init__(self, cache_dir, debug_level=0, messages_threshold=MESSAGES_NUM_THRESHOLD,
+                 rate_threshold=RATE_MSGS_PER_SEC_THRESHOLD, max_cache_size=MAX_CACHE_SIZE, time_window=TIME_WINDOW,
+                 durability=DURABILITY_MODE):
+        self.cache_dir = cache_dir
+        self.debug_level = debug_level
+        self.messages_threshold = messages_threshold
+        self.rate_threshold = rate_threshold
+        self.max_cache_size = max_cache_size
+        self.time_window = time_window
+
+        self.event_cache = []               # In-memory batch
+        self.window_start = time.time()     # Rate window
+        self.window_count = 0
+        self.rate = 0.0                     # Msgs/sec measured over the last complete window
+        self.total = 0                      # Messages put() since start
+        self.flushes = 0                    # Batches written to disk
+        self.size_checked = 0.0             # Last time cache_bytes was re-read from disk. See _check_thresholds()
+        self.lock = threading.Lock()        # Listener threads (UDP/TCP/HEC handlers) may share one queue
+
+        setup_cache_directory(cache_dir, debug_level)   # Once per listener, not once per message
+        self.disk = DiskQueue(cache_dir, debug_level=debug_level, durability=durability)   # Survives restarts. Replays what was not consumed
+        self.cache_bytes = self.disk.size_bytes     # Single reconciling scan at startup
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def put(self, data):
+        """Queue one event (bytes or str). Spills the batch to disk on count, rate or size threshold"""
+        with self.lock:
+            self.event_cache.append(data)
+            self.total += 1
+            self.window_count += 1
+            self._check_thresholds()
+    #End of put()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def put_many(self, records):
+        """Queue a batch of events with one lock acquisition"""
+        with self.lock:
+            self.event_cache.extend(records)
+            self.total += len(records)
+            self.window_count += len(records)
+            self._check_thresholds()
+    #End of put_many()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _check_thresholds(self):
+        now = time.time()
+        elapsed = now - self.window_start
+        if elapsed >= self.time_window:
+            self.rate = self.window_count / elapsed
+            self.window_start = now
+            self.window_count = 0
+            if self.rate >= self.rate_threshold:
+                if self.debug_level >= 1:
+                    print(f"{DLevel(self.debug_level)}{Fore.CYAN+Style.BRIGHT}[{__name__}]> Msg/sec Rate threshold [{self.rate:.0f}/{self.rate_threshold}] exceeded, writing cache to disk...")
+                self._flush()
+                return
+
+        if self.cache_bytes > self.max_cache_size and now - self.size_checked >= self.time_window:
+            self.size_checked = now     # Only our own commits shrink cache_bytes: pick up what other consumers deleted
+            self.cache_bytes = self.disk.refresh_size()
+        if len(self.event_cache) >= self.messages_threshold or self.cache_bytes > self.max_cache_size:
+            if self.debug_level >= 1:
+                print(f"{DLevel(self.debug_level)}{Fore.BLUE+Style.NORMAL}[{__name__}> Max num msgs threshold {Fore.YELLOW}[{len(self.event_cache)}/{self.messages_threshold}] {Fore.BLUE+Style.NORMAL}or cache size exceeded, writing to cache disk...{Fore.RESET}")
+            self._flush()
+    #End of _check_thresholds()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _flush(self):
+        if self.event_cache:
+            self.disk.append_many(self.event_cache)
+            self.cache_bytes = self.disk.size_bytes
+            if self.debug_level >= 2:
+                print(f"{DLevel(self.debug_level)}{Fore.GREEN}[{__name__}]Spilled {len(self.event_cache)} events to: {self.cache_dir}")
+            self.event_cache.clear()  # Clear the cache after writing to disk
+            self.flushes += 1
+    #End of _flush()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def flush(self):
+        """Write whatever is batched in memory to disk (shutdown)"""
+        with self.lock:
+            self._flush()
+    #End of flush()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def stats(self):
+        return {'total': self.total, 'pending': len(self.event_cache), 'flushes': self.flushes, 'rate': self.rate,
+                'cache_bytes': self.cache_bytes, 'fsyncs': self.disk.fsyncs}
+    #End of stats()
+    #--------------------------------------------------------------
+#End of IngestQueue class()
+#**********************************************************************************
+
+#--------------------------------------------------------------------------
+# One IngestQueue per cache directory, shared by all listeners that spool there (e.g. syslog UDP + TCP threads)
+_ingest_queues = {}
+_ingest_queues_lock = threading.Lock()
+#--------------------------------------------------------------------------
+def get_ingest_queue(cache_dir, debug_level=0):
+    """Return the IngestQueue for cache_dir, creating it on first use"""
+    with _ingest_queues_lock:
+        que = _ingest_queues.get(cache_dir)
+        if que is None:
+            que = IngestQueue(cache_dir, debug_level)
+            _ingest_queues[cache_dir] = que
+        return que
+#End of function get_ingest_queue()
+#--------------------------------------------------------------------------
+#--------------------------------------------------------------------------
+@atexit.register
+def flush_ingest_queues():
+    """Spill every queue's in-memory batch on exit (Ctrl+C goes through sys.exit())"""
+    for que in list(_ingest_queues.values()):
+        try:
+            que.flush()
+        except Exception as e:
+            print(f"[{__name__}]Could not flush queue [{que.cache_dir}]: {e}")
+#End of function flush_ingest_queues()
+#--------------------------------------------------------------------------
+
 
 #if __name__ == "__main__":
 #    start()
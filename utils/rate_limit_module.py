@@ -0,0 +1,165 @@
+#Module: rate_limit_module.py
+# # # This module implements per-source rate limiting and load shedding for the receivers.
+# # # RateLimiter keeps one token bucket per key (source IP, HEC token...) in an LRU of at most max_keys buckets,
+# # # so memory stays flat no matter how many distinct senders show up: the least recently seen bucket is evicted.
+# # # A bucket refills at `rate` events/sec up to `burst`; an event that finds it empty is over the limit and the
+# # # policy decides what happens to it:
+# # #   drop    discard it (shed)
+# # #   sample  keep 1 of every sample_every over-limit events of that key, discard the rest
+# # #   tag     keep it, marked with RATE_LIMIT_TAG so it can be filtered/routed downstream
+# # # admit() returns RATE_PASS, RATE_TAG or RATE_DROP. Counters (passed, shed, sampled, tagged, evicted) are in .counters.
+# # # rate 0 disables limiting (admit() returns RATE_PASS without touching a bucket).
+# # #--------------------------------------------------------------
+
+import time
+import threading
+from collections import OrderedDict
+
+#-----------------------  Importing my modules & local configs -------------------
+RATE_LIMIT_POLICIES = ('drop', 'sample', 'tag')
+RATE_LIMIT_EPS = 0  # Events/sec allowed per source. 0 = no limit
+RATE_LIMIT_BURST = 0  # Bucket size (events a quiet source may send at once). 0 = same as the rate
+RATE_LIMIT_POLICY = 'drop'  # What happens to events over the limit (see RATE_LIMIT_POLICIES)
+RATE_LIMIT_SAMPLE = 100  # sample policy: keep 1 of every N over-limit events per source
+RATE_LIMIT_MAX_KEYS = 100000  # Buckets kept (LRU). ~150 bytes each
+RATE_LIMIT_TAG = 'osps_rate_limited=true'  # Appended to text events by the tag policy
+RATE_LIMIT_TAG_FIELD = 'osps_rate_limited'  # HEC indexed field set by the tag policy
+RATE_PASS = 0
+RATE_TAG = 1
+RATE_DROP = 2
+#-----------------------  Importing my modules & local configs -------------------
+
+#*********************************************************************************
+# _Bucket Class
+class _Bucket:
+    __slots__ = ('tokens', 'stamp', 'over')
+
+    def __init__(self, tokens, stamp):
+        self.tokens = tokens        # Events the source may still send right now
+        self.stamp = stamp          # Last refill (monotonic seconds)
+        self.over = 0               # Over-limit events seen (drives the sample policy)
+#End of _Bucket class()
+#**********************************************************************************
+
+#*********************************************************************************
+# RateLimiter Class
+class RateLimiter:
+    #--------------------------------------------------------------
+    def __init__(self, rate=RATE_LIMIT_EPS, burst=RATE_LIMIT_BURST, policy=RATE_LIMIT_POLICY,
+                 sample_every=RATE_LIMIT_SAMPLE, max_keys=RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        if policy not in RATE_LIMIT_POLICIES:
+            raise ValueError(f"Unknown rate limit policy [{policy}]. Use one of {RATE_LIMIT_POLICIES}")
+        self.rate = rate
+        self.burst = burst
+        self.policy = policy
+        self.sample_every = max(1, sample_every)
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()   # key -> _Bucket, least recently seen first
+        self.lock = threading.Lock()    # UDP and TCP listener threads of a process share a limiter
+        self.counters = {'passed': 0, 'shed': 0, 'sampled': 0, 'tagged': 0, 'evicted': 0}
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def admit(self, key, rate=None, burst=None):
+        """
+        Account one event from key. rate/burst override the limiter's (e.g. a HEC token's own limit).
+        Returns RATE_PASS (keep), RATE_TAG (keep, mark as over the limit) or RATE_DROP (shed).
+        """
+        if rate is None or rate <= 0:
+            rate = self.rate
+            burst = self.burst
+        if rate <= 0:
+            return RATE_PASS
+        if burst is None:
+            burst = self.burst
+        burst = burst or rate       # 0 = same as the rate
+        now = self.clock()
+        counters = self.counters
+        with self.lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(burst, now)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)      # Forget the source we heard from least recently
+                    counters['evicted'] += 1
+            else:
+                self._buckets.move_to_end(key)
+                tokens = bucket.tokens + (now - bucket.stamp) * rate
+                bucket.tokens = tokens if tokens < burst else burst
+                bucket.stamp = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                counters['passed'] += 1
+                return RATE_PASS
+
+            bucket.over += 1
+            if self.policy == 'tag':
+                counters['tagged'] += 1
+                return RATE_TAG
+            if self.policy == 'sample' and bucket.over % self.sample_every == 1 % self.sample_every:
+                counters['sampled'] += 1
+                return RATE_PASS
+            counters['shed'] += 1
+            return RATE_DROP
+    #End of admit()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def stats(self):
+        """Counters plus the number of buckets in use"""
+        with self.lock:
+            return dict(self.counters, keys=len(self._buckets))
+    #--------------------------------------------------------------
+    def __len__(self):
+        return len(self._buckets)
+#End of RateLimiter class()
+#**********************************************************************************
+
+#--------------------------------------------------------------
+def tag_event(data):
+    """Mark a text event (str or bytes) as over the rate limit (tag policy)"""
+    if isinstance(data, str):
+        return f"{data} {RATE_LIMIT_TAG}"
+    return bytes(data) + b' ' + RATE_LIMIT_TAG.encode('ascii')
+#End of tag_event()
+#--------------------------------------------------------------
+
+#--------------------------------------------------------------------------
+# Limiter settings for every receiver in this process. osps.py sets them from the command line before the
+# listeners start. Worker processes get them as an argument (rate_limit_settings()) and call configure_rate_limits()
+# themselves: under the spawn start method (macOS, Windows) a child starts from fresh module globals.
+_settings = {'rate': RATE_LIMIT_EPS, 'burst': RATE_LIMIT_BURST, 'policy': RATE_LIMIT_POLICY,
+             'sample_every': RATE_LIMIT_SAMPLE, 'max_keys': RATE_LIMIT_MAX_KEYS}
+_limiters = {}
+_limiters_lock = threading.Lock()
+#--------------------------------------------------------------------------
+def configure_rate_limits(rate=None, burst=None, policy=None, sample_every=None, max_keys=None):
+    """Set the defaults of limiters created from now on by get_rate_limiter()"""
+    if policy is not None and policy not in RATE_LIMIT_POLICIES:
+        raise ValueError(f"Unknown rate limit policy [{policy}]. Use one of {RATE_LIMIT_POLICIES}")
+    for name, value in (('rate', rate), ('burst', burst), ('policy', policy), ('sample_every', sample_every), ('max_keys', max_keys)):
+        if value is not None:
+            _settings[name] = value
+#End of function configure_rate_limits()
+#--------------------------------------------------------------------------
+def rate_limit_settings():
+    """Current defaults, as keyword arguments for configure_rate_limits() in a worker process"""
+    return dict(_settings)
+#End of function rate_limit_settings()
+#--------------------------------------------------------------------------
+def get_rate_limiter(name):
+    """Return the RateLimiter for a receiver (e.g. 'syslog', 'hec2'), creating it on first use"""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = RateLimiter(**_settings)
+            _limiters[name] = limiter
+        return limiter
+#End of function get_rate_limiter()
+#--------------------------------------------------------------------------
+def reset_rate_limiters():
+    """Drop all limiters (a forked worker must not count on top of its parent's buckets and counters)"""
+    with _limiters_lock:
+        _limiters.clear()
+#End of function reset_rate_limiters()
+#--------------------------------------------------------------------------
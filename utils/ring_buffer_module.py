@@ -0,0 +1,176 @@
+#Module: ring_buffer_module.py
+# # # This module implements a fixed-capacity, mmap-backed ring buffer of length-prefixed byte records.
+# # # It is a single-writer / single-reader hand-off between processes (e.g. a UDP/TCP listener and a separate
+# # # parser or sender process) that needs no pickling: the writer copies bytes into shared memory once and the
+# # # reader gets a zero-copy memoryview of them. put() returns False when the ring is full and fill_level()
+# # # reports how full it is, so producers can apply backpressure (drop, spill to DiskQueue, slow down).
+# # #
+# # # Layout (all integers little-endian):
+# # #   [0:8]     magic b'OSPSRING'
+# # #   [8:16]    capacity (bytes of data area, multiple of 4)
+# # #   [64:72]   write position  (only the writer stores it)    - own cache line
+# # #   [128:136] read position   (only the reader stores it)    - own cache line
+# # #   [192:...] data area. Record = 4-byte length + payload, padded to 4 bytes. A length of WRAP_MARKER
+# # #             means "skip to the start of the data area". Positions grow forever; index = position % capacity.
+# # # The writer stores the payload before it publishes the new write position, and the reader releases space only
+# # # after it is done with the view. Single aligned 8-byte stores are not torn on x86-64/arm64.
+# # #--------------------------------------------------------------
+
+import mmap
+import os
+import struct
+import time
+
+#-----------------------  Importing my modules & local configs -------------------
+RING_MAGIC = b'OSPSRING'
+RING_HEADER_SIZE = 192
+RING_WRITE_POS_OFFSET = 64
+RING_READ_POS_OFFSET = 128
+RING_DEFAULT_CAPACITY = 64 * 1024 * 1024  # 64MB data area
+WRAP_MARKER = 0xFFFFFFFF
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+#-----------------------  Importing my modules & local configs -------------------
+
+#*********************************************************************************
+# RingBuffer Class
+# RingBuffer(capacity=...)              anonymous shared mapping (share with children created by fork())
+# RingBuffer(capacity=..., path=p)      file-backed mapping (use /dev/shm/... on Linux) another process can attach()
+# RingBuffer.attach(p)                  open an existing file-backed ring
+class RingBuffer:
+    #--------------------------------------------------------------
+    def __init__(self, capacity=RING_DEFAULT_CAPACITY, path=None, _attach=False):
+        self.path = path
+        if _attach:
+            with open(path, 'r+b') as f:
+                self.mm = mmap.mmap(f.fileno(), 0)
+            if self.mm[0:8] != RING_MAGIC:
+                self.mm.close()
+                raise ValueError(f"[{path}] is not a ring buffer")
+            self.capacity = _U64.unpack_from(self.mm, 8)[0]
+            return
+
+        if capacity <= 0 or capacity % 4:
+            raise ValueError("Ring capacity must be a positive multiple of 4")
+        self.capacity = capacity
+        size = RING_HEADER_SIZE + capacity
+        if path is None:
+            self.mm = mmap.mmap(-1, size)       # MAP_SHARED anonymous: inherited by fork()ed children
+        else:
+            with open(path, 'w+b') as f:
+                f.truncate(size)
+                self.mm = mmap.mmap(f.fileno(), size)
+        self.mm[0:8] = RING_MAGIC
+        _U64.pack_into(self.mm, 8, capacity)
+        _U64.pack_into(self.mm, RING_WRITE_POS_OFFSET, 0)
+        _U64.pack_into(self.mm, RING_READ_POS_OFFSET, 0)
+    #End of __init__()
+    #--------------------------------------------------------------
+    @classmethod
+    def attach(cls, path):
+        return cls(path=path, _attach=True)
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _write_pos(self):
+        return _U64.unpack_from(self.mm, RING_WRITE_POS_OFFSET)[0]
+    def _read_pos(self):
+        return _U64.unpack_from(self.mm, RING_READ_POS_OFFSET)[0]
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def put(self, data):
+        """Writer side. Copy one record into the ring. Returns False (and writes nothing) when it does not fit"""
+        length = len(data)
+        need = (4 + length + 3) & ~3            # Header + payload, 4-byte aligned
+        if need > self.capacity:
+            raise ValueError(f"Record of {length} bytes can never fit a ring of {self.capacity} bytes")
+        write = self._write_pos()
+        free = self.capacity - (write - self._read_pos())
+        index = write % self.capacity
+        contiguous = self.capacity - index
+        skip = contiguous if need > contiguous else 0       # Record does not fit before the end: wrap
+        if skip + need > free:
+            return False
+
+        mm = self.mm
+        if skip:
+            _U32.pack_into(mm, RING_HEADER_SIZE + index, WRAP_MARKER)
+            index = 0
+        start = RING_HEADER_SIZE + index
+        mm[start + 4:start + 4 + length] = data
+        _U32.pack_into(mm, start, length)
+        _U64.pack_into(mm, RING_WRITE_POS_OFFSET, write + skip + need)     # Publish last
+        return True
+    #End of put()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def put_wait(self, data, timeout=None, poll_interval=0.0005):
+        """put() that waits for the reader to free space. Returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.put(data):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+        return True
+    #End of put_wait()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def peek(self):
+        """
+        Reader side. Return a zero-copy memoryview of the oldest record, or None if the ring is empty.
+        The view stays valid until release() is called; release the view itself before closing the ring.
+        """
+        read = self._read_pos()
+        if read == self._write_pos():
+            return None
+        index = read % self.capacity
+        length = _U32.unpack_from(self.mm, RING_HEADER_SIZE + index)[0]
+        if length == WRAP_MARKER:
+            read += self.capacity - index       # Skip the unused tail, record starts at the beginning
+            _U64.pack_into(self.mm, RING_READ_POS_OFFSET, read)
+            index = 0
+            length = _U32.unpack_from(self.mm, RING_HEADER_SIZE)[0]
+        start = RING_HEADER_SIZE + index + 4
+        return memoryview(self.mm)[start:start + length]
+    #End of peek()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def release(self):
+        """Reader side. Free the record returned by the last peek()"""
+        read = self._read_pos()
+        length = _U32.unpack_from(self.mm, RING_HEADER_SIZE + read % self.capacity)[0]
+        _U64.pack_into(self.mm, RING_READ_POS_OFFSET, read + ((4 + length + 3) & ~3))
+    #End of release()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def get(self):
+        """Reader side. Return a copy of the oldest record as bytes (or None) and free it"""
+        view = self.peek()
+        if view is None:
+            return None
+        data = bytes(view)
+        view.release()
+        self.release()
+        return data
+    #End of get()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def fill_level(self):
+        """Fraction of the data area in use (0.0 - 1.0). Drive backpressure from this"""
+        return (self._write_pos() - self._read_pos()) / self.capacity
+    #--------------------------------------------------------------
+    def __len__(self):
+        """Bytes in use (including headers and padding)"""
+        return self._write_pos() - self._read_pos()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def close(self, unlink=False):
+        self.mm.close()
+        if unlink and self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+    #End of close()
+    #--------------------------------------------------------------
+#End of RingBuffer class()
+#**********************************************************************************
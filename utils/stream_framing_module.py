@@ -0,0 +1,116 @@
+#Module: stream_framing_module.py
+# # # This module implements RFC 6587 style record framing for TCP streams (syslog over TCP, raw TCP).
+# # # TCP does not preserve message boundaries: one recv() can hold half a record or ten records.
+# # # StreamFramer keeps one growing bytearray per connection and a read cursor into it. feed() appends the
+# # # new chunk, scans complete records with find() through a memoryview (no copy of the buffer per record),
+# # # returns them as one batch and compacts the consumed prefix once per call.
+# # # Supported framings:
+# # #   octet - octet counting "MSG-LEN SP MSG"   (RFC 6587 3.4.1, e.g. "123 <34>1 ...")
+# # #   lf    - newline delimited                 (RFC 6587 3.4.2 non-transparent framing)
+# # #   nul   - NUL delimited                     (some legacy forwarders)
+# # #   auto  - per record: digit => octet counting, anything else => newline
+# # #--------------------------------------------------------------
+
+#-----------------------  Importing my modules & local configs -------------------
+FRAMING_MODES = ('auto', 'octet', 'lf', 'nul')
+DEFAULT_MAX_RECORD = 64 * 1024  # Longest record we buffer waiting for a terminator/declared length
+MAX_LENGTH_DIGITS = 10  # Longest MSG-LEN header accepted for octet counting
+#-----------------------  Importing my modules & local configs -------------------
+
+#*********************************************************************************
+# StreamFramer Class
+# One instance per connection. feed(chunk) -> list of complete records (bytes, terminator removed).
+# flush() -> the unterminated tail (call it when the peer closes).
+class StreamFramer:
+    __slots__ = ('framing', 'max_record', '_buffer', 'records', 'oversized')
+
+    #--------------------------------------------------------------
+    def __init__(self, framing='auto', max_record=DEFAULT_MAX_RECORD):
+        if framing not in FRAMING_MODES:
+            raise ValueError(f"Unknown framing [{framing}]. Use one of {FRAMING_MODES}")
+        self.framing = framing
+        self.max_record = max_record
+        self._buffer = bytearray()
+        self.records = 0        # Records framed so far
+        self.oversized = 0      # Records force-cut at max_record
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def __len__(self):
+        """Number of buffered bytes not yet returned as a record"""
+        return len(self._buffer)
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def feed(self, chunk):
+        """Append chunk and return every complete record now available, in order"""
+        buffer = self._buffer
+        buffer += chunk
+        records = []
+        pos = 0
+        end = len(buffer)
+        framing = self.framing
+        with memoryview(buffer) as view:    # Released before the compaction below resizes the buffer
+            while pos < end:
+                if framing == 'octet' or (framing == 'auto' and 48 <= buffer[pos] <= 57):
+                    next_pos = self._octet_record(buffer, view, pos, end, records)
+                else:
+                    next_pos = self._delimited_record(buffer, view, pos, end, records,
+                                                      b'\0' if framing == 'nul' else b'\n')
+                if next_pos < 0:
+                    break       # Incomplete record. Wait for more bytes
+                pos = next_pos
+        if pos:
+            del buffer[:pos]    # Compact once per feed(), not once per record
+        self.records += len(records)
+        return records
+    #End of feed()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _delimited_record(self, buffer, view, pos, end, records, terminator):
+        stop = buffer.find(terminator, pos)
+        if stop < 0:
+            if end - pos <= self.max_record:
+                return -1
+            stop = pos + self.max_record    # Sender never terminates. Cut rather than buffer forever
+            records.append(bytes(view[pos:stop]))
+            self.oversized += 1
+            return stop
+        if stop > pos:      # Skip empty records (e.g. "\r\n\n" keep-alives)
+            records.append(bytes(view[pos:stop]))
+        return stop + 1
+    #End of _delimited_record()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def _octet_record(self, buffer, view, pos, end, records):
+        space = buffer.find(b' ', pos, pos + MAX_LENGTH_DIGITS + 1)
+        if space < 0:
+            if end - pos <= MAX_LENGTH_DIGITS:
+                return -1       # Header not complete yet
+            return self._delimited_record(buffer, view, pos, end, records, b'\n')   # Not octet counted after all
+        header = view[pos:space]
+        if not bytes(header).isdigit():
+            return self._delimited_record(buffer, view, pos, end, records, b'\n')
+        length = int(header)
+        if length > self.max_record:
+            return self._delimited_record(buffer, view, pos, end, records, b'\n')
+        start = space + 1
+        stop = start + length
+        if stop > end:
+            return -1
+        records.append(bytes(view[start:stop]))
+        # Tolerate senders that still append a trailer after an octet-counted frame
+        if stop < end and buffer[stop] == 10:
+            stop += 1
+        return stop
+    #End of _octet_record()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def flush(self):
+        """Return (and drop) whatever is buffered. Call when the peer closes the connection"""
+        tail = bytes(self._buffer)
+        self._buffer.clear()
+        return tail
+    #End of flush()
+    #--------------------------------------------------------------
+#End of StreamFramer class()
+#**********************************************************************************
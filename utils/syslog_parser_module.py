@@ -0,0 +1,162 @@
+#Module: syslog_parser_module.py
+# # # This module implements a single-pass syslog parser for RFC 3164 (BSD) and RFC 5424 messages.
+# # # Instead of compiling regexes on every datagram and trying 5424 then 3164, it decodes the <PRI> prefix
+# # # with a lookup table and dispatches on the byte that follows it (a digit means RFC 5424 VERSION,
+# # # anything else is RFC 3164). Each branch runs exactly one header pattern that is compiled once at import.
+# # # Parsed messages are returned as a compact SyslogRecord (__slots__) with facility/severity decoded.
+# # #--------------------------------------------------------------
+
+import re
+
+#-----------------------  Importing my modules & local configs -------------------
+NILVALUE = '-'      # RFC 5424 NILVALUE
+MAX_PRI = 191       # Highest valid PRI (facility 23, severity 7)
+FACILITY_NAMES = ('kern', 'user', 'mail', 'daemon', 'auth', 'syslog', 'lpr', 'news',
+                  'uucp', 'cron', 'authpriv', 'ftp', 'ntp', 'security', 'console', 'solaris-cron',
+                  'local0', 'local1', 'local2', 'local3', 'local4', 'local5', 'local6', 'local7')
+SEVERITY_NAMES = ('emerg', 'alert', 'crit', 'err', 'warning', 'notice', 'info', 'debug')
+_PRI_TABLE = {f"<{pri}>": pri for pri in range(MAX_PRI + 1)}     # "<165>" -> 165
+# RFC 5424 header up to (not including) STRUCTURED-DATA. SD is scanned by _structured_data_end()
+_RFC5424_HEADER = re.compile(r"(\d{1,3}) (\S+) (\S+) (\S+) (\S+) (\S+) ?")
+# RFC 3164: optional "Mmm dd hh:mm:ss HOSTNAME " then optional "TAG[PID]: " then MSG
+_RFC3164 = re.compile(r"(?:([A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d) (\S+) )?(?:([^\s:\[]{1,48})(?:\[([^\]\s]*)\])?: )?(.*)", re.S)
+#-----------------------  Importing my modules & local configs -------------------
+
+#*********************************************************************************
+# SyslogRecord Class
+# Compact record returned by parse_syslog(). Uses __slots__ so millions of records do not each carry a __dict__.
+class SyslogRecord:
+    __slots__ = ('rfc', 'pri', 'facility', 'severity', 'version', 'timestamp', 'hostname',
+                 'appname', 'procid', 'msgid', 'structured_data', 'message')
+
+    #--------------------------------------------------------------
+    def __init__(self, rfc, pri, version=None, timestamp=None, hostname=None, appname=None,
+                 procid=None, msgid=None, structured_data=None, message=''):
+        self.rfc = rfc
+        self.pri = pri
+        self.facility = pri >> 3        # PRI = facility * 8 + severity
+        self.severity = pri & 7
+        self.version = version
+        self.timestamp = timestamp
+        self.hostname = hostname
+        self.appname = appname
+        self.procid = procid
+        self.msgid = msgid
+        self.structured_data = structured_data
+        self.message = message
+    #End of __init__()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def get(self, key, default=None):
+        """dict-style access so callers written against groupdict() keep working"""
+        value = getattr(self, key, None)
+        return default if value is None else value
+    #End of get()
+    #--------------------------------------------------------------
+    #--------------------------------------------------------------
+    def as_dict(self):
+        """Return the record as a plain dict (debug output/json)"""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+    #End of as_dict()
+    #--------------------------------------------------------------
+    def __repr__(self):
+        return f"SyslogRecord({self.rfc}, pri={self.pri}, host={self.hostname}, app={self.appname}, msg={self.message!r})"
+#End of SyslogRecord class()
+#**********************************************************************************
+
+#--------------------------------------------------------------
+# Find the end of an RFC 5424 STRUCTURED-DATA block ("[id k="v"][id2 ...]"). Honors quoted values
+# and backslash escapes so a ']' inside a PARAM-VALUE does not end the element. Uses str.find() hops
+# instead of a per-character loop.
+def _structured_data_end(text):
+    pos = 0
+    while True:
+        close = text.find(']', pos)
+        if close < 0:
+            return len(text)
+        quote = text.find('"', pos, close)
+        if quote < 0:
+            if text[close + 1:close + 2] != '[':
+                return close + 1
+            pos = close + 1     # Next SD-ELEMENT follows directly
+            continue
+        end_quote = quote
+        while True:             # Skip the quoted PARAM-VALUE (\" does not close it)
+            end_quote = text.find('"', end_quote + 1)
+            if end_quote < 0:
+                return len(text)
+            backslashes = 0
+            while text[end_quote - 1 - backslashes] == '\\':
+                backslashes += 1
+            if backslashes % 2 == 0:
+                break
+        pos = end_quote + 1
+#End of _structured_data_end()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _parse_5424(data, pri, pos):
+    """<PRI>VERSION SP TIMESTAMP SP HOSTNAME SP APP-NAME SP PROCID SP MSGID SP STRUCTURED-DATA [SP MSG]"""
+    match = _RFC5424_HEADER.match(data, pos)
+    if match is None:
+        return None
+    version, timestamp, hostname, appname, procid, msgid = match.groups()
+    rest = data[match.end():]
+
+    if rest[:1] == '[':
+        end = _structured_data_end(rest)
+        structured_data = rest[:end]
+        message = rest[end + 1:] if rest[end:end + 1] == ' ' else rest[end:]
+    elif rest[:1] == NILVALUE:
+        structured_data = None
+        message = rest[2:]
+    else:
+        structured_data = None
+        message = rest
+    if message[:1] == '\ufeff':     # Strip UTF-8 BOM
+        message = message[1:]
+
+    return SyslogRecord("RFC5424", pri, int(version),
+                        None if timestamp == NILVALUE else timestamp,
+                        None if hostname == NILVALUE else hostname,
+                        None if appname == NILVALUE else appname,
+                        None if procid == NILVALUE else procid,
+                        None if msgid == NILVALUE else msgid,
+                        structured_data, message)
+#End of _parse_5424()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def _parse_3164(data, pri, pos):
+    """<PRI>Mmm dd hh:mm:ss HOSTNAME TAG[PID]: MSG   (anything after PRI is kept as MSG when the header is missing)"""
+    timestamp, hostname, appname, procid, message = _RFC3164.match(data, pos).groups()
+    return SyslogRecord("RFC3164", pri, None, timestamp, hostname, appname, procid, None, None, message)
+#End of _parse_3164()
+#--------------------------------------------------------------
+#--------------------------------------------------------------
+def parse_syslog(data):
+    """
+    Parse one syslog message (str or bytes) and return a SyslogRecord, or None if there is no valid <PRI>.
+    Dispatch is keyed on the byte after '>': a digit is an RFC 5424 VERSION, anything else is RFC 3164.
+    """
+    if not isinstance(data, str):
+        data = bytes(data).decode('utf-8', 'replace')
+    # PRI is 1-3 digits. Try the common 2 and 3 digit forms first
+    pri = _PRI_TABLE.get(data[:4])
+    if pri is not None:
+        pos = 4
+    else:
+        pri = _PRI_TABLE.get(data[:5])
+        if pri is not None:
+            pos = 5
+        else:
+            pri = _PRI_TABLE.get(data[:3])
+            if pri is None:
+                return None
+            pos = 3
+
+    if data[pos:pos + 1].isdigit():
+        record = _parse_5424(data, pri, pos)
+        if record is not None:
+            return record
+    return _parse_3164(data, pri, pos)
+#End of parse_syslog()
+#--------------------------------------------------------------